@@ -50,6 +50,7 @@ import datetime
 import pandas as pd
 import matplotlib.pyplot as plt
 from utils.getdata import *
+from factor.data import TradeCalendar
 
 start = '2010-01-01'
 end = '2022-02-01'
@@ -74,15 +75,14 @@ concentration =  concentration.dropna(how='any')
 concentration_list = concentration.index.tolist()
 later = concentration_list[0]
 trade_dates_daily = trade_date(start, end, freq='daily')
+calendar = TradeCalendar(trade_dates_daily)
 _start = list()
 _end = list()
 for date in concentration_list:
     if date < later:
         continue
     # 观察 突破阈值后 30天 hs300指数的变化
-    later = date + datetime.timedelta(days=30)
-    while later not in trade_dates_daily:
-        later = later + datetime.timedelta(days=1)
+    later = calendar.next_on_or_after(date + datetime.timedelta(days=30))
     # 2014-12-05 00:00:00 (<class 'pandas._libs.tslibs.timestamps.Timestamp'>) -> datetime.date(2010, 1, 29) (datetime.date)
     _start.append(date.to_pydatetime().date())
     _end.append(later.to_pydatetime().date())
@@ -119,6 +119,7 @@ import matplotlib.pyplot as plt
 from utils.getdata import *
 import datetime
 from matplotlib import font_manager
+from factor.data import TradeCalendar
 my_font = font_manager.FontProperties(fname='/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf')
 
 start = '2010-01-01'
@@ -130,6 +131,7 @@ concentration.rename(columns={'0': 'data'}, inplace=True)
 concentration_ori = concentration.copy()
 
 trade_dates_daily = trade_date(start, end, freq='daily')
+calendar = TradeCalendar(trade_dates_daily)
 
 
 # 由于验证前需要有一定的历史数据，所以从2011年开始计算。
@@ -140,24 +142,13 @@ val_start = '2011-01-01'
 # --
 # 选出超过历史值95%和小于历史值5%的日期
 s = pd.Series(trade_dates_daily)
-end_date = datetime.datetime.strptime(end, '%Y-%m-%d').date()
 below_low_date = list()
 above_high_date = list()
 low_list = list()
 high_list = list()
 val_date = list()
 
-flag = False
-cur_date = val_start
-while cur_date <= end:
-    cur_date = datetime.datetime.strptime(cur_date, '%Y-%m-%d').date()
-    while cur_date not in trade_dates_daily:
-        cur_date = cur_date + datetime.timedelta(days=1)
-        if cur_date > end_date:
-            flag = True
-            break
-    if flag:
-        break
+for cur_date in calendar.range(val_start, end).date:
     past = s.where(s < cur_date).dropna(how='any')
     tmp_concentration = concentration.loc[past]
     tmp_concentration = tmp_concentration['data'].sort_values()
@@ -170,8 +161,6 @@ while cur_date <= end:
     low_list.append(low)
     high_list.append(high)
     val_date.append(cur_date)
-    cur_date = cur_date + datetime.timedelta(days=1)
-    cur_date = datetime.datetime.strftime(cur_date, '%Y-%m-%d')
     
 
 # --
@@ -5,6 +5,9 @@ import pandasquant as pq
 from .data import *
 from .indicators import *
 from .strategies import *
+from .vector import backtest, smacross_target, bolling_target
+from .sweep import sweep
+from .portfolio import portfolio
 
 
 # Get dataset
@@ -59,6 +62,22 @@ result[0].analyzers.ordertable.rets.printer.display(title='order table')
 cerebro.plot(style='candle')
 plt.savefig('test.png')
 
+# Screen the signal strategies with the vectorized engine
+# price = stockdaily('600362', '20190101', '20220701')
+# vector = backtest(price['close'], smacross_target(price['close']), price['open'], cash=1000000)
+# pq.Console.print(vector.analyzers['sharperatio'])
+# pq.Console.print(vector.analyzers['timedrawdown'])
+
+# Rank the parameters of a strategy over all cpus
+# ranking = sweep(SMACrossStrategy, {'fast': [5, 10, 20], 'slow': [30, 60, 120]}, price)
+# ranking.printer.display(title='parameter sweep')
+
+# Run a strategy across a stock pool with shared cash
+# pool = marketpool(['600362', '000001', '600519'], '20190101', '20220701')
+# result = portfolio(TurtleStrategy, pool, cash=1000000)
+# pq.Console.print(dict(result.analyzers.sharperatio.rets))
+# pq.Console.print({data._name: result.getposition(data).size for data in result.datas})
+
 # Visualize the networth curve
 # _, ax = plt.subplots(1, 1, figsize=(12, 8))
 # ax.plot((timereturn + 1).cumprod())
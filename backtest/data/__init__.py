@@ -1,2 +1,3 @@
 from .fund import etffeedsina
-from .stock import marketdaily
\ No newline at end of file
+from .stock import marketdaily, stockdaily, stockpool, marketpool
+from .factor import factordaily
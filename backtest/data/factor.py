@@ -0,0 +1,34 @@
+import pandas as pd
+import pandasquant as pq
+import backtrader as bt
+from factor.store import FactorStore
+from .stock import stockdaily
+
+
+def factordaily(code: str, start: str, end: str, path: str, names: 'str | list',
+                asset: str = None, fromdate: str = None, todate: str = None):
+    '''Daily market feed of a stock with factor lines from a factor store
+    --------------------------------------------------------------------
+
+    Every factor becomes a line of the feed named after it, e.g.
+    `self.data.momentum_20[0]` in a strategy, with nan on the dates the
+    factor has no valid value.
+
+    code: str, stock code in akshare form, e.g. '600362'
+    start: str, first date of the market data
+    end: str, last date of the market data
+    path: str, root directory of the factor store
+    names: str or list, factor names to read
+    asset: str, asset code in the factor store, default to code
+    '''
+    names = [names] if isinstance(names, str) else list(names)
+    data = stockdaily(code, start, end)
+    store = FactorStore(path)
+    for name in names:
+        factor = store.read(name, start, end, assets=[asset or code], wide=True)
+        data[name] = factor.iloc[:, 0].reindex(data.index)
+    feed = type('FactorData', (bt.feeds.PandasData, ), {'lines': tuple(names),
+        'params': tuple((name, -1) for name in names)})
+    fromdate = pq.str2time(fromdate) if fromdate else data.index[0]
+    todate = pq.str2time(todate) if todate else data.index[-1]
+    return feed(dataname=data, fromdate=fromdate, todate=todate)
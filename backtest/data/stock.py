@@ -1,21 +1,104 @@
+import warnings
 import akshare as ak
 import pandas as pd
 import pandasquant as pq
 import backtrader as bt
+from functools import reduce
+from concurrent.futures import ThreadPoolExecutor
 
 
-@pq.Cache(prefix='stockmarketdaily')
-def marketdaily(code: str, start: str, end: str, fromdate: str = None, todate: str = None):
+def stockdaily(code: str, start: str, end: str) -> pd.DataFrame:
     data = ak.stock_zh_a_hist(symbol=code, period='daily', start_date=start, end_date=end)
     data = data.rename(columns={'日期': 'datetime', '开盘': 'open', '收盘': 'close', '最高': 'high',
         '最低': 'low', '成交量': 'volume'}).drop(['成交额', '振幅', '涨跌幅', 
         '换手率', '涨跌额'], axis=1).set_index('datetime')
     data.index = pd.to_datetime(data.index)
+    return data
+
+@pq.Cache(prefix='stockmarketdaily')
+def marketdaily(code: str, start: str, end: str, fromdate: str = None, todate: str = None):
+    data = stockdaily(code, start, end)
     fromdate = pq.str2time(fromdate) if fromdate else data.index[0]
     todate = pq.str2time(todate) if todate else data.index[-1]
     feed = bt.feeds.PandasData(dataname=data, fromdate=fromdate, todate=todate)
     return feed
 
+def _align(data: pd.DataFrame, calendar: pd.DatetimeIndex, last: pd.Timestamp = None) -> pd.DataFrame:
+    '''Put a stock on the calendar from its first trade date to last, default
+    to its own last trade date, the dates without a trade repeat the last
+    close as open, high, low and close with no volume'''
+    data = data[~data.index.duplicated()].sort_index()
+    last = data.index[-1] if last is None else last
+    data = data.reindex(calendar[(calendar >= data.index[0]) & (calendar <= last)])
+    close = data['close'].ffill()
+    for column in ('open', 'high', 'low'):
+        data[column] = data[column].fillna(close)
+    data['close'] = close
+    data['volume'] = data['volume'].fillna(0)
+    return data.ffill()
+
+def stockpool(codes: list, start: str, end: str, workers: int = 16) -> dict:
+    '''Daily market data of a stock pool on a common calendar
+    --------------------------------------------------------
+
+    The codes are downloaded concurrently by a thread pool, the requests
+    wait on the network, so the threads overlap them. Every stock is put
+    on the union of the trade dates of the pool between its own first and
+    last trade date, a suspended day repeats the last close as open, high,
+    low and close with no volume.
+
+    codes: list, stock codes in akshare form, e.g. ['600362', '000001']
+    start: str, first date of the market data
+    end: str, last date of the market data
+    workers: int, number of concurrent downloads
+    return: dict, aligned dataframes by code in the order of codes, the
+        codes failing to load or without data are left out with a warning
+    '''
+    with ThreadPoolExecutor(workers) as executor:
+        futures = {code: executor.submit(stockdaily, code, start, end) for code in codes}
+    data, failed = {}, []
+    for code, future in futures.items():
+        try:
+            frame = future.result()
+        except Exception:
+            frame = None
+        if frame is None or frame.empty:
+            failed.append(code)
+        else:
+            data[code] = frame
+    if failed:
+        warnings.warn(f'{len(failed)} codes are left out without data: {", ".join(failed)}')
+    if not data:
+        return data
+    calendar = reduce(pd.Index.union, (frame.index for frame in data.values())).rename('datetime')
+    return {code: _align(frame, calendar) for code, frame in data.items()}
+
+def marketpool(codes: list, start: str, end: str, fromdate: str = None,
+               todate: str = None, workers: int = 16) -> list:
+    '''Market feeds of a stock pool on a common calendar
+    ---------------------------------------------------
+
+    The feeds are named after their codes and built on the frames of
+    `stockpool`. A stock ending before the pool, e.g. delisted, is carried
+    to the last date of the pool with bars of no volume, since the line
+    buffers bounded to the lookback in `portfolio` cannot hold a feed that
+    stops early. Bars without volume are never traded, the strategies skip
+    them and `portfolio` fills no order on them.
+
+    codes: list, stock codes in akshare form, e.g. ['600362', '000001']
+    start: str, first date of the market data
+    end: str, last date of the market data
+    return: list, `bt.feeds.PandasData` feeds in the order of codes
+    '''
+    data = stockpool(codes, start, end, workers)
+    if data:
+        calendar = reduce(pd.Index.union, (frame.index for frame in data.values()))
+        data = {code: _align(frame, calendar, calendar[-1]) for code, frame in data.items()}
+    fromdate = pq.str2time(fromdate) if fromdate else None
+    todate = pq.str2time(todate) if todate else None
+    return [bt.feeds.PandasData(dataname=frame, name=code, fromdate=fromdate or frame.index[0],
+        todate=todate or frame.index[-1]) for code, frame in data.items()]
+
 
 if __name__ == '__main__':
-    print(marketdaily('000001.SZ', '2019-01-01', '2019-01-31'))
\ No newline at end of file
+    print(marketdaily('000001.SZ', '2019-01-01', '2019-01-31'))
@@ -0,0 +1,58 @@
+import backtrader as bt
+from .data import marketpool
+
+
+def _traded(order: bt.Order, price: float, ago: int) -> float:
+    '''Volume filler filling nothing on a bar without volume, e.g. a
+    suspended day, or on the bar the order was created at, e.g. the last
+    bar of a feed that has ended before the others'''
+    data = order.data
+    if data.volume[ago] == 0 or data.datetime[ago] <= order.created.dt:
+        return 0
+    return abs(order.executed.remsize)
+
+def portfolio(strategy: type, feeds: list, cash: float = 1000000, commission: float = 0.,
+              exactbars: int = 1, analyzers: list = None, **params) -> bt.Strategy:
+    '''Run a strategy across a pool of assets in one engine
+    ------------------------------------------------------
+
+    All the feeds go to one cerebro, so the strategy trades every asset
+    from one broker with shared cash, and the broker tracks the position
+    of each feed, e.g. `result.getposition(result.getdatabyname('600362'))`.
+    An order is kept pending over the bars without volume, e.g. suspended
+    days or the days after a stock is delisted, and fills on the next
+    traded bar, so nothing is traded at a stale price.
+    With exactbars the lines of the feeds, indicators and observers only
+    keep the bars their lookback needs instead of the whole history,
+    plotting is not available then.
+
+    strategy: type, a `pq.Strategy` subclass trading all of its datas,
+        e.g. `TurtleStrategy`
+    feeds: list, market feeds on a common calendar, e.g. from `marketpool`
+    cash: float, starting cash
+    commission: float, commission rate
+    exactbars: int, memory mode of `bt.Cerebro`, 1 keeps the lookback only,
+        0 keeps the whole history
+    analyzers: list, analyzer classes to add, default to the sharpe ratio,
+        drawdown and time return
+    params: parameters of the strategy
+    return: bt.Strategy, the strategy after the run with its analyzers
+    '''
+    cerebro = bt.Cerebro(stdstats=False, exactbars=exactbars)
+    cerebro.broker.setcash(cash)
+    cerebro.broker.setcommission(commission=commission)
+    cerebro.broker.set_filler(_traded)
+    for feed in feeds:
+        cerebro.adddata(feed)
+    cerebro.addstrategy(strategy, **params)
+    for analyzer in analyzers or (bt.analyzers.SharpeRatio, bt.analyzers.TimeDrawDown,
+            bt.analyzers.TimeReturn):
+        cerebro.addanalyzer(analyzer)
+    return cerebro.run()[0]
+
+def portfoliodaily(strategy: type, codes: list, start: str, end: str, cash: float = 1000000,
+                   commission: float = 0., workers: int = 16, **params) -> bt.Strategy:
+    '''Load a stock pool concurrently and run a strategy across it, see
+    `marketpool` and `portfolio`'''
+    return portfolio(strategy, marketpool(codes, start, end, workers=workers),
+        cash=cash, commission=commission, **params)
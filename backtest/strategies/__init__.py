@@ -2,4 +2,5 @@ from .grid import GridStrategy
 from .trend import (
     SMACrossStrategy,
     TurtleStrategy,
+    BollingStrategy,
     )
\ No newline at end of file
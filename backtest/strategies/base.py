@@ -0,0 +1,6 @@
+def traded(datas: list) -> list:
+    '''Datas with a traded bar at the current time, a feed that has ended
+    or is suspended with no volume is left out'''
+    started = [data for data in datas if len(data)]
+    now = max((data.datetime[0] for data in started), default=None)
+    return [data for data in started if data.datetime[0] == now and data.volume[0] != 0]
@@ -2,66 +2,84 @@ import numpy as np
 import backtrader as bt
 import pandasquant as pq
 from ..indicators import *
+from .base import traded
 
 
 
 class GridStrategy(pq.Strategy):
-    params = (('cashnum', 5),)
+    params = (('cashnum', 5), ('period', 20))
     
     def __init__(self) -> None:
-        self.grids = Grid(period=20)
-        self.levels = [self.grids.level1, self.grids.level2, self.grids.level3, self.grids.level4, self.grids.level5]
-        self.grid = self.grids.grid
-        self.pregrid = self.grids.grid(-1)
-        self.griddiff = self.grid - self.pregrid
-        self.cashes = [self.broker.getcash() / self.p.cashnum for _ in range(self.p.cashnum)]
-        self.holds = []
+        self.grids, self.levels, self.grid, self.griddiff = {}, {}, {}, {}
+        for data in self.datas:
+            grids = Grid(data, period=self.p.period)
+            self.grids[data] = grids
+            self.levels[data] = [grids.level1, grids.level2, grids.level3, grids.level4, grids.level5]
+            self.grid[data] = grids.grid
+            self.griddiff[data] = grids.grid - grids.grid(-1)
+        # the cash is shared evenly by the assets
+        cash = self.broker.getcash() / self.p.cashnum / len(self.datas)
+        self.cashes = {data: [cash for _ in range(self.p.cashnum)] for data in self.datas}
+        self.holds = {data: [] for data in self.datas}
+        self.order = {data: None for data in self.datas}
     
     def notify_order(self, order: bt.Order):
+        data = order.data
         if order.status in [order.Created, order.Accepted, order.Submitted]:
             return
         elif order.status in [order.Completed]:
             self.log(f'Trade <{order.executed.size}> at <{order.executed.price}>')
             if order.isbuy():
-                self.cashes.pop()
-                self.holds.append(order.executed.size)
+                self.cashes[data].pop()
+                self.holds[data].append(order.executed.size)
             else:
-                self.holds.pop()
-                self.cashes.append(-order.executed.price * order.executed.size)
+                self.holds[data].pop()
+                self.cashes[data].append(-order.executed.price * order.executed.size)
         elif order.status in [order.Canceled, order.Margin, order.Rejected, order.Expired]:
             self.log(f'order failed to execute')
 
-    def buygrid(self, grid: int):
-        if self.cashes:
+    def buygrid(self, data: bt.feeds.DataBase, grid: int):
+        if self.cashes[data]:
             if grid == 0:
-                self.order = self.buy(size=self.cashes[-1] // self.data.low[0],
-                    exectype=bt.Order.Limit, price=self.data.low[0])
+                self.order[data] = self.buy(data=data, size=self.cashes[data][-1] // data.low[0],
+                    exectype=bt.Order.Limit, price=data.low[0])
             else:
-                self.order = self.buy(size=self.cashes[-1] // self.levels[int(grid - 1)][0],
-                    exectype=bt.Order.Limit, price=self.levels[int(grid - 1)][0])
+                level = self.levels[data][int(grid - 1)][0]
+                self.order[data] = self.buy(data=data, size=self.cashes[data][-1] // level,
+                    exectype=bt.Order.Limit, price=level)
         else:
             self.log(f'Grid drop, no cash to buy', hint='WARN')
 
-    def sellgrid(self, grid: int):
-        if self.holds:
+    def sellgrid(self, data: bt.feeds.DataBase, grid: int):
+        if self.holds[data]:
             if grid == 4:
-                self.order = self.sell(size=self.holds[-1], exectype=bt.Order.Limit, price=self.data.high[0])
+                self.order[data] = self.sell(data=data, size=self.holds[data][-1],
+                    exectype=bt.Order.Limit, price=data.high[0])
             else:
-                self.order = self.sell(size=self.holds[-1], exectype=bt.Order.Limit, price=self.levels[int(grid)][0])
+                self.order[data] = self.sell(data=data, size=self.holds[data][-1],
+                    exectype=bt.Order.Limit, price=self.levels[data][int(grid)][0])
         else:
             self.log(f'Grid raise, no holds to sell', hint='WARN')
 
-    def nextstart(self):
-        self.log(f'start with {self.grid[0]}')
-        self.buygrid(self.grid[0])
-    
-    def next(self):
-        if self.griddiff[0] < 0:
-            if self.order.status not in [self.order.Canceled, self.order.Completed, self.order.Rejected, self.order.Expired]:
-                self.cancel(self.order)
-            self.buygrid(self.grid[0])
-        elif self.griddiff[0] > 0:
-            if self.order.status not in [self.order.Canceled, self.order.Completed, self.order.Rejected, self.order.Expired]:
-                self.cancel(self.order)
-            self.sellgrid(self.grid[0])
+    def cancelgrid(self, data: bt.feeds.DataBase):
+        order = self.order[data]
+        if order is not None and order.status not in [order.Canceled, order.Completed, order.Rejected, order.Expired]:
+            self.cancel(order)
 
+    def prenext(self):
+        self.next()
+
+    def next(self):
+        for data in traded(self.datas):
+            if len(data) <= self.p.period:
+                continue
+            # the grid of an asset starts on its first traded bar with a grid difference
+            elif self.order[data] is None:
+                self.log(f'start with {self.grid[data][0]}')
+                self.buygrid(data, self.grid[data][0])
+            elif self.griddiff[data][0] < 0:
+                self.cancelgrid(data)
+                self.buygrid(data, self.grid[data][0])
+            elif self.griddiff[data][0] > 0:
+                self.cancelgrid(data)
+                self.sellgrid(data, self.grid[data][0])
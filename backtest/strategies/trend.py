@@ -1,68 +1,104 @@
 import numpy as np
 import backtrader as bt
 import pandasquant as pq
+from .base import traded
 
 
 class SMACrossStrategy(pq.Strategy):
+    params = (('fast', 5), ('slow', 10))
+
     def __init__(self):
-        sma5 = bt.indicators.SMA(period=5)
-        sma10 = bt.indicators.SMA(period=10)
-        self.buycross = bt.And(sma5(-1) <= sma10(-1), sma5 > sma10)
-        self.sellcross = bt.And(sma5(-1) >= sma10(-1), sma5 < sma10)
+        self.buycross, self.sellcross = {}, {}
+        for data in self.datas:
+            sma5 = bt.indicators.SMA(data, period=self.p.fast)
+            sma10 = bt.indicators.SMA(data, period=self.p.slow)
+            self.buycross[data] = bt.And(sma5(-1) <= sma10(-1), sma5 > sma10)
+            self.sellcross[data] = bt.And(sma5(-1) >= sma10(-1), sma5 < sma10)
+        # the cash is shared evenly by the assets
+        self.target = 1 / len(self.datas)
+
+    def prenext(self):
+        self.next()
     
     def next(self):
-        if self.buycross[0]:
-            self.order_target_percent(target=1)
+        for data in traded(self.datas):
+            if len(data) <= max(self.p.fast, self.p.slow):
+                continue
+            if self.buycross[data][0]:
+                self.order_target_percent(data=data, target=self.target)
 
-        elif self.sellcross[0]:
-            self.order_target_percent(target=0)
+            elif self.sellcross[data][0]:
+                self.order_target_percent(data=data, target=0)
 
 
 class TurtleStrategy(pq.Strategy):
+    params = (('atrperiod', 14), ('unit', 0.1), ('breakout', 20))
     
     def __init__(self) -> None:
-        self.atr = bt.indicators.ATR(period=14)
-        self.unit = 0.1
-        self.currentpos = 0
-        self.order = None
-        self.lastbuyprice = np.inf
-        self.alreadybuy = False
-        high = bt.indicators.Highest(self.data.high, period=20)
-        self.buysig = high(-1) <= self.data.close
+        self.atr, self.buysig = {}, {}
+        for data in self.datas:
+            self.atr[data] = bt.indicators.ATR(data, period=self.p.atrperiod)
+            high = bt.indicators.Highest(data.high, period=self.p.breakout)
+            self.buysig[data] = high(-1) <= data.close
+        # the cash is shared evenly by the assets
+        self.unit = self.p.unit / len(self.datas)
+        self.currentpos = {data: 0 for data in self.datas}
+        self.lastbuyprice = {data: np.inf for data in self.datas}
+        self.alreadybuy = {data: False for data in self.datas}
+        self.stops = {data: None for data in self.datas}
+
+    def prenext(self):
+        self.next()
 
     def next(self):
-        if self.buysig[0] and not self.alreadybuy:
-            self.order_target_percent(target=self.currentpos + self.unit)
+        for data in traded(self.datas):
+            if len(data) <= max(self.p.atrperiod, self.p.breakout):
+                continue
+            if self.buysig[data][0] and not self.alreadybuy[data]:
+                self.order_target_percent(data=data, target=self.currentpos[data] + self.unit)
 
-        elif self.alreadybuy and self.data.close[0] >= self.lastbuyprice + self.atr[0]:
-            self.order_target_percent(target=self.currentpos + self.unit)
+            elif self.alreadybuy[data] and data.close[0] >= self.lastbuyprice[data] + self.atr[data][0]:
+                self.order_target_percent(data=data, target=self.currentpos[data] + self.unit)
 
     def notify_order(self, order):
+        data = order.data
         if order.status in [order.Created, order.Accepted, order.Submitted]:
             return
         elif order.status in [order.Completed]:
             self.log(f'Trade <{order.executed.size}> at <{order.executed.price}>')
             if order.isbuy():
-                self.currentpos += self.unit
-                self.lastbuyprice = order.executed.price
-                self.alreadybuy = True
-                if len(self.broker.pending) > 0:
-                    # price = self.broker.pending[0].price + self.atr[0]
-                    self.cancel(self.broker.pending[0])
+                self.currentpos[data] += self.unit
+                self.lastbuyprice[data] = order.executed.price
+                self.alreadybuy[data] = True
+                if self.stops[data] is not None and self.stops[data].alive():
+                    # price = self.stops[data].price + self.atr[data][0]
+                    self.cancel(self.stops[data])
                 # else:
-                price = order.executed.price - self.atr[0]
-                self.sell(size=self.getposition().size, 
+                price = order.executed.price - self.atr[data][0]
+                self.stops[data] = self.sell(data=data, size=self.getposition(data).size, 
                     exectype=bt.Order.Stop, price=price)
             else:
-                self.alreadybuy = False
-                self.currentpos = 0
+                self.alreadybuy[data] = False
+                self.currentpos[data] = 0
 
 class BollingStrategy(pq.Strategy):
+    params = (('period', 20), ('devfactor', 2), ('target', 0.95))
+
     def __init__(self):
-        self.bollinger = bt.indicators.BollingerBands(period=20, devfactor=2)
+        self.bollinger = {data: bt.indicators.BollingerBands(data, period=self.p.period,
+            devfactor=self.p.devfactor) for data in self.datas}
+        # the cash is shared evenly by the assets
+        self.target = self.p.target / len(self.datas)
+
+    def prenext(self):
+        self.next()
     
     def next(self):
-        if self.data.close[0] >= self.bollinger.bot[0] and self.data.close[-1] < self.bollinger.bot[-1]:
-            self.order_target_percent(target=0.95)
-        elif self.data.close[0] <= self.bollinger.top[0] and self.data.close[-1] > self.bollinger.top[-1]:
-            self.order_target_percent(target=0)
+        for data in traded(self.datas):
+            if len(data) <= self.p.period:
+                continue
+            bollinger = self.bollinger[data]
+            if data.close[0] >= bollinger.bot[0] and data.close[-1] < bollinger.bot[-1]:
+                self.order_target_percent(data=data, target=self.target)
+            elif data.close[0] <= bollinger.top[0] and data.close[-1] > bollinger.top[-1]:
+                self.order_target_percent(data=data, target=0)
@@ -0,0 +1,129 @@
+import itertools
+import numpy as np
+import pandas as pd
+import backtrader as bt
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+
+
+class SharedFrame:
+    '''A float dataframe kept in shared memory
+    -----------------------------------------
+
+    The values and the datetime index are copied once into two shared
+    memory blocks, every process attaching to them by name reads the same
+    pages, so a feed is never pickled to the workers.
+
+    data: pd.DataFrame, datetime indexed numeric frame, e.g. `stockdaily`
+    '''
+
+    def __init__(self, data: pd.DataFrame):
+        values = data.to_numpy(dtype=np.float64)
+        index = pd.DatetimeIndex(data.index).values.astype('datetime64[ns]').astype(np.int64)
+        self.columns = list(data.columns)
+        self.shape = values.shape
+        self._values = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        self._index = shared_memory.SharedMemory(create=True, size=max(index.nbytes, 1))
+        np.ndarray(values.shape, np.float64, self._values.buf)[:] = values
+        np.ndarray(index.shape, np.int64, self._index.buf)[:] = index
+        self.names = (self._values.name, self._index.name)
+
+    def __getstate__(self) -> dict:
+        return {'columns': self.columns, 'shape': self.shape, 'names': self.names}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._values, self._index = (_attach(name) for name in self.names)
+
+    def frame(self) -> pd.DataFrame:
+        '''A dataframe viewing the shared blocks, no data is copied'''
+        values = np.ndarray(self.shape, np.float64, self._values.buf)
+        index = np.ndarray(self.shape[:1], np.int64, self._index.buf)
+        return pd.DataFrame(values, index=pd.DatetimeIndex(index.view('datetime64[ns]'), name='datetime'),
+            columns=self.columns, copy=False)
+
+    def close(self) -> None:
+        self._values.close()
+        self._index.close()
+
+    def unlink(self) -> None:
+        '''Release the blocks, only the creating process should call it'''
+        self.close()
+        self._values.unlink()
+        self._index.unlink()
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # workers share the resource tracker of the creating process, which
+    # unlinks the block, python 3.13 can skip the tracking altogether
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+_feed = None
+
+def _initialize(shared: SharedFrame) -> None:
+    global _feed
+    _feed = shared
+
+def _run(strategy: type, params: dict, cash: float, commission: float) -> dict:
+    '''Run one parameter set on the shared feed, return its analyzer results'''
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker.setcash(cash)
+    cerebro.broker.setcommission(commission=commission)
+    cerebro.adddata(bt.feeds.PandasData(dataname=_feed.frame()))
+    cerebro.addstrategy(strategy, **params)
+    cerebro.addanalyzer(bt.analyzers.SharpeRatio)
+    cerebro.addanalyzer(bt.analyzers.TimeDrawDown)
+    try:
+        result = cerebro.run()[0]
+    except Exception as exception:
+        return dict(params, error=f'{type(exception).__name__}: {exception}')
+    value = cerebro.broker.getvalue()
+    drawdown = result.analyzers.timedrawdown.get_analysis()
+    return dict(params, value=value, ret=value / cash - 1,
+        sharperatio=result.analyzers.sharperatio.get_analysis().get('sharperatio'),
+        maxdrawdown=drawdown.get('maxdrawdown'), maxdrawdownperiod=drawdown.get('maxdrawdownperiod'),
+        error=None)
+
+def grid(**params: list) -> list:
+    '''Every combination of the parameter values, e.g.
+    `grid(fast=[5, 10], slow=[20, 60])` gives 4 parameter sets'''
+    return [dict(zip(params, values)) for values in itertools.product(*params.values())]
+
+def sweep(strategy: type, params: 'dict | list', data: pd.DataFrame, cash: float = 1000000,
+          commission: float = 0., processes: int = None, sort: str = 'sharperatio',
+          ascending: bool = False) -> pd.DataFrame:
+    '''Run a strategy over a parameter grid in parallel
+    --------------------------------------------------
+
+    The feed is put in shared memory once and every worker process
+    attaches to it when it starts, so only the strategy and its
+    parameters are sent with each run.
+
+    strategy: type, a `pq.Strategy` subclass, e.g. `GridStrategy`
+    params: dict or list, lists of values by parameter name, every
+        combination is run, or a list of parameter dicts
+    data: pd.DataFrame, datetime indexed open, high, low, close, volume
+    cash: float, starting cash
+    commission: float, commission rate
+    processes: int, number of worker processes, default to the number of cpus
+    sort: str, column to rank the runs by
+    ascending: bool, whether a lower value ranks first
+    return: pd.DataFrame, one row per parameter set with the final value,
+        return, sharpe ratio, max drawdown and its period, ranked by sort
+    '''
+    combinations = grid(**params) if isinstance(params, dict) else list(params)
+    shared = SharedFrame(data)
+    try:
+        with ProcessPoolExecutor(processes, initializer=_initialize, initargs=(shared, )) as executor:
+            results = list(executor.map(_run, itertools.repeat(strategy), combinations,
+                itertools.repeat(cash), itertools.repeat(commission)))
+    finally:
+        shared.unlink()
+    results = pd.DataFrame(results)
+    if sort in results:
+        results = results.sort_values(sort, ascending=ascending, na_position='last', ignore_index=True)
+    results.index = pd.RangeIndex(1, len(results) + 1, name='rank')
+    return results
@@ -0,0 +1,192 @@
+import heapq
+import numpy as np
+import pandas as pd
+
+
+def _frame(data: 'pd.Series | pd.DataFrame') -> pd.DataFrame:
+    return data.to_frame() if isinstance(data, pd.Series) else data
+
+def signal_target(entries: 'pd.Series | pd.DataFrame', exits: 'pd.Series | pd.DataFrame',
+                  weight: float = 1.) -> 'pd.Series | pd.DataFrame':
+    '''Target weights from entry and exit signals, an entry wins over an
+    exit on the same bar and bars without a signal place no order'''
+    return entries.astype(float).where(entries | exits) * weight
+
+def smacross_target(close: 'pd.Series | pd.DataFrame', fast: int = 5,
+                    slow: int = 10) -> 'pd.Series | pd.DataFrame':
+    '''Target weights of `SMACrossStrategy`, all in when the fast average
+    crosses above the slow one and out when it crosses below'''
+    fast, slow = close.rolling(fast).mean(), close.rolling(slow).mean()
+    entries = (fast.shift(1) <= slow.shift(1)) & (fast > slow)
+    exits = (fast.shift(1) >= slow.shift(1)) & (fast < slow)
+    return signal_target(entries, exits)
+
+def bolling_target(close: 'pd.Series | pd.DataFrame', period: int = 20,
+                   devfactor: float = 2., weight: float = 0.95) -> 'pd.Series | pd.DataFrame':
+    '''Target weights of `BollingStrategy`, in when the close crosses back
+    above the bottom band and out when it crosses back below the top band'''
+    middle = close.rolling(period).mean()
+    deviation = close.rolling(period).std(ddof=0) * devfactor
+    top, bottom = middle + deviation, middle - deviation
+    entries = (close >= bottom) & (close.shift(1) < bottom.shift(1))
+    exits = (close <= top) & (close.shift(1) > top.shift(1))
+    return signal_target(entries, exits, weight)
+
+
+class VectorResult:
+    '''Result of a vectorized backtest
+    ---------------------------------
+
+    value: pd.Series, portfolio value at every close
+    cash: pd.Series, cash at every close
+    positions: pd.DataFrame, shares held at every close
+    orders: pd.DataFrame, executed and rejected orders
+    cash0: float, starting cash
+    '''
+
+    def __init__(self, value: pd.Series, cash: pd.Series, positions: pd.DataFrame,
+                 orders: pd.DataFrame, cash0: float):
+        self.value = value
+        self.cash = cash
+        self.positions = positions
+        self.orders = orders
+        self.cash0 = cash0
+
+    def returns(self, timeframe: str = 'D') -> pd.Series:
+        '''Returns like `bt.analyzers.TimeReturn`, timeframe is 'D' for
+        every bar, 'W', 'M' or 'Y', the first period starts from the cash'''
+        value = self.value if timeframe == 'D' else \
+            self.value.groupby(self.value.index.to_period(timeframe)).last()
+        previous = value.shift(1)
+        previous.iloc[:1] = self.cash0
+        return value / previous - 1
+
+    def sharpe_ratio(self, timeframe: str = 'Y', riskfreerate: float = 0.01,
+                     annualize: bool = False, periods: int = None) -> float:
+        '''Sharpe ratio like `bt.analyzers.SharpeRatio`, the excess returns
+        over the period risk free rate divided by their population standard
+        deviation, by default on yearly returns with a 1% risk free rate
+
+        timeframe: str, 'D', 'W', 'M' or 'Y'
+        riskfreerate: float, yearly risk free rate
+        annualize: bool, whether to scale the ratio by sqrt(periods)
+        periods: int, periods in a year, 252 days, 52 weeks, 12 months or 1 year
+        '''
+        periods = periods or {'D': 252, 'W': 52, 'M': 12, 'Y': 1}[timeframe]
+        returns = self.returns(timeframe).to_numpy()
+        excess = returns - ((1 + riskfreerate) ** (1 / periods) - 1)
+        deviation = excess.std()
+        if not len(excess) or deviation == 0:
+            return np.nan
+        ratio = excess.mean() / deviation
+        return ratio * np.sqrt(periods) if annualize else ratio
+
+    def drawdown(self) -> dict:
+        '''Drawdown like `bt.analyzers.TimeDrawDown`, the max drawdown in
+        percent and the longest run of bars below the previous peak'''
+        value = self.value.to_numpy()
+        peak = np.maximum.accumulate(value)
+        drawdown = 100 * (peak - value) / peak
+        new_peak = np.concatenate([[True], value[1:] > peak[:-1]])
+        below = pd.Series(drawdown > 0).groupby(np.cumsum(new_peak)).cumsum().to_numpy()
+        return {'maxdrawdown': float(drawdown.max(initial=0)),
+            'maxdrawdownperiod': int(below.max(initial=0))}
+
+    @property
+    def analyzers(self) -> dict:
+        '''Results in the form of the `rets` of the backtrader analyzers'''
+        return {'timereturn': self.returns(), 'sharperatio': {'sharperatio': self.sharpe_ratio()},
+            'timedrawdown': self.drawdown()}
+
+    def __repr__(self) -> str:
+        return (f'VectorResult({len(self.value)} bars, value {self.value.iloc[-1]:.2f}, '
+            f'{int(self.orders["executed"].sum()) if len(self.orders) else 0} orders)')
+
+
+def backtest(close: 'pd.Series | pd.DataFrame', target: 'pd.Series | pd.DataFrame',
+             open: 'pd.Series | pd.DataFrame' = None, cash: float = 1000000.,
+             commission: float = 0.) -> VectorResult:
+    '''Vectorized backtest of target weights
+    ---------------------------------------
+
+    Every non-nan target weight is one `order_target_percent` call at the
+    close of its bar: the order is sized from the portfolio value and the
+    position value at that close, in whole shares toward zero, a zero
+    weight closes the position, and it is filled at the next valid open
+    like a backtrader market order. Sells are filled before buys on a bar,
+    and a buy costing more than the cash with commission is rejected.
+
+    Only the bars with a signal or a fill are visited, the portfolio value
+    in between is computed for all bars at once.
+
+    close: pd.Series or pd.DataFrame, close prices, dates by assets
+    target: pd.Series or pd.DataFrame, target weights, nan places no order
+    open: pd.Series or pd.DataFrame, open prices, default to the close
+    cash: float, starting cash
+    commission: float, commission rate on the traded value
+    return: VectorResult
+    '''
+    close = _frame(close)
+    index, assets = close.index, close.columns
+    opens = (close if open is None else _frame(open).reindex(index=index, columns=assets)).to_numpy(dtype=float)
+    weights = _frame(target).reindex(index=index, columns=assets).to_numpy(dtype=float)
+    price = np.nan_to_num(close.ffill().to_numpy(dtype=float))
+    dates, number = price.shape
+    start = float(cash)
+
+    # the first row with a valid open strictly after each row
+    rows = np.where(np.isnan(opens), dates, np.arange(dates)[:, None])
+    next_open = np.minimum.accumulate(rows[::-1], axis=0)[::-1]
+    next_open = np.concatenate([next_open[1:], np.full((1, number), dates)])
+
+    signals = np.nonzero(~np.isnan(weights).all(axis=1))[0]
+    events = list(signals)
+    heapq.heapify(events)
+    signals = set(signals.tolist())
+    pending = {}
+    orders = []
+
+    position = np.zeros(number)
+    values, cashes = np.empty(dates), np.empty(dates)
+    positions = np.empty((dates, number))
+    last = 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        while events:
+            row = heapq.heappop(events)
+            if row < last:
+                continue
+            values[last:row] = cash + price[last:row] @ position
+            cashes[last:row] = cash
+            positions[last:row] = position
+
+            for asset, size in sorted(pending.pop(row, []), key=lambda order: order[1]):
+                fill = opens[row, asset]
+                amount = size * fill
+                fee = abs(amount) * commission
+                executed = size < 0 or amount + fee <= cash
+                if executed:
+                    cash -= amount + fee
+                    position[asset] += size
+                orders.append((row, asset, size, fill, fee, executed))
+
+            value = cash + price[row] @ position
+            if row in signals:
+                weight = weights[row]
+                size = np.trunc((weight * value - position * price[row]) / price[row])
+                size = np.where((weight == 0) & (position != 0), -position, size)
+                for asset in np.nonzero(~np.isnan(weight) & np.isfinite(size) & (size != 0))[0]:
+                    fill_row = next_open[row, asset]
+                    if fill_row < dates:
+                        pending.setdefault(fill_row, []).append((asset, size[asset]))
+                        heapq.heappush(events, fill_row)
+            values[row], cashes[row], positions[row] = value, cash, position
+            last = row + 1
+
+    values[last:] = cash + price[last:] @ position
+    cashes[last:] = cash
+    positions[last:] = position
+    orders = pd.DataFrame(orders, columns=['datetime', 'asset', 'size', 'price', 'commission', 'executed'])
+    orders['datetime'] = index[orders['datetime'].to_numpy(dtype=int)]
+    orders['asset'] = assets[orders['asset'].to_numpy(dtype=int)]
+    return VectorResult(pd.Series(values, index=index, name='value'), pd.Series(cashes, index=index, name='cash'),
+        pd.DataFrame(positions, index=index, columns=assets), orders, start)
@@ -0,0 +1,169 @@
+import os
+import json
+import shutil
+import hashlib
+import inspect
+import datetime
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from .panel import Panel, PanelField
+from .universe import Universe
+
+
+def _fingerprint(obj, digest: 'hashlib._Hash') -> None:
+    if isinstance(obj, (pd.Series, pd.DataFrame, pd.Index)):
+        digest.update(type(obj).__name__.encode())
+        digest.update(pd.util.hash_pandas_object(obj).to_numpy().tobytes())
+        if isinstance(obj, pd.DataFrame):
+            digest.update(repr(obj.columns.tolist()).encode())
+    elif isinstance(obj, np.ndarray):
+        digest.update(str(obj.dtype).encode() + str(obj.shape).encode())
+        digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        digest.update(f'{type(obj).__name__}{len(obj)}'.encode())
+        for item in obj:
+            _fingerprint(item, digest)
+    elif isinstance(obj, dict):
+        digest.update(f'dict{len(obj)}'.encode())
+        for key in sorted(obj, key=repr):
+            _fingerprint(key, digest)
+            _fingerprint(obj[key], digest)
+    elif isinstance(obj, PanelField):
+        digest.update(f'PanelField{obj.name}'.encode())
+        _fingerprint(obj.panel, digest)
+    elif isinstance(obj, Panel):
+        digest.update(b'Panel')
+        _fingerprint([obj.dates, obj.assets, obj.mask, obj.fields, obj.groups], digest)
+    elif isinstance(obj, Universe):
+        digest.update(b'Universe')
+        _fingerprint([obj.dates, obj.assets, obj.bits], digest)
+    elif inspect.isfunction(obj) or inspect.isclass(obj):
+        digest.update(f'{obj.__module__}.{obj.__qualname__}'.encode())
+        if inspect.isfunction(obj):
+            digest.update(_source(obj).encode())
+    elif obj is None or isinstance(obj, (str, bytes, int, float, complex, slice, range, np.generic,
+            datetime.date, datetime.time, datetime.timedelta, pd.Period, pd.Timedelta)):
+        digest.update(f'{type(obj).__name__}{obj!r}'.encode())
+    else:
+        # any other repr may leave out the content or hold the object id
+        raise TypeError(f'cannot build a cache key from an argument of type {type(obj).__name__}')
+
+def _source(func) -> str:
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        return func.__qualname__ + func.__code__.co_code.hex()
+
+def path_version(*paths: str) -> str:
+    '''Version of files or directories by the size and mtime of every file
+    ---------------------------------------------------------------------
+
+    paths: str, files or directories the factor reads from
+    return: str, a digest changing whenever any file changes
+    '''
+    digest = hashlib.sha256()
+    for path in paths:
+        path = Path(path)
+        files = sorted(path.rglob('*')) if path.is_dir() else [path]
+        for file in files:
+            if file.is_file():
+                stat = file.stat()
+                digest.update(f'{file}:{stat.st_size}:{stat.st_mtime_ns}'.encode())
+    return digest.hexdigest()
+
+
+class FactorCache:
+    '''Content addressed, size bounded on-disk cache of computed factors
+    -------------------------------------------------------------------
+
+    Each entry is a directory named by the key and holding plain `.npy`
+    arrays, which are memory mapped on load. The modification time of an
+    entry is refreshed on every hit, and the least recently used entries
+    are evicted once the cache grows beyond `max_bytes`.
+
+    path: str, root directory of the cache
+    max_bytes: int, size limit of the cache in bytes
+    '''
+
+    def __init__(self, path: str, max_bytes: int = 8 * 1024 ** 3):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def key(self, func, args: tuple, kwargs: dict, settings: dict, data_version=None) -> str:
+        '''Key of a factor call from the function source, arguments,
+        preprocess settings and the version of its input data
+        ------------------------------------------------------
+
+        Arguments are fingerprinted by content, an argument of any other
+        type, e.g. a `FactorStore` or a database connection, raises a
+        TypeError, pass its path or a plain value instead.
+
+        func: function, the factor function
+        args: tuple, positional arguments of the call
+        kwargs: dict, keyword arguments of the call
+        settings: dict, preprocess settings of the factor
+        data_version: str, version of the data the function reads, e.g.
+            from `path_version`, None leaves the data out of the key
+        return: str, hex digest of the call
+        '''
+        digest = hashlib.sha256()
+        digest.update(_source(func).encode())
+        _fingerprint([args, kwargs, settings, data_version], digest)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> pd.Series:
+        entry = self.path / key
+        if not (entry / 'meta.json').exists():
+            return None
+        with open(entry / 'meta.json') as f:
+            meta = json.load(f)
+        os.utime(entry / 'meta.json')
+
+        load = lambda name: np.load(entry / f'{name}.npy', mmap_mode='r')
+        index = pd.MultiIndex(levels=[pd.DatetimeIndex(load('dates')), pd.Index(load('assets'))],
+            codes=[load('date_codes'), load('asset_codes')], names=['datetime', 'asset'],
+            verify_integrity=False)
+        return pd.Series(load('values'), index=index, name=meta['name'])
+
+    def put(self, key: str, factor: pd.Series) -> None:
+        date_codes, dates = pd.factorize(factor.index.get_level_values(0), sort=True)
+        asset_codes, assets = pd.factorize(factor.index.get_level_values(1), sort=True)
+
+        # write into a temporary directory first, so readers never see half an entry
+        temporary = self.path / f'.{key}.{os.getpid()}'
+        temporary.mkdir(parents=True, exist_ok=True)
+        np.save(temporary / 'values.npy', factor.to_numpy())
+        np.save(temporary / 'dates.npy', np.asarray(dates, dtype='datetime64[ns]'))
+        np.save(temporary / 'assets.npy', np.asarray(assets).astype(str))
+        np.save(temporary / 'date_codes.npy', date_codes.astype(np.int32))
+        np.save(temporary / 'asset_codes.npy', asset_codes.astype(np.int32))
+        with open(temporary / 'meta.json', 'w') as f:
+            json.dump({'name': factor.name}, f)
+
+        entry = self.path / key
+        if entry.exists():
+            shutil.rmtree(entry)
+        os.replace(temporary, entry)
+        self.evict()
+
+    def entries(self) -> pd.DataFrame:
+        '''Size and last access time of every entry'''
+        records = []
+        for entry in self.path.iterdir():
+            if entry.name.startswith('.') or not (entry / 'meta.json').exists():
+                continue
+            size = sum(file.stat().st_size for file in entry.iterdir())
+            records.append((entry.name, size, (entry / 'meta.json').stat().st_mtime))
+        return pd.DataFrame(records, columns=['key', 'size', 'access'])
+
+    def evict(self) -> None:
+        entries = self.entries().sort_values('access', ascending=False)
+        overflow = entries['size'].cumsum() > self.max_bytes
+        for key in entries.loc[overflow, 'key']:
+            shutil.rmtree(self.path / key, ignore_errors=True)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.path.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,3 @@
+from .planner import QueryPlanner
+from .store import LocalStore
+from .calendar import TradeCalendar
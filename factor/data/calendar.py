@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pandasquant as pq
+
+
+class TradeCalendar:
+    '''Trading days in memory as a sorted integer day array
+    ------------------------------------------------------
+
+    Every lookup takes a scalar or a vector of dates and is answered by
+    `searchsorted` on the day numbers, so shifting a whole date vector by n
+    trading days is one binary search plus an index offset. Scalars return
+    a `pd.Timestamp`, vectors a `pd.DatetimeIndex`, and NaT marks a result
+    outside the calendar.
+
+    dates: array-like, trading days in any order
+    '''
+
+    def __init__(self, dates: 'pd.DatetimeIndex | list'):
+        days = pd.to_datetime(pd.Index(dates)).values.astype('datetime64[D]').astype(np.int64)
+        self.days = np.unique(days)
+
+    @classmethod
+    def from_source(cls, source=pq.Stock, code: str = '000001.SH',
+                    start: str = '1990-01-01', end: str = None) -> 'TradeCalendar':
+        '''Load the trade dates of an index from `pq.Stock` or a compatible source'''
+        end = end or pd.Timestamp.today().strftime('%Y-%m-%d')
+        data = source.index_market_daily(start, end, fields='pct_change', code=code)
+        return cls(data.index.get_level_values(0))
+
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.days.astype('datetime64[D]').astype('datetime64[ns]'))
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @staticmethod
+    def _days(dates) -> np.ndarray:
+        dates = pd.to_datetime(dates)
+        dates = np.atleast_1d(np.asarray(dates, dtype='datetime64[ns]'))
+        return dates.astype('datetime64[D]').astype(np.int64)
+
+    def _lookup(self, dates, position) -> 'pd.Timestamp | pd.DatetimeIndex':
+        position = position(self._days(dates))
+        inside = (position >= 0) & (position < len(self.days))
+        result = np.full(position.shape, np.datetime64('NaT'), dtype='datetime64[D]')
+        result[inside] = self.days[position[inside]].astype('datetime64[D]')
+        result = pd.DatetimeIndex(result.astype('datetime64[ns]'))
+        return result[0] if np.ndim(dates) == 0 else result
+
+    def offset(self, dates, n: int) -> 'pd.Timestamp | pd.DatetimeIndex':
+        '''The trade date n trade dates after each date, before it if n is
+        negative, a date off the calendar counts from the next trade date'''
+        return self._lookup(dates, lambda days: np.searchsorted(self.days, days) + n)
+
+    def next_on_or_after(self, dates) -> 'pd.Timestamp | pd.DatetimeIndex':
+        return self._lookup(dates, lambda days: np.searchsorted(self.days, days))
+
+    def previous_on_or_before(self, dates) -> 'pd.Timestamp | pd.DatetimeIndex':
+        return self._lookup(dates, lambda days: np.searchsorted(self.days, days, side='right') - 1)
+
+    def is_trade_date(self, dates) -> 'bool | np.ndarray':
+        days = self._days(dates)
+        position = np.searchsorted(self.days, days)
+        found = np.zeros(days.shape, dtype=bool)
+        inside = position < len(self.days)
+        found[inside] = self.days[position[inside]] == days[inside]
+        return found[0] if np.ndim(dates) == 0 else found
+
+    def range(self, start: str = None, end: str = None) -> pd.DatetimeIndex:
+        '''Trade dates between start and end, both included'''
+        dates = self.dates
+        first = 0 if start is None else dates.searchsorted(pd.to_datetime(start))
+        last = len(dates) if end is None else dates.searchsorted(pd.to_datetime(end), side='right')
+        return dates[first:last]
+
+    def period_end(self, freq: str, start: str = None, end: str = None) -> pd.DatetimeIndex:
+        '''Last trade date of every period, freq is 'M' for month, 'Q' for
+        quarter or 'Y' for year, the last period ends at the last trade date'''
+        if freq not in ('M', 'Q', 'Y'):
+            raise ValueError('freq should be "M", "Q" or "Y"')
+        months = self.days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        periods = {'M': months, 'Q': months // 3, 'Y': months // 12}[freq]
+        last = np.append(periods[1:] != periods[:-1], True) if len(periods) else np.array([], bool)
+        dates = pd.DatetimeIndex(self.days[last].astype('datetime64[D]').astype('datetime64[ns]'))
+        first = 0 if start is None else dates.searchsorted(pd.to_datetime(start))
+        stop = len(dates) if end is None else dates.searchsorted(pd.to_datetime(end), side='right')
+        return dates[first:stop]
+
+    def month_end(self, start: str = None, end: str = None) -> pd.DatetimeIndex:
+        return self.period_end('M', start, end)
+
+    def quarter_end(self, start: str = None, end: str = None) -> pd.DatetimeIndex:
+        return self.period_end('Q', start, end)
+
+    def nearby_n_trade_date(self, date: str, n: int) -> str:
+        '''Scalar `offset` formatted like `pq.Stock.nearby_n_trade_date`'''
+        return self.offset(date, n).strftime('%Y-%m-%d')
+
+    def __repr__(self) -> str:
+        if not len(self.days):
+            return 'TradeCalendar(empty)'
+        return f'TradeCalendar({len(self.days)} dates, {self.dates[0].date()} to {self.dates[-1].date()})'
@@ -0,0 +1,174 @@
+import warnings
+import pandas as pd
+import pandasquant as pq
+from contextlib import contextmanager
+
+
+TABLES = ('market_daily', 'derivative_indicator', 'pit_financial', 'intensity_trend',
+    'financial_indicator', 'balance_sheet', 'income_sheet', 'cashflow_sheet')
+INDEX_TABLES = ('index_market_daily', 'index_weight')
+
+
+def _fields(fields: 'str | list') -> list:
+    return [fields] if isinstance(fields, str) else list(fields)
+
+def _normalize(data: pd.DataFrame) -> pd.DataFrame:
+    if isinstance(data.index, pd.MultiIndex):
+        data.index = data.index.set_levels(pd.to_datetime(data.index.levels[0]), level=0)
+    return data
+
+def _empty(fields: list) -> pd.DataFrame:
+    index = pd.MultiIndex.from_arrays([pd.DatetimeIndex([]), pd.Index([], dtype=object)],
+        names=['datetime', 'asset'])
+    return pd.DataFrame({field: pd.Series(dtype=float) for field in fields}, index=index)
+
+@contextmanager
+def _using(factor, source):
+    previous = factor.__dict__.get('source')
+    factor.source = source
+    try:
+        yield factor
+    finally:
+        if previous is None:
+            del factor.source
+        else:
+            factor.source = previous
+
+
+class _Recorder:
+    '''Source recording the table requests of factors instead of reading
+    them, index tables are small and drive the trade calendar, so they are
+    read once and kept'''
+
+    def __init__(self, planner: 'QueryPlanner'):
+        self.planner = planner
+
+    def __getattr__(self, name: str):
+        if name in TABLES:
+            def record(start, end, fields=None, **kwargs):
+                self.planner.requests.append((name, tuple(sorted(kwargs.items())),
+                    pd.to_datetime(start), pd.to_datetime(end), _fields(fields)))
+                return _empty(_fields(fields))
+            return record
+        if name in INDEX_TABLES:
+            return self.planner._index_table(name)
+        return getattr(self.planner.source, name)
+
+
+class _Replay:
+    '''Source serving table requests from the coalesced query results,
+    requests outside any result are read from the underlying source'''
+
+    def __init__(self, planner: 'QueryPlanner'):
+        self.planner = planner
+
+    def __getattr__(self, name: str):
+        if name in TABLES:
+            def read(start, end, fields=None, **kwargs):
+                start, end, fields = pd.to_datetime(start), pd.to_datetime(end), _fields(fields)
+                result = self.planner.results.get((name, tuple(sorted(kwargs.items()))))
+                if result is None or start < result[0] or end > result[1] \
+                        or not set(fields) <= set(result[2].columns):
+                    return getattr(self.planner.source, name)(start.strftime('%Y-%m-%d'),
+                        end.strftime('%Y-%m-%d'), fields=fields, **kwargs)
+                data = result[2]
+                dates = data.index.get_level_values(0)
+                return data.loc[(dates >= start) & (dates <= end), fields].copy()
+            return read
+        if name in INDEX_TABLES:
+            return self.planner._index_table(name)
+        return getattr(self.planner.source, name)
+
+
+class QueryPlanner:
+    '''Coalesce the table requests of a batch of factors
+    ---------------------------------------------------
+
+    Every factor is first run against a recording source, which returns
+    empty tables and keeps each (table, date range, fields) request. The
+    requests of each table are merged into one query over the union of
+    their date ranges and fields, those queries are read once, and every
+    factor is then run again against the shared results, which hand it
+    the rows and columns it asked for.
+
+    A factor failing on the empty tables keeps the requests made before
+    the failure, its later requests are read directly in the second run,
+    where any real error of the factor is raised. Every failure is kept
+    in `failures` by factor name and reported with a warning.
+
+    source: object, the source of the tables, `pq.Stock` by default
+    '''
+
+    def __init__(self, source=pq.Stock):
+        self.source = source
+        self.requests = []
+        self.failures = {}
+        self.results = {}
+        self._index = {}
+
+    def _index_table(self, name: str):
+        def read(*args, **kwargs):
+            key = (name, args, tuple(sorted((key, str(value)) for key, value in kwargs.items())))
+            if key not in self._index:
+                self._index[key] = getattr(self.source, name)(*args, **kwargs)
+            return self._index[key].copy()
+        return read
+
+    def record(self, factors: list, compute) -> None:
+        '''Record the requests of `compute(factor)` for every factor'''
+        recorder = _Recorder(self)
+        for factor in factors:
+            with _using(factor, recorder):
+                try:
+                    compute(factor)
+                except Exception as exception:
+                    name = getattr(factor, 'name', repr(factor))
+                    self.failures[name] = exception
+                    warnings.warn(f'recording {name} stopped at {type(exception).__name__}: '
+                        f'{exception}, its later requests are read directly', stacklevel=2)
+
+    def queries(self) -> pd.DataFrame:
+        '''The merged query of every table'''
+        if not self.requests:
+            return pd.DataFrame(columns=['table', 'kwargs', 'start', 'end', 'fields', 'requests'])
+        requests = pd.DataFrame(self.requests, columns=['table', 'kwargs', 'start', 'end', 'fields'])
+        return requests.groupby(['table', 'kwargs'], sort=False).agg(
+            start=('start', 'min'), end=('end', 'max'),
+            fields=('fields', lambda fields: sorted(set().union(*fields))),
+            requests=('fields', 'size')).reset_index()
+
+    def fetch(self) -> None:
+        '''Read every merged query from the source'''
+        for query in self.queries().itertuples():
+            data = getattr(self.source, query.table)(query.start.strftime('%Y-%m-%d'),
+                query.end.strftime('%Y-%m-%d'), fields=query.fields, **dict(query.kwargs))
+            self.results[(query.table, query.kwargs)] = (query.start, query.end, _normalize(data))
+        self.requests = []
+
+    def replay(self, factor):
+        '''Context in which the factor reads from the fetched results'''
+        return _using(factor, _Replay(self))
+
+    def execute(self, factors: list, compute) -> dict:
+        self.record(factors, compute)
+        self.fetch()
+        result = {}
+        for factor in factors:
+            with self.replay(factor):
+                result[factor.name] = compute(factor)
+        return result
+
+    def run(self, factors: list, start, end) -> dict:
+        '''Calculate a batch of factors over a date range with coalesced queries
+        -----------------------------------------------------------------------
+
+        factors: list, FactorBase instances
+        start: str, first date of the range
+        end: str, last date of the range
+        return: dict, factor name and its (datetime, asset) series
+        '''
+        return self.execute(factors, lambda factor: factor.calculate_range(start, end))
+
+    def call(self, factors: list, date) -> dict:
+        '''Calculate a batch of factors on one date with coalesced queries'''
+        return self.execute(factors, lambda factor: factor(date))
@@ -0,0 +1,98 @@
+import shutil
+import pandas as pd
+import pandasquant as pq
+import pyarrow.parquet as parquet
+from pathlib import Path
+from .planner import TABLES, INDEX_TABLES
+from .calendar import TradeCalendar
+
+
+class LocalStore:
+    '''Local date partitioned parquet mirror of the pq.Stock tables
+    --------------------------------------------------------------
+
+    Every table lives in its own directory, partitioned by the year of its
+    date column, e.g. `<path>/market_daily/year=2020/part-0.parquet`, with
+    rows sorted by date so that the row group statistics narrow a read
+    further inside a year. Reads only touch the requested columns, prune
+    partitions and row groups by the date range, and memory map the files.
+
+    The table methods take the same arguments as `pq.Stock`, e.g.
+    `store.market_daily(start, end, fields='pct_change')`, so a store can
+    be used as the `source` of any factor or of a `QueryPlanner`.
+
+    path: str, root directory of the store
+    calendar: str, index code whose trade dates are the trade calendar
+    '''
+
+    tables = TABLES + INDEX_TABLES
+
+    def __init__(self, path: str, calendar: str = '000001.SH'):
+        self.path = Path(path)
+        self.calendar = calendar
+        self._calendar = None
+
+    def write(self, table: str, data: pd.DataFrame) -> None:
+        '''Write a (datetime, asset) indexed table, rows of a year already
+        stored are replaced by the new rows of the same date and asset'''
+        data = data.copy()
+        data.index.names = ['datetime', 'asset']
+        data = data.reset_index()
+        data['datetime'] = pd.to_datetime(data['datetime'])
+        for year, part in data.groupby(data['datetime'].dt.year):
+            partition = self.path / table / f'year={year}'
+            if partition.exists():
+                stored = pd.read_parquet(partition)
+                part = pd.concat([stored, part]).drop_duplicates(['datetime', 'asset'], keep='last')
+                shutil.rmtree(partition)
+            partition.mkdir(parents=True)
+            part = part.sort_values(['datetime', 'asset'])
+            part.to_parquet(partition / 'part-0.parquet', index=False, row_group_size=50000)
+        if table == 'index_market_daily':
+            self._calendar = None
+
+    def sync(self, table: str, start: str, end: str, fields: 'str | list' = None, **kwargs) -> None:
+        '''Copy a date range of a table from pq.Stock into the store'''
+        self.write(table, getattr(pq.Stock, table)(start, end, fields=fields, **kwargs))
+
+    def read(self, table: str, start: str, end: str, fields: 'str | list' = None,
+             code: str = None) -> pd.DataFrame:
+        '''Read a table between start and end, both included
+        ---------------------------------------------------
+
+        table: str, table name
+        start: str, first date
+        end: str, last date
+        fields: str or list, columns to read, all columns if None
+        code: str, asset code to read, used by the index tables
+        return: pd.DataFrame, (datetime, asset) indexed rows
+        '''
+        start, end = pd.to_datetime(start), pd.to_datetime(end)
+        fields = [fields] if isinstance(fields, str) else fields
+        filters = [('year', '>=', start.year), ('year', '<=', end.year),
+            ('datetime', '>=', start.to_pydatetime()), ('datetime', '<=', end.to_pydatetime())]
+        if code is not None:
+            filters.append(('asset', '=', code))
+        data = parquet.read_table(self.path / table, filters=filters, memory_map=True,
+            columns=None if fields is None else ['datetime', 'asset'] + list(fields),
+            partitioning='hive').to_pandas()
+        return data.drop(columns='year', errors='ignore').set_index(['datetime', 'asset']).sort_index()
+
+    def __getattr__(self, name: str):
+        if name in self.tables:
+            def read(start, end, fields=None, **kwargs):
+                return self.read(name, start, end, fields=fields, **kwargs)
+            return read
+        raise AttributeError(name)
+
+    def trade_calendar(self) -> TradeCalendar:
+        '''Trade calendar of the calendar index in the store'''
+        if self._calendar is None:
+            dates = parquet.read_table(self.path / 'index_market_daily', columns=['datetime'],
+                filters=[('asset', '=', self.calendar)], partitioning='hive').column('datetime')
+            self._calendar = TradeCalendar(dates.to_numpy())
+        return self._calendar
+
+    def nearby_n_trade_date(self, date: str, n: int) -> str:
+        '''The trade date n trade dates after date, before it if n is negative'''
+        return self.trade_calendar().nearby_n_trade_date(date, n)
@@ -1,17 +1,61 @@
-# from .size import (AcmktCap, AmktCap, MarketCap)
-# from .technical import (Momentum, Turnover, Volatility, Ar, Br, Bias, Davol)
-# from .base import FactorBase
+from .base import FactorBase
+from .growth import (SalesGQ, ProfitGQ, OcfGQ, RoeGQ)
+from .leverage import (FinancialLeverage, DebtEquityRatio, CashRatio, CurrentRatio)
+from .pricevolume import (HAlpha, HBeta, Momentum, WeightedMomentum, ExpWeightedMomentum,
+    LogPrice, Amplitude)
+from .quality import (RoeQ, RoeTTM, RoaQ, RoaTTM, GrossProfitMarginQ, GrossProfitMarginTTM,
+    ProfitMarginQ, ProfitMarginTTM, AssetTurnoverQ, AssetTurnoverTTM,
+    OperationCashflowRatioQ, OperationCashflowRatioTTM)
+from .size import Capital
+from .technical import Macd
+from .turnover import (Turnover, BiasTurnover)
+from .valuation import (Ep, Epcut, Bp, Sp, Ncfp, Ocfp, Dp, Gpe)
+from .volatility import (Std, FF3F)
+from .registry import (FactorRegistry, build_library)
 
-# __all__ = [
-#     'AcmktCap', 
-#     'AmktCap', 
-#     'MarketCap',
-#     'Momentum', 
-#     'Turnover', 
-#     'Volatility', 
-#     'Ar', 
-#     'Br', 
-#     'Bias', 
-#     'Davol',
-#     'FactorBase'
-# ]
\ No newline at end of file
+__all__ = [
+    'FactorBase',
+    'SalesGQ',
+    'ProfitGQ',
+    'OcfGQ',
+    'RoeGQ',
+    'FinancialLeverage',
+    'DebtEquityRatio',
+    'CashRatio',
+    'CurrentRatio',
+    'HAlpha',
+    'HBeta',
+    'Momentum',
+    'WeightedMomentum',
+    'ExpWeightedMomentum',
+    'LogPrice',
+    'Amplitude',
+    'RoeQ',
+    'RoeTTM',
+    'RoaQ',
+    'RoaTTM',
+    'GrossProfitMarginQ',
+    'GrossProfitMarginTTM',
+    'ProfitMarginQ',
+    'ProfitMarginTTM',
+    'AssetTurnoverQ',
+    'AssetTurnoverTTM',
+    'OperationCashflowRatioQ',
+    'OperationCashflowRatioTTM',
+    'Capital',
+    'Macd',
+    'Turnover',
+    'BiasTurnover',
+    'Ep',
+    'Epcut',
+    'Bp',
+    'Sp',
+    'Ncfp',
+    'Ocfp',
+    'Dp',
+    'Gpe',
+    'Std',
+    'FF3F',
+    'FactorRegistry',
+    'build_library',
+]
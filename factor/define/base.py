@@ -0,0 +1,140 @@
+import weakref
+import numpy as np
+import pandas as pd
+import pandasquant as pq
+from ..engine import PointInTime
+from ..memory import downcast
+from ..data.calendar import TradeCalendar
+
+
+_calendars = weakref.WeakKeyDictionary()
+
+
+class FactorBase:
+    '''Base of the factor definitions
+    --------------------------------
+
+    Subclasses implement `calculate(date)`, which sets `self.factor` to
+    the asset indexed cross-section of one date. Calling the factor with a
+    date returns that cross-section as a (datetime, asset) series named
+    after the factor.
+
+    `calculate_range(start, end)` returns the factor on every trade date
+    in a range. By default it calls the per-date path for each date,
+    subclasses override it to fetch each input over the whole range once
+    and compute all the cross-sections together, with the same result.
+
+    Every table is read through `self.source`, `pq.Stock` by default,
+    which can be replaced by any object with the same table methods.
+
+    `params` lists the keyword arguments of every parameterization the
+    registry builds, a factor without arguments has one empty set.
+
+    With `compact` set, the factor is returned as float32 values, the
+    computation itself stays in float64.
+
+    name: str, factor name
+    '''
+
+    source = pq.Stock
+    calendar = '000001.SH'
+    params = [{}]
+    compact = False
+
+    def __init__(self, name: str):
+        self.name = name
+        self.klass = None
+        self.factor = None
+
+    def calculate(self, date) -> None:
+        raise NotImplementedError
+
+    def __call__(self, date) -> pd.Series:
+        self.calculate(date)
+        factor = self.factor.dropna()
+        factor.index = pd.MultiIndex.from_product([[pd.to_datetime(date)], factor.index],
+            names=['datetime', 'asset'])
+        factor.name = self.name
+        return downcast(factor) if self.compact else factor
+
+    def calculate_range(self, start, end) -> pd.Series:
+        dates = self.trade_dates(start, end)
+        return pd.concat([self(date) for date in dates]).rename(self.name)
+
+    def trade_calendar(self) -> TradeCalendar:
+        '''Trade calendar of the source, loaded once for every source'''
+        if self.source not in _calendars:
+            _calendars[self.source] = TradeCalendar.from_source(self.source, self.calendar)
+        return _calendars[self.source]
+
+    def trade_dates(self, start, end) -> pd.DatetimeIndex:
+        '''Trade dates between start and end, both included'''
+        return self.trade_calendar().range(start, end)
+
+    def nearby_n_trade_date(self, date, n: int) -> str:
+        '''The trade date n trade dates after date, before it if n is negative'''
+        return self.trade_calendar().nearby_n_trade_date(date, n)
+
+    def wide(self, data: pd.Series, start, end) -> pd.DataFrame:
+        '''Unstack a (datetime, asset) series onto the trade dates of a range,
+        so that a shift or rolling window of n rows spans n trade dates'''
+        data = data.unstack()
+        data.index = pd.to_datetime(data.index)
+        return data.reindex(self.trade_dates(start, end))
+
+    def frame(self, values: np.ndarray, like: pd.DataFrame) -> pd.DataFrame:
+        '''Wrap a kernel result in the dates and assets of a wide frame'''
+        return pd.DataFrame(values, index=like.index, columns=like.columns)
+
+    def present(self, *data: pd.Series, start, end) -> pd.DataFrame:
+        '''Wide boolean frame of the (datetime, asset) rows present in any input'''
+        index = data[0].index
+        for item in data[1:]:
+            index = index.union(item.index)
+        return self.wide(pd.Series(True, index=index), start, end).notna()
+
+    def series(self, data: 'pd.Series | pd.DataFrame', start=None) -> pd.Series:
+        '''Format a (datetime, asset) series or a wide dataframe as the factor'''
+        if isinstance(data, pd.DataFrame):
+            data = data.stack()
+        data = data.dropna()
+        data.index = data.index.set_levels(pd.to_datetime(data.index.levels[0]), level=0)
+        data.index.names = ['datetime', 'asset']
+        if start is not None:
+            data = data.loc[pd.to_datetime(start):]
+        data = data.sort_index().rename(self.name)
+        return downcast(data) if self.compact else data
+
+    def report_periods(self, start, end, n: int = 1) -> pd.DataFrame:
+        '''The `pq.nearest_report_period(date, n)` of every trade date in
+        a range, one column per period'''
+        dates = self.trade_dates(start, end)
+        return pd.DataFrame([pd.to_datetime(pq.nearest_report_period(date, n))
+            for date in dates], index=dates)
+
+    def report_table(self, table: str, periods: 'pd.Series | pd.DataFrame',
+                     fields: 'str | list') -> pd.DataFrame:
+        '''Fetch a report table once over all the report periods needed'''
+        periods = pd.Series(np.ravel(periods)).dropna()
+        data = getattr(self.source, table)(periods.min().strftime('%Y-%m-%d'),
+            periods.max().strftime('%Y-%m-%d'), fields=fields)
+        data.index = data.index.set_levels(pd.to_datetime(data.index.levels[0]), level=0)
+        return data
+
+    def by_report(self, data: pd.DataFrame, periods: pd.Series) -> pd.DataFrame:
+        '''Give every date the cross-section of its report period
+        --------------------------------------------------------
+
+        A report period counts as announced on the first date mapped onto
+        it, which turns the mapping into one point-in-time as-of join. Rows
+        of a stock missing the report period of a date are left out rather
+        than filled with an older report, as on the per-date path.
+
+        data: pd.DataFrame, (report period, asset) indexed report table
+        periods: pd.Series, date indexed report period of each date
+        return: pd.DataFrame, (datetime, asset) indexed report values
+        '''
+        known = periods.index.to_series().groupby(periods.to_numpy()).min()
+        result = PointInTime(data, data.index.get_level_values(0).map(known)).asof(periods.index)
+        expected = periods.reindex(result.index.get_level_values(0)).to_numpy()
+        return result[result.pop('report_period').to_numpy() == expected]
@@ -13,18 +13,28 @@ class SalesGQ(FactorGrowth):
     
     def calculate(self, date):
         report_date = pq.nearest_report_period(date, 1)[0]
-        self.factor = pq.Stock.financial_indicator(report_date, report_date, 
+        self.factor = self.source.financial_indicator(report_date, report_date, 
             fields='fa_yoy_or').droplevel(0).fa_yoy_or
 
+    def calculate_range(self, start, end):
+        periods = self.report_periods(start, end, 1)[0]
+        data = self.report_table('financial_indicator', periods, 'fa_yoy_or')
+        return self.series(self.by_report(data, periods).fa_yoy_or)
+
 class ProfitGQ(FactorGrowth):
     def __init__(self):
         super().__init__('profitgq')
     
     def calculate(self, date):
         report_date = pq.nearest_report_period(date, 1)[0]
-        self.factor = pq.Stock.financial_indicator(report_date, report_date,
+        self.factor = self.source.financial_indicator(report_date, report_date,
             fields='qfa_yoyprofit').droplevel(0).qfa_yoyprofit
 
+    def calculate_range(self, start, end):
+        periods = self.report_periods(start, end, 1)[0]
+        data = self.report_table('financial_indicator', periods, 'qfa_yoyprofit')
+        return self.series(self.by_report(data, periods).qfa_yoyprofit)
+
 class OcfGQ(FactorGrowth):
     def __init__(self):
         super().__init__('ocfgq')
@@ -33,21 +43,33 @@ class OcfGQ(FactorGrowth):
         report_dates = pq.nearest_report_period(date, 5)
         this_year = report_dates[-1]
         last_year = report_dates[0]
-        ocf_thisyear = pq.Stock.cashflow_sheet(this_year, this_year,
+        ocf_thisyear = self.source.cashflow_sheet(this_year, this_year,
             fields='net_cash_flows_oper_act').droplevel(0).net_cash_flows_oper_act
-        ocf_lastyear = pq.Stock.cashflow_sheet(last_year, last_year,
+        ocf_lastyear = self.source.cashflow_sheet(last_year, last_year,
             fields='net_cash_flows_oper_act').droplevel(0).net_cash_flows_oper_act
         self.factor = (ocf_thisyear - ocf_lastyear) / ocf_lastyear
 
+    def calculate_range(self, start, end):
+        periods = self.report_periods(start, end, 5)
+        ocf = self.report_table('cashflow_sheet', periods[[0, 4]], 'net_cash_flows_oper_act')
+        ocf_thisyear = self.by_report(ocf, periods[4]).net_cash_flows_oper_act
+        ocf_lastyear = self.by_report(ocf, periods[0]).net_cash_flows_oper_act
+        return self.series((ocf_thisyear - ocf_lastyear) / ocf_lastyear)
+
 class RoeGQ(FactorGrowth):
     def __init__(self):
         super().__init__('roegq')
     
     def calculate(self, date):
         report_date = pq.nearest_report_period(date, 1)[0]
-        self.factor = pq.Stock.financial_indicator(report_date, report_date,
+        self.factor = self.source.financial_indicator(report_date, report_date,
             fields='fa_yoyroe').droplevel(0).fa_yoyroe
 
+    def calculate_range(self, start, end):
+        periods = self.report_periods(start, end, 1)[0]
+        data = self.report_table('financial_indicator', periods, 'fa_yoyroe')
+        return self.series(self.by_report(data, periods).fa_yoyroe)
+
 
 if __name__ == '__main__':
     factor = RoeGQ()
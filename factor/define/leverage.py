@@ -13,11 +13,17 @@ class FinancialLeverage(FactorLeverage):
     
     def calculate(self, date):
         report_date = pq.nearest_report_period(date)[0]
-        asset = pq.Stock.balance_sheet(report_date, report_date, 
+        asset = self.source.balance_sheet(report_date, report_date, 
             fields='tot_assets').droplevel(0).tot_assets
-        liab = pq.Stock.balance_sheet(report_date, report_date,
+        liab = self.source.balance_sheet(report_date, report_date,
             fields='tot_liab').droplevel(0).tot_liab
         self.factor = asset / (asset - liab)
+
+    def calculate_range(self, start, end):
+        periods = self.report_periods(start, end)[0]
+        data = self.report_table('balance_sheet', periods, ['tot_assets', 'tot_liab'])
+        data = self.by_report(data, periods)
+        return self.series(data.tot_assets / (data.tot_assets - data.tot_liab))
     
 class DebtEquityRatio(FactorLeverage):
     def __init__(self):
@@ -25,13 +31,20 @@ class DebtEquityRatio(FactorLeverage):
     
     def calculate(self, date):
         report_date = pq.nearest_report_period(date)[0]
-        asset = pq.Stock.balance_sheet(report_date, report_date, 
+        asset = self.source.balance_sheet(report_date, report_date, 
             fields='tot_assets').droplevel(0).tot_assets
-        liab = pq.Stock.balance_sheet(report_date, report_date,
+        liab = self.source.balance_sheet(report_date, report_date,
             fields='tot_liab').droplevel(0).tot_liab
-        noncurliab = pq.Stock.balance_sheet(report_date, report_date,
+        noncurliab = self.source.balance_sheet(report_date, report_date,
             fields='tot_non_cur_liab').droplevel(0).tot_non_cur_liab
         self.factor = noncurliab / (asset - liab)
+
+    def calculate_range(self, start, end):
+        periods = self.report_periods(start, end)[0]
+        data = self.report_table('balance_sheet', periods,
+            ['tot_assets', 'tot_liab', 'tot_non_cur_liab'])
+        data = self.by_report(data, periods)
+        return self.series(data.tot_non_cur_liab / (data.tot_assets - data.tot_liab))
     
 class CashRatio(FactorLeverage):
     def __init__(self):
@@ -39,21 +52,32 @@ class CashRatio(FactorLeverage):
     
     def calculate(self, date):
         report_date = pq.nearest_report_period(date)[0]
-        cash = pq.Stock.balance_sheet(report_date, report_date,
+        cash = self.source.balance_sheet(report_date, report_date,
             fields='monetary_cap').droplevel(0).monetary_cap
-        asset = pq.Stock.balance_sheet(report_date, report_date, 
+        asset = self.source.balance_sheet(report_date, report_date, 
             fields='tot_assets').droplevel(0).tot_assets
         self.factor = cash / asset
 
+    def calculate_range(self, start, end):
+        periods = self.report_periods(start, end)[0]
+        data = self.report_table('balance_sheet', periods, ['monetary_cap', 'tot_assets'])
+        data = self.by_report(data, periods)
+        return self.series(data.monetary_cap / data.tot_assets)
+
 class CurrentRatio(FactorLeverage):
     def __init__(self):
         super().__init__('currentratio')
     
     def calculate(self, date):
         report_date = pq.nearest_report_period(date)[0]
-        self.factor = pq.Stock.financial_indicator(report_date, report_date,
+        self.factor = self.source.financial_indicator(report_date, report_date,
             fields='fa_current').droplevel(0).fa_current
 
+    def calculate_range(self, start, end):
+        periods = self.report_periods(start, end)[0]
+        data = self.report_table('financial_indicator', periods, 'fa_current')
+        return self.series(self.by_report(data, periods).fa_current)
+
 if __name__ == "__main__":
     factor = CurrentRatio()
     print(factor('20200106'))
\ No newline at end of file
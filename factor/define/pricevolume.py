@@ -1,126 +1,247 @@
 import numpy as np
 import pandas as pd
-import pandasquant as pq
+import pyarrow.dataset as dataset
 from ..tools import Factor
+from ..store import FactorStore
+from ..engine import rolling_mean, rolling_ewsum, rolling_trimmed_mean, rolling_regression
+from .base import FactorBase
 
 
+KLINE_PATH = '/home/pjq/data/kline_daily'
+
+def read_kline(path: str, columns: list, start=None, end=None, codes: list = None) -> pd.DataFrame:
+    '''Read columns of the kline dataset from start on and before end,
+    optionally of some codes only, the filters prune partitions and row
+    groups before any row is read'''
+    filters = []
+    if start is not None or end is not None or codes is not None:
+        schema = dataset.dataset(path, partitioning='hive').schema
+        date, code = schema.pandas_metadata['index_columns'][:2] if schema.pandas_metadata else schema.names[:2]
+    if start is not None:
+        filters.append((date, '>=', pd.Timestamp(start).to_pydatetime()))
+    if end is not None:
+        filters.append((date, '<', pd.Timestamp(end).to_pydatetime()))
+    if codes is not None:
+        filters.append((code, 'in', list(codes)))
+    return pd.read_parquet(path, columns=columns, filters=filters or None)
+
 @Factor(name='momentum')
-def momentum():
-    data = pd.read_parquet("/home/pjq/data/kline_daily")
-    ret = data['close'].converter.price2ret(period=20)
-    ret = ret.dropna()
+def momentum(period: int = 20, store: 'str | FactorStore' = None, path: str = KLINE_PATH):
+    '''Momentum of the close price in the kline dataset
+    -------------------------------------------------
+
+    Without a store the whole dataset is read. With a store holding the
+    factor history, only the close prices of the last 2 * period stored
+    dates and the dates after them are read, the last period stored dates
+    and the new dates are recomputed and merged into the store, so a daily
+    update reads and computes a few windows of rows, not the history.
+    A stock with less than period rows before the recomputed dates, e.g.
+    one resumed from a long suspension, also reads its earlier history, so
+    the update matches a full rebuild. The store keeps the values before
+    preprocessing.
+
+    period: int, number of rows in the return
+    store: str or FactorStore, the factor store keeping the history
+    path: str, root directory of the kline dataset
+    return: pd.Series, the factor on the recomputed dates, the whole
+        history without a store or on the first run
+    '''
+    store = FactorStore(store) if isinstance(store, str) else store
+    name = f'momentum_{period}'
+    dates = store.dates(name) if store is not None and name in store else pd.DatetimeIndex([])
+    incremental = len(dates) >= 2 * period
+
+    data = read_kline(path, ['close'], dates[-2 * period] if incremental else None)
+    if incremental:
+        # a stock short of rows before the recomputed dates misses the
+        # partner rows of its new returns, its earlier history is read too
+        before = pd.to_datetime(data.index.get_level_values(0)) < dates[-period]
+        count = pd.Series(before, index=data.index).groupby(level=1).sum()
+        short = count.index[count < period]
+        if short.size:
+            history = read_kline(path, ['close'], end=dates[-2 * period], codes=short)
+            data = pd.concat([history, data]).sort_index()
+    ret = data['close'].converter.price2ret(period=period).dropna()
+    if incremental:
+        # rows near the start of the window miss their partner row, only the
+        # dates a full period inside the window are kept, and a stock without
+        # new rows keeps its stored value
+        ret = ret[pd.to_datetime(ret.index.get_level_values(0)) >= dates[-period]]
+        ret.index = ret.index.set_levels(pd.to_datetime(ret.index.levels[0]), level=0)
+        ret = ret.combine_first(store.read(name, dates[-period]).rename_axis(ret.index.names))
+    if store is not None:
+        (store.append if incremental else store.write)(name, ret)
     return ret
 
-class FactorPriceVolume():
+class FactorPriceVolume(FactorBase):
     def __init__(self, name):
         super().__init__(name)
         self.klass = 'pricevolume'
+
+    def rolling_regression(self, start, end):
+        '''Rolling regression of every stock's daily change on the index,
+        alpha, beta, residual volatility and r squared as wide frames,
+        stocks with less than 30 rows in the window are nan'''
+        last_date = self.nearby_n_trade_date(start, -self.period + 1)
+        index_price = self.source.index_market_daily(last_date, end,
+            fields='pct_change', code='000001.SH').droplevel(1)['pct_change']
+        stock_price = self.source.market_daily(last_date, end,
+            fields='pct_change')['pct_change']
+        present = self.present(stock_price, start=last_date, end=end)
+        y = self.wide(stock_price, last_date, end)
+        index_price.index = pd.to_datetime(index_price.index)
+        x = index_price.reindex(y.index).to_numpy()
+        result = rolling_regression(y.to_numpy(), x, self.period,
+            min_periods=30, present=present.to_numpy())
+        return tuple(self.frame(values, y) for values in result)
     
 class HAlpha(FactorPriceVolume):
+    params = [{'period': 60}, {'period': 120}, {'period': 250}]
+
     def __init__(self, period):
         name = 'haplha_' + str(period)
         self.period = period
         super().__init__(name)
     
     def calculate(self, date):
-        last_date = pq.Stock.nearby_n_trade_date(date, -self.period + 1)
-        index_price = pq.Stock.index_market_daily(last_date, date,
-            fields='pct_change', code='000001.SH').droplevel(1)['pct_change']
-        stock_price = pq.Stock.market_daily(last_date, date,
-            fields='pct_change')['pct_change']
-        self.factor = stock_price.groupby(level=1).apply(lambda x:
-            x.droplevel(1).regressor.ols(index_price).loc["const", "coef"]
-            if len(x) >= 30 else np.nan)
+        self.factor = self.calculate_range(date, date).droplevel(0)
+
+    def calculate_range(self, start, end):
+        return self.series(self.rolling_regression(start, end)[0], start)
 
 class HBeta(FactorPriceVolume):
+    params = [{'period': 60}, {'period': 120}, {'period': 250}]
+
     def __init__(self, period):
         name = 'hbeta_' + str(period)
         self.period = period
         super().__init__(name)
     
     def calculate(self, date):
-        last_date = pq.Stock.nearby_n_trade_date(date, -self.period + 1)
-        index_price = pq.Stock.index_market_daily(last_date, date,
-            fields='pct_change', code='000001.SH').droplevel(1)['pct_change']
-        stock_price = pq.Stock.market_daily(last_date, date,
-            fields='pct_change')['pct_change']
-        self.factor = stock_price.groupby(level=1).apply(lambda x:
-            x.droplevel(1).regressor.ols(index_price).iloc[-1, 0]
-            if len(x) >= 30 else np.nan)
+        self.factor = self.calculate_range(date, date).droplevel(0)
+
+    def calculate_range(self, start, end):
+        return self.series(self.rolling_regression(start, end)[1], start)
 
 class Momentum(FactorPriceVolume):
+    params = [{'period': 20}, {'period': 60}, {'period': 120}, {'period': 250}]
+
     def __init__(self, period: int):
         name = 'momentum_' + str(period)
         self.period = period
         super().__init__(name)
     
     def calculate(self, date):
-        last_date = pq.Stock.nearby_n_trade_date(date, -self.period + 1)
-        price_lastdate = pq.Stock.market_daily(last_date, last_date,
+        last_date = self.nearby_n_trade_date(date, -self.period + 1)
+        price_lastdate = self.source.market_daily(last_date, last_date,
             fields='adj_close').droplevel(0).adj_close
-        price_date = pq.Stock.market_daily(date, date,
+        price_date = self.source.market_daily(date, date,
             fields='adj_close').droplevel(0).adj_close
         self.factor = (price_date - price_lastdate) / price_lastdate
 
+    def calculate_range(self, start, end):
+        last_date = self.nearby_n_trade_date(start, -self.period + 1)
+        price = self.source.market_daily(last_date, end,
+            fields='adj_close').adj_close
+        price = self.wide(price, last_date, end)
+        price_lastdate = price.shift(self.period - 1)
+        return self.series((price - price_lastdate) / price_lastdate, start)
+
 class WeightedMomentum(FactorPriceVolume):
+    params = [{'period': 20}, {'period': 60}]
+
     def __init__(self, period: int):
         name = 'weightedmomentum_' + str(period)
         self.period = period 
         super().__init__(name)
     
     def calculate(self, date):
-        last_date = pq.Stock.nearby_n_trade_date(date, -self.period + 1)
-        change = pq.Stock.market_daily(last_date, date,
+        last_date = self.nearby_n_trade_date(date, -self.period + 1)
+        change = self.source.market_daily(last_date, date,
             fields='pct_change')['pct_change']
-        turnover = pq.Stock.derivative_indicator(last_date, date,
+        turnover = self.source.derivative_indicator(last_date, date,
             fields='s_dq_turn').s_dq_turn
         self.factor = pd.concat([change, turnover], axis=1)\
             .groupby(level=1).apply(lambda x: 
                 (x['pct_change'] * x['s_dq_turn']).mean())
 
+    def calculate_range(self, start, end):
+        last_date = self.nearby_n_trade_date(start, -self.period + 1)
+        change = self.source.market_daily(last_date, end,
+            fields='pct_change')['pct_change']
+        turnover = self.source.derivative_indicator(last_date, end,
+            fields='s_dq_turn').s_dq_turn
+        weighted = self.wide(change, last_date, end) * self.wide(turnover, last_date, end)
+        factor = rolling_mean(weighted.to_numpy(), self.period, min_periods=1)
+        return self.series(self.frame(factor, weighted), start)
+
 class ExpWeightedMomentum(FactorPriceVolume):
+    params = [{'period': 20}, {'period': 60}]
+
     def __init__(self, period: int):
         name = 'expweightedmomentum_' + str(period)
         self.period = period
         super().__init__(name)
     
     def calculate(self, date):
-        last_date = pq.Stock.nearby_n_trade_date(date, -self.period + 1)
-        change = pq.Stock.market_daily(last_date, date,
+        last_date = self.nearby_n_trade_date(date, -self.period + 1)
+        change = self.source.market_daily(last_date, date,
             fields='pct_change')['pct_change']
-        turnover = pq.Stock.derivative_indicator(last_date, date,
+        turnover = self.source.derivative_indicator(last_date, date,
             fields='s_dq_turn').s_dq_turn
         exp = np.exp(np.arange(-self.period + 1, 1) / self.period / 4)
-        self.factor = pd.concat([change, turnover], axis=1)\
+        self.factor = pd.concat([change, turnover], axis=1).sort_index()\
             .groupby(level=1).apply(lambda x: 
                 (x['pct_change'] * x['s_dq_turn'] * exp).sum()
                 if len(x) == self.period else np.nan)
 
+    def calculate_range(self, start, end):
+        last_date = self.nearby_n_trade_date(start, -self.period + 1)
+        change = self.source.market_daily(last_date, end,
+            fields='pct_change')['pct_change']
+        turnover = self.source.derivative_indicator(last_date, end,
+            fields='s_dq_turn').s_dq_turn
+        present = self.present(change, turnover, start=last_date, end=end)
+        weighted = self.wide(change, last_date, end) * self.wide(turnover, last_date, end)
+        # the weight of a row is exp(1 / (4 * period)) times the one before
+        factor = rolling_ewsum(weighted.to_numpy(), self.period, np.exp(-1 / self.period / 4))
+        full = rolling_mean(np.where(present, 1., np.nan), self.period) == 1
+        return self.series(self.frame(np.where(full, factor, np.nan), weighted), start)
+
 class LogPrice(FactorPriceVolume):
     def __init__(self):
         super().__init__('logprice')
     
     def calculate(self, date):
-        price = pq.Stock.market_daily(date, date, 
+        price = self.source.market_daily(date, date, 
             fields='close').droplevel(0).close
         self.factor = np.log(price)
 
+    def calculate_range(self, start, end):
+        price = self.source.market_daily(start, end, fields='close').close
+        return self.series(np.log(price))
+
 
 class Amplitude(FactorPriceVolume):
+    params = [{'period': 20}, {'period': 60}]
+
     def __init__(self, period):
         self.period = period
         name = 'amplitude_' + str(period)
         super().__init__(name)
     
     def calculate(self, date):
-        last_date = pq.Stock.nearby_n_trade_date(date, -self.period + 1)
-        price = pq.Stock.market_daily(last_date, date, 
+        self.factor = self.calculate_range(date, date).droplevel(0)
+
+    def calculate_range(self, start, end):
+        last_date = self.nearby_n_trade_date(start, -self.period + 1)
+        price = self.source.market_daily(last_date, end,
             fields=['adj_high', 'adj_low'])
-        vol = price['adj_high'] / price['adj_low']
-        self.factor = vol.groupby(level=1).apply(lambda x:
-            x.droplevel(1).sort_values().iloc[-int(0.25 * self.period):].mean() -
-            x.droplevel(1).sort_values().iloc[:int(0.25 * self.period)].mean()
-        )
+        present = self.present(price['adj_high'], start=last_date, end=end)
+        vol = self.wide(price['adj_high'] / price['adj_low'], last_date, end)
+        bottom, top = rolling_trimmed_mean(vol.to_numpy(), self.period,
+            int(0.25 * self.period), present.to_numpy())
+        return self.series(self.frame(top - bottom, vol), start)
 
 
 if __name__ == "__main__":
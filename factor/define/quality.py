@@ -5,7 +5,7 @@ from factor.define.base import FactorBase
 class FactorQuanlity(FactorBase):
     def __init__(self, name):
         super().__init__(name)
-        self.kalss = 'quanlity'
+        self.klass = 'quanlity'
 
 class RoeQ(FactorQuanlity):
     def __init__(self):
@@ -13,108 +13,166 @@ class RoeQ(FactorQuanlity):
     
     def calculate(self, date):
         report_period = pq.nearest_report_period(date)[0]
-        self.factor = pq.Stock.financial_indicator(report_period, report_period,
+        self.factor = self.source.financial_indicator(report_period, report_period,
             fields='qfa_roe').droplevel(0).qfa_roe
 
+    def calculate_range(self, start, end):
+        periods = self.report_periods(start, end)[0]
+        data = self.report_table('financial_indicator', periods, 'qfa_roe')
+        return self.series(self.by_report(data, periods).qfa_roe)
+
 class RoeTTM(FactorQuanlity):
     def __init__(self):
         super().__init__('roettm')
     
     def calculate(self, date):
-        self.factor = pq.Stock.pit_financial(date, date,
+        self.factor = self.source.pit_financial(date, date,
             fields='s_dfa_roe_ttm').droplevel(0).s_dfa_roe_ttm
 
+    def calculate_range(self, start, end):
+        return self.series(self.source.pit_financial(start, end,
+            fields='s_dfa_roe_ttm').s_dfa_roe_ttm)
+
 class RoaQ(FactorQuanlity):
     def __init__(self):
         super().__init__('roaq')
     
     def calculate(self, date):
         report_period = pq.nearest_report_period(date)[0]
-        self.factor = pq.Stock.financial_indicator(report_period, report_period,
+        self.factor = self.source.financial_indicator(report_period, report_period,
             fields='fa_roa2').droplevel(0).fa_roa2
 
+    def calculate_range(self, start, end):
+        periods = self.report_periods(start, end)[0]
+        data = self.report_table('financial_indicator', periods, 'fa_roa2')
+        return self.series(self.by_report(data, periods).fa_roa2)
+
 class RoaTTM(FactorQuanlity):
     def __init__(self):
         super().__init__('roattm')
     
     def calculate(self, date):
-        self.factor = pq.Stock.pit_financial(date, date,
+        self.factor = self.source.pit_financial(date, date,
             fields='s_dfa_roa2_ttm').droplevel(0).s_dfa_roa2_ttm
 
+    def calculate_range(self, start, end):
+        return self.series(self.source.pit_financial(start, end,
+            fields='s_dfa_roa2_ttm').s_dfa_roa2_ttm)
+
 class GrossProfitMarginQ(FactorQuanlity):
     def __init__(self):
         super().__init__('grossprofitmarginq')
     
     def calculate(self, date):
         report_period = pq.nearest_report_period(date)[0]
-        self.factor = pq.Stock.financial_indicator(report_period, report_period,
+        self.factor = self.source.financial_indicator(report_period, report_period,
             fields='fa_grossmargin').droplevel(0).fa_grossmargin
 
+    def calculate_range(self, start, end):
+        periods = self.report_periods(start, end)[0]
+        data = self.report_table('financial_indicator', periods, 'fa_grossmargin')
+        return self.series(self.by_report(data, periods).fa_grossmargin)
+
 class GrossProfitMarginTTM(FactorQuanlity):
     def __init__(self):
         super().__init__('grossprofitmarginttm')
     
     def calculate(self, date):
-        self.factor = pq.Stock.pit_financial(date, date,
+        self.factor = self.source.pit_financial(date, date,
             fields='s_dfa_grossmargin_ttm').droplevel(0).s_dfa_grossmargin_ttm
 
+    def calculate_range(self, start, end):
+        return self.series(self.source.pit_financial(start, end,
+            fields='s_dfa_grossmargin_ttm').s_dfa_grossmargin_ttm)
+
 class ProfitMarginQ(FactorQuanlity):
     def __init__(self):
         super().__init__('profitmarginq')
     
     def calculate(self, date):
         report_period = pq.nearest_report_period(date)[0]
-        self.factor = pq.Stock.financial_indicator(report_period, report_period,
+        self.factor = self.source.financial_indicator(report_period, report_period,
             fields='fa_deductedprofit').droplevel(0).fa_deductedprofit
 
+    def calculate_range(self, start, end):
+        periods = self.report_periods(start, end)[0]
+        data = self.report_table('financial_indicator', periods, 'fa_deductedprofit')
+        return self.series(self.by_report(data, periods).fa_deductedprofit)
+
 class ProfitMarginTTM(FactorQuanlity):
     def __init__(self):
         super().__init__('profitmarginttm')
     
     def calculate(self, date):
-        self.factor = pq.Stock.pit_financial(date, date,
+        self.factor = self.source.pit_financial(date, date,
             fields='s_dfa_deductedprofit_ttm').droplevel(0).s_dfa_deductedprofit_ttm
 
+    def calculate_range(self, start, end):
+        return self.series(self.source.pit_financial(start, end,
+            fields='s_dfa_deductedprofit_ttm').s_dfa_deductedprofit_ttm)
+
 class AssetTurnoverQ(FactorQuanlity):
     def __init__(self):
         super().__init__('assetturnoverq')
 
     def calculate(self, date):
         report_period = pq.nearest_report_period(date)[0]
-        self.factor = pq.Stock.financial_indicator(report_period, report_period,
+        self.factor = self.source.financial_indicator(report_period, report_period,
             fields='fa_assetsturn').droplevel(0).fa_assetsturn
 
+    def calculate_range(self, start, end):
+        periods = self.report_periods(start, end)[0]
+        data = self.report_table('financial_indicator', periods, 'fa_assetsturn')
+        return self.series(self.by_report(data, periods).fa_assetsturn)
+
 class AssetTurnoverTTM(FactorQuanlity):
     def __init__(self):
         super().__init__('assetturnoverttm')
     
     def calculate(self, date):
-        self.factor = pq.Stock.pit_financial(date, date,
+        self.factor = self.source.pit_financial(date, date,
             fields='s_dfa_currtassetstrate').droplevel(0).s_dfa_currtassetstrate
 
+    def calculate_range(self, start, end):
+        return self.series(self.source.pit_financial(start, end,
+            fields='s_dfa_currtassetstrate').s_dfa_currtassetstrate)
+
 class OperationCashflowRatioQ(FactorQuanlity):
     def __init__(self):
         super().__init__('oprationcashflowratioq')
 
     def calculate(self, date):
         report_period = pq.nearest_report_period(date)[0]
-        ocf = pq.Stock.cashflow_sheet(report_period, report_period,
+        ocf = self.source.cashflow_sheet(report_period, report_period,
             fields='net_cash_flows_oper_act').droplevel(0).net_cash_flows_oper_act
-        np = pq.Stock.income_sheet(report_period, report_period,
+        np = self.source.income_sheet(report_period, report_period,
             fields='net_profit_excl_min_int_inc').droplevel(0).net_profit_excl_min_int_inc
         self.factor = ocf / np
 
+    def calculate_range(self, start, end):
+        periods = self.report_periods(start, end)[0]
+        ocf = self.report_table('cashflow_sheet', periods, 'net_cash_flows_oper_act')
+        np = self.report_table('income_sheet', periods, 'net_profit_excl_min_int_inc')
+        ocf = self.by_report(ocf, periods).net_cash_flows_oper_act
+        np = self.by_report(np, periods).net_profit_excl_min_int_inc
+        return self.series(ocf / np)
+
 class OperationCashflowRatioTTM(FactorQuanlity):
     def __init__(self):
         super().__init__('oprationcashflowratiottm')
     
     def calculate(self, date):
-        ocf = pq.Stock.pit_financial(date, date,
+        ocf = self.source.pit_financial(date, date,
             fields='s_dfa_operatecashflow_ttm').droplevel(0).s_dfa_operatecashflow_ttm
-        np = pq.Stock.pit_financial(date, date,
+        np = self.source.pit_financial(date, date,
             fields='s_dfa_profit_ttm').droplevel(0).s_dfa_profit_ttm
         self.factor = ocf / np
 
+    def calculate_range(self, start, end):
+        data = self.source.pit_financial(start, end,
+            fields=['s_dfa_operatecashflow_ttm', 's_dfa_profit_ttm'])
+        return self.series(data.s_dfa_operatecashflow_ttm / data.s_dfa_profit_ttm)
+
 
 if __name__ == "__main__":
     factor = OperationCashflowRatioTTM()
@@ -0,0 +1,181 @@
+import time
+import pkgutil
+import importlib
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from .base import FactorBase
+from ..data.planner import QueryPlanner
+
+
+def _subclasses(klass: type) -> list:
+    result = []
+    for subclass in klass.__subclasses__():
+        result += [subclass] + _subclasses(subclass)
+    return result
+
+
+class FactorRegistry:
+    '''Every parameterization of the factor definitions by name
+    ----------------------------------------------------------
+
+    `discover` imports the modules of `factor.define` and registers each
+    subclass of `FactorBase` that implements `calculate`, once for every
+    keyword set in its `params`. A factor is kept as its class and keyword
+    arguments, so it can be rebuilt in another process by name.
+
+    discover: bool, whether to discover the factor definitions at once
+    '''
+
+    def __init__(self, discover: bool = True):
+        self.factors = {}
+        if discover:
+            self.discover()
+
+    def discover(self) -> 'FactorRegistry':
+        package = importlib.import_module(__package__)
+        for module in pkgutil.iter_modules(package.__path__):
+            importlib.import_module(f'{__package__}.{module.name}')
+        for klass in _subclasses(FactorBase):
+            if klass.calculate is FactorBase.calculate:
+                continue
+            for kwargs in klass.params:
+                self.register(klass, **kwargs)
+        return self
+
+    def register(self, klass: type, **kwargs) -> str:
+        '''Register one parameterization of a factor class, return its name'''
+        name = klass(**kwargs).name
+        self.factors[name] = (klass, kwargs)
+        return name
+
+    def names(self, klass: str = None) -> list:
+        '''Registered factor names, only those of a category if klass is given'''
+        if klass is None:
+            return list(self.factors)
+        return [name for name in self.factors if self.create(name).klass == klass]
+
+    def create(self, name: str) -> FactorBase:
+        klass, kwargs = self.factors[name]
+        return klass(**kwargs)
+
+    def spec(self, name: str) -> tuple:
+        '''(module, class name, keyword arguments) rebuilding the factor'''
+        klass, kwargs = self.factors[name]
+        return klass.__module__, klass.__qualname__, kwargs
+
+    def __iter__(self):
+        return iter(self.factors)
+
+    def __len__(self) -> int:
+        return len(self.factors)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.factors
+
+    def __repr__(self) -> str:
+        return f'FactorRegistry({len(self.factors)} factors)'
+
+
+def _inputs(planner: QueryPlanner, factor: FactorBase, start, end) -> tuple:
+    '''The (table, keyword arguments) pairs a factor reads over a range'''
+    recorded = len(planner.requests)
+    planner.record([factor], lambda factor: factor.calculate_range(start, end))
+    return tuple(sorted(set((table, kwargs) for table, kwargs, *_ in planner.requests[recorded:])))
+
+def _groups(inputs: dict) -> list:
+    '''Names connected through shared (table, keyword arguments) inputs,
+    found by a union-find over the inputs of every name'''
+    parent = {name: name for name in inputs}
+    def find(name):
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    owner = {}
+    for name, keys in inputs.items():
+        for key in keys:
+            if key in owner:
+                parent[find(name)] = find(owner[key])
+            else:
+                owner[key] = name
+    groups = {}
+    for name in inputs:
+        groups.setdefault(find(name), []).append(name)
+    return list(groups.values())
+
+def _build(specs: list, start, end, source, group: int, compact: bool = False) -> 'tuple[dict, list]':
+    '''Calculate a group of factors in one worker with coalesced queries'''
+    factors = [getattr(importlib.import_module(module), klass)(**kwargs)
+        for module, klass, kwargs in specs]
+    for factor in factors:
+        factor.compact = compact
+    planner = QueryPlanner(source)
+    compute = lambda factor: factor.calculate_range(start, end)
+    began = time.perf_counter()
+    planner.record(factors, compute)
+    planner.fetch()
+    fetch = time.perf_counter() - began
+
+    results, summary = {}, []
+    for factor in factors:
+        began, result, error = time.perf_counter(), None, None
+        try:
+            with planner.replay(factor):
+                result = compute(factor)
+        except Exception as exception:
+            error = f'{type(exception).__name__}: {exception}'
+        summary.append({'name': factor.name, 'klass': factor.klass, 'group': group,
+            'fetch': fetch, 'seconds': time.perf_counter() - began,
+            'rows': 0 if result is None else len(result), 'error': error})
+        if result is not None:
+            results[factor.name] = result
+    return results, summary
+
+def build_library(names: list = None, start: str = None, end: str = None,
+                  processes: int = None, source=None,
+                  registry: FactorRegistry = None, compact: bool = False) -> 'tuple[dict, pd.DataFrame]':
+    '''Calculate a factor library in parallel
+    ----------------------------------------
+
+    The inputs of every factor are recorded first, factors sharing any
+    table with the same arguments, directly or through other factors, are
+    put in one group, and each group runs in a worker process with its
+    queries coalesced, so every table is read by one worker only. A
+    failing factor is reported and does not stop the others.
+
+    names: list, registered factor names, all of them if None
+    start: str, first date of the range
+    end: str, last date of the range
+    processes: int, number of worker processes, the groups run in this
+        process if 1, default to the number of cpus
+    source: object, the source of the tables, `FactorBase.source` if None
+    registry: FactorRegistry, the factors to choose from, all the factor
+        definitions if None
+    compact: bool, whether to return the factors as float32, which halves
+        the memory of a library sent back from the workers
+    return: tuple, (factors, summary), factor name and its (datetime, asset)
+        series, and a DataFrame indexed by factor name with the category,
+        group, fetch time of the group, calculation seconds, rows and error
+    '''
+    registry = FactorRegistry() if registry is None else registry
+    names = registry.names() if names is None else list(names)
+    source = source or FactorBase.source
+
+    planner = QueryPlanner(source)
+    inputs = {name: _inputs(planner, registry.create(name), start, end) for name in names}
+    tasks = [([registry.spec(name) for name in group], start, end, source, number, compact)
+        for number, group in enumerate(_groups(inputs))]
+
+    if processes == 1:
+        outputs = [_build(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(processes) as executor:
+            outputs = list(executor.map(_build, *zip(*tasks))) if tasks else []
+
+    results, summary = {}, []
+    for result, rows in outputs:
+        results.update(result)
+        summary += rows
+    summary = pd.DataFrame(summary, columns=['name', 'klass', 'group', 'fetch', 'seconds', 'rows', 'error'])
+    return results, summary.set_index('name').reindex(names)
@@ -1,4 +1,3 @@
-import pandasquant as pq
 from factor.define.base import FactorBase
 
 
@@ -12,9 +11,13 @@ class Capital(FactorSize):
         super().__init__('capital')
     
     def calculate(self, date):
-        self.factor = pq.Stock.derivative_indicator(date, date,
+        self.factor = self.source.derivative_indicator(date, date,
             fields='s_val_mv').droplevel(0).s_val_mv
 
+    def calculate_range(self, start, end):
+        return self.series(self.source.derivative_indicator(start, end,
+            fields='s_val_mv').s_val_mv)
+
 if __name__ == '__main__':
     factor = Capital()
     print(factor('20200106'))
\ No newline at end of file
@@ -1,4 +1,3 @@
-import pandasquant as pq
 from factor.define.base import FactorBase
 
 
@@ -12,9 +11,13 @@ class Macd(FactorTechnical):
         super().__init__('macd')
     
     def calculate(self, date):
-        self.factor = pq.Stock.intensity_trend(date, date,
+        self.factor = self.source.intensity_trend(date, date,
             fields='macd_macd').droplevel(0)['macd_macd']
 
+    def calculate_range(self, start, end):
+        return self.series(self.source.intensity_trend(start, end,
+            fields='macd_macd')['macd_macd'])
+
 
 if __name__ == "__main__":
     import time
@@ -1,5 +1,6 @@
-import pandasquant as pq
+import numpy as np
 from factor.define.base import FactorBase
+from factor.engine import rolling_mean
 
 
 class FactorTurnover(FactorBase):
@@ -8,17 +9,26 @@ class FactorTurnover(FactorBase):
         self.klass = 'turnover'
 
 class Turnover(FactorTurnover):
+    params = [{'period': 20}]
+
     def __init__(self, period):
         name = 'turnover_' + str(period)
         self.period = period
         super().__init__(name)
 
     def calculate(self, date):
-        turnover = pq.Stock.derivative_indicator(date, date,
+        turnover = self.source.derivative_indicator(date, date,
             fields='s_dq_freeturnover')['s_dq_freeturnover']
         self.factor = turnover.groupby(level=1).mean()
 
+    def calculate_range(self, start, end):
+        turnover = self.source.derivative_indicator(start, end,
+            fields='s_dq_freeturnover')['s_dq_freeturnover']
+        return self.series(turnover)
+
 class BiasTurnover(FactorTurnover):
+    params = [{'short_period': 20, 'long_period': 250}]
+
     def __init__(self, short_period, long_period):
         self.long_period = long_period
         self.short_period = short_period
@@ -26,13 +36,24 @@ class BiasTurnover(FactorTurnover):
         super().__init__(name)
     
     def calculate(self, date):
-        long_date = pq.Stock.nearby_n_trade_date(date, -self.long_period + 1)
-        short_date = pq.Stock.nearby_n_trade_date(date, -self.short_period + 1)
-        turnover = pq.Stock.derivative_indicator(long_date, date,
+        long_date = self.nearby_n_trade_date(date, -self.long_period + 1)
+        short_date = self.nearby_n_trade_date(date, -self.short_period + 1)
+        turnover = self.source.derivative_indicator(long_date, date,
             fields='s_dq_freeturnover')['s_dq_freeturnover']
         short_mean = turnover.loc[short_date:].groupby(level=1).mean()
         long_mean = turnover.groupby(level=1).mean()
         self.factor = short_mean / long_mean
+
+    def calculate_range(self, start, end):
+        long_date = self.nearby_n_trade_date(start, -self.long_period + 1)
+        turnover = self.source.derivative_indicator(long_date, end,
+            fields='s_dq_freeturnover')['s_dq_freeturnover']
+        turnover = self.wide(turnover, long_date, end)
+        short_mean = rolling_mean(turnover.to_numpy(), self.short_period, min_periods=1)
+        long_mean = rolling_mean(turnover.to_numpy(), self.long_period, min_periods=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            factor = short_mean / long_mean
+        return self.series(self.frame(factor, turnover), start)
     
 
 if __name__ == "__main__":
@@ -1,4 +1,3 @@
-import pandasquant as pq
 from factor.define.base import FactorBase
 
 
@@ -12,87 +11,133 @@ class Ep(FactorValuation):
         super().__init__('ep')
     
     def calculate(self, date):
-        pe = pq.Stock.derivative_indicator(date, date,
+        pe = self.source.derivative_indicator(date, date,
             fields='s_val_pe_ttm').droplevel(0).s_val_pe_ttm
         self.factor = 1 / pe
+
+    def calculate_range(self, start, end):
+        pe = self.source.derivative_indicator(start, end,
+            fields='s_val_pe_ttm').s_val_pe_ttm
+        return self.series(1 / pe)
     
 class Epcut(FactorValuation):
     def __init__(self):
         super().__init__('epcut')
     
     def calculate(self, date):
-        ecut = pq.Stock.pit_financial(date, date,
+        ecut = self.source.pit_financial(date, date,
             fields='s_dfa_deductedprofit_ttm').\
             droplevel(0).s_dfa_deductedprofit_ttm
-        mv = pq.Stock.derivative_indicator(date, date,
+        mv = self.source.derivative_indicator(date, date,
             fields='s_val_mv').droplevel(0).s_val_mv
         self.factor = ecut / mv
+
+    def calculate_range(self, start, end):
+        ecut = self.source.pit_financial(start, end,
+            fields='s_dfa_deductedprofit_ttm').s_dfa_deductedprofit_ttm
+        mv = self.source.derivative_indicator(start, end,
+            fields='s_val_mv').s_val_mv
+        return self.series(ecut / mv)
         
 class Bp(FactorValuation):
     def __init__(self):
         super().__init__('bp')
     
     def calculate(self, date):
-        pb = pq.Stock.derivative_indicator(date, date,
+        pb = self.source.derivative_indicator(date, date,
             fields='s_val_pb_new').droplevel(0).s_val_pb_new
         self.factor = 1 / pb
 
+    def calculate_range(self, start, end):
+        pb = self.source.derivative_indicator(start, end,
+            fields='s_val_pb_new').s_val_pb_new
+        return self.series(1 / pb)
+
 class Sp(FactorValuation):
     def __init__(self):
         super().__init__('sp')
     
     def calculate(self, date):
-        ps = pq.Stock.derivative_indicator(date, date,
+        ps = self.source.derivative_indicator(date, date,
             fields='s_val_ps_ttm').droplevel(0).s_val_ps_ttm
         self.factor = 1 / ps
 
+    def calculate_range(self, start, end):
+        ps = self.source.derivative_indicator(start, end,
+            fields='s_val_ps_ttm').s_val_ps_ttm
+        return self.series(1 / ps)
+
 class Ncfp(FactorValuation):
     def __init__(self):
         super().__init__('ncfp')
     
     def calculate(self, date):
-        pcfn = pq.Stock.derivative_indicator(date, date,
+        pcfn = self.source.derivative_indicator(date, date,
             fields='s_val_pcf_ncfttm').\
                 droplevel(0).s_val_pcf_ncfttm
         self.factor = 1 / pcfn
 
+    def calculate_range(self, start, end):
+        pcfn = self.source.derivative_indicator(start, end,
+            fields='s_val_pcf_ncfttm').s_val_pcf_ncfttm
+        return self.series(1 / pcfn)
+
 class Ocfp(FactorValuation):
     def __init__(self):
         super().__init__('ocfp')
     
     def calculate(self, date):
-        ocfn = pq.Stock.derivative_indicator(date, date,
+        ocfn = self.source.derivative_indicator(date, date,
             fields='s_val_pcf_ocfttm').\
                 droplevel(0).s_val_pcf_ocfttm
         self.factor = 1 / ocfn
 
+    def calculate_range(self, start, end):
+        ocfn = self.source.derivative_indicator(start, end,
+            fields='s_val_pcf_ocfttm').s_val_pcf_ocfttm
+        return self.series(1 / ocfn)
+
 class Dp(FactorValuation):
     def __init__(self):
         super().__init__('dp')
     
     def calculate(self, date):
-        pd = pq.Stock.derivative_indicator(date, date,
+        pd = self.source.derivative_indicator(date, date,
             fields='s_price_div_dps').\
                 droplevel(0).s_price_div_dps
         self.factor = 1 / pd
+
+    def calculate_range(self, start, end):
+        pd = self.source.derivative_indicator(start, end,
+            fields='s_price_div_dps').s_price_div_dps
+        return self.series(1 / pd)
     
 class Gpe(FactorValuation):
     def __init__(self):
         super().__init__('gpe')
     
     def calculate(self, date):
-        before = pq.Stock.nearby_n_trade_date(date, -252)
-        ptoday = pq.Stock.derivative_indicator(date, date,
+        before = self.nearby_n_trade_date(date, -252)
+        ptoday = self.source.derivative_indicator(date, date,
             fields='net_profit_parent_comp_ttm').\
                 droplevel(0).net_profit_parent_comp_ttm
-        pbefore = pq.Stock.derivative_indicator(before, before,
+        pbefore = self.source.derivative_indicator(before, before,
             fields='net_profit_parent_comp_ttm').\
                 droplevel(0).net_profit_parent_comp_ttm
-        pe = pq.Stock.derivative_indicator(date, date,
+        pe = self.source.derivative_indicator(date, date,
             fields='s_val_pe_ttm').\
                 droplevel(0).s_val_pe_ttm
         self.factor = ((ptoday - pbefore) / pbefore) / pe
 
+    def calculate_range(self, start, end):
+        before = self.nearby_n_trade_date(start, -252)
+        data = self.source.derivative_indicator(before, end,
+            fields=['net_profit_parent_comp_ttm', 's_val_pe_ttm'])
+        profit = self.wide(data.net_profit_parent_comp_ttm, before, end)
+        pe = self.wide(data.s_val_pe_ttm, before, end)
+        pbefore = profit.shift(252)
+        return self.series(((profit - pbefore) / pbefore) / pe, start)
+
 
 if __name__ == "__main__":
     factor = Gpe()
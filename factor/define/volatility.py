@@ -1,5 +1,5 @@
-import pandasquant as pq
 from factor.define.base import FactorBase
+from factor.engine import rolling_std
 
 
 class FactorVolatility(FactorBase):
@@ -8,18 +8,30 @@ class FactorVolatility(FactorBase):
         self.klass = 'volatility'
 
 class Std(FactorVolatility):
+    params = [{'period': 20}, {'period': 60}, {'period': 120}]
+
     def __init__(self, period: int):
         name = 'std_' + str(period)
         self.period = period
         super().__init__(name)
     
     def calculate(self, date):
-        last_date = pq.Stock.nearby_n_trade_date(date, -self.period)
-        change = pq.Stock.market_daily(last_date, date,
+        last_date = self.nearby_n_trade_date(date, -self.period)
+        change = self.source.market_daily(last_date, date,
             fields='pct_change')['pct_change']
         self.factor = change.groupby(level=1).std()
 
+    def calculate_range(self, start, end):
+        last_date = self.nearby_n_trade_date(start, -self.period)
+        change = self.source.market_daily(last_date, end,
+            fields='pct_change')['pct_change']
+        change = self.wide(change, last_date, end)
+        factor = rolling_std(change.to_numpy(), self.period + 1, min_periods=1)
+        return self.series(self.frame(factor, change), start)
+
 class FF3F(FactorVolatility):
+    params = []
+
     def __init__(self, period):
         name = 'ff3f_' + str(period)
         self.period = period
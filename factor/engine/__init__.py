@@ -0,0 +1,10 @@
+from .dense import pivot, pivot_group, rowrank
+from .layering import quantile_label, layering
+from .ic import information_coefficient
+from .regression import CrossSectionRegression, newey_west_t
+from .preprocess import preprocess
+from .rolling import (rolling_count, rolling_sum, rolling_mean, rolling_std, rolling_ewsum,
+    rolling_regression)
+from .trimmed import (sliding_windows, window_trimmed_mean, window_quantile, rolling_trimmed_mean,
+    rolling_quantile, rolling_quantile_spread, rolling_iqr)
+from .asof import PointInTime
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+
+class PointInTime:
+    '''Point-in-time report history for vectorized as-of joins
+    ---------------------------------------------------------
+
+    The reports of every asset are kept as arrays sorted by (asset,
+    announcement date), together with the position of the latest report
+    period known so far. Looking up any dates for any assets is then one
+    `searchsorted` over combined (asset, day) keys: the last announcement on
+    or before each date points at the latest report period published by
+    that date, restatements of the same period taking the later one.
+
+    data: pd.DataFrame, (report period, asset) indexed report table
+    announcement: str or array-like, column holding the announcement date
+        of every row, or the dates themselves, rows without one are dropped
+    '''
+
+    def __init__(self, data: pd.DataFrame, announcement: 'str | np.ndarray'):
+        if isinstance(announcement, str):
+            announcement, data = data[announcement], data.drop(columns=announcement)
+        announcement = pd.to_datetime(np.asarray(announcement)).values.astype('datetime64[D]')
+        known = ~np.isnat(announcement)
+        data, announcement = data[known], announcement[known].astype(np.int64)
+
+        period_codes, self.periods = pd.factorize(pd.to_datetime(data.index.get_level_values(0)), sort=True)
+        asset_codes, self.assets = pd.factorize(data.index.get_level_values(1), sort=True)
+        order = np.lexsort((period_codes, announcement, asset_codes))
+        self.columns = data.columns
+        self.values = data.to_numpy()[order]
+        self.period_codes = period_codes[order]
+        self.asset_codes = asset_codes[order]
+        self.announcement = announcement[order]
+
+        # the latest period known at each row, later restatements win ties,
+        # the asset code dominates the key so the running maximum restarts
+        # at every asset
+        rows = len(order)
+        key = (self.asset_codes.astype(np.int64) * (len(self.periods) + 1)
+            + self.period_codes) * (rows + 1) + np.arange(rows)
+        self.latest = np.maximum.accumulate(key) % (rows + 1) if rows else key
+
+    def asof(self, dates: 'pd.DatetimeIndex | list', assets: 'pd.Index | list' = None) -> pd.DataFrame:
+        '''Latest report known on every date
+        -----------------------------------
+
+        dates: pd.DatetimeIndex, dates to look up
+        assets: pd.Index, assets to look up, all assets with reports if None
+        return: pd.DataFrame, (datetime, asset) indexed values of the latest
+            report period announced on or before each date, with its period
+            in the `report_period` column, pairs with no report are left out
+        '''
+        dates = pd.DatetimeIndex(pd.to_datetime(dates))
+        assets = self.assets if assets is None else pd.Index(assets)
+        days = dates.values.astype('datetime64[D]').astype(np.int64)
+        codes = self.assets.get_indexer(assets)
+
+        date_index = np.repeat(np.arange(len(dates)), len(assets))
+        asset_index = np.tile(np.arange(len(assets)), len(dates))
+        query_days, query_codes = days[date_index], codes[asset_index]
+
+        origin = min(self.announcement.min(initial=days.min(initial=0)), days.min(initial=0))
+        span = max(self.announcement.max(initial=0), days.max(initial=0)) - origin + 1
+        keys = self.asset_codes.astype(np.int64) * span + (self.announcement - origin)
+        position = np.searchsorted(keys, query_codes.astype(np.int64) * span + (query_days - origin),
+            side='right') - 1
+        position = np.maximum(position, 0)
+        found = (query_codes >= 0) & (len(keys) > 0)
+        if len(keys):
+            found &= (self.asset_codes[position] == query_codes) & (self.announcement[position] <= query_days)
+
+        rows = self.latest[position[found]]
+        index = pd.MultiIndex.from_arrays([dates[date_index[found]], assets[asset_index[found]]],
+            names=['datetime', 'asset'])
+        result = pd.DataFrame(self.values[rows], index=index, columns=self.columns)
+        result['report_period'] = self.periods[self.period_codes[rows]]
+        return result
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+
+def pivot(data: pd.Series, dates: pd.Index = None, assets: pd.Index = None,
+          dtype: type = np.float64) -> 'tuple[np.ndarray, pd.Index, pd.Index]':
+    '''Pivot a (datetime, asset) series into a dense date x asset array
+    ------------------------------------------------------------------
+
+    data: pd.Series, series indexed by (datetime, asset)
+    dates: pd.Index, date axis of the output, inferred from data if None
+    assets: pd.Index, asset axis of the output, inferred from data if None
+    dtype: type, dtype of the output array
+    return: tuple, (values, dates, assets), missing cells are nan
+    '''
+    date_values = data.index.get_level_values(0)
+    asset_values = data.index.get_level_values(1)
+    if dates is None:
+        dates = pd.Index(date_values.unique()).sort_values()
+    if assets is None:
+        assets = pd.Index(asset_values.unique()).sort_values()
+
+    date_codes = dates.get_indexer(date_values)
+    asset_codes = assets.get_indexer(asset_values)
+    inside = (date_codes >= 0) & (asset_codes >= 0)
+
+    values = np.full((len(dates), len(assets)), np.nan, dtype=dtype)
+    values[date_codes[inside], asset_codes[inside]] = data.to_numpy(dtype=dtype)[inside]
+    return values, dates, assets
+
+def pivot_group(grouper: pd.Series, dates: pd.Index, assets: pd.Index) -> 'tuple[np.ndarray, pd.Index]':
+    '''Pivot a (datetime, asset) group label series into integer codes
+    -----------------------------------------------------------------
+
+    grouper: pd.Series, group label of each asset on each date
+    dates: pd.Index, date axis of the output
+    assets: pd.Index, asset axis of the output
+    return: tuple, (codes, groups), codes is -1 where the group is missing
+    '''
+    codes, groups = pd.factorize(grouper, sort=True)
+    codes = pd.Series(codes, index=grouper.index).where(codes >= 0)
+    codes, _, _ = pivot(codes, dates, assets)
+    return np.nan_to_num(codes, nan=-1).astype(np.int64), pd.Index(groups)
+
+def rowrank(values: np.ndarray, groups: np.ndarray = None,
+            method: str = 'average') -> 'tuple[np.ndarray, np.ndarray]':
+    '''Rank every row of a 2-D array in one batched sort
+    ---------------------------------------------------
+
+    values: np.ndarray, array in shape (dates, assets), nan is not ranked
+    groups: np.ndarray, integer group codes in the same shape, if given,
+        elements are ranked inside each (row, group) segment, -1 is not ranked
+    method: str, tie method, 'average', 'min', 'max' or 'first'
+    return: tuple, (rank, count), zero-based rank of each element in its
+        segment and the number of ranked elements in that segment, nan
+        where the element is not ranked
+    '''
+    if method not in ('average', 'min', 'max', 'first'):
+        raise ValueError('method should be "average", "min", "max" or "first"')
+
+    valid = ~np.isnan(values)
+    if groups is None:
+        key = np.where(valid, 0, 1)
+    else:
+        valid &= groups >= 0
+        key = np.where(valid, groups, groups.max(initial=0) + 1)
+
+    # sort by value first and then stably by group, so that every segment
+    # is contiguous and sorted by value inside
+    order = np.argsort(values, axis=1, kind='stable')
+    order = np.take_along_axis(order, np.argsort(
+        np.take_along_axis(key, order, axis=1), axis=1, kind='stable'), axis=1)
+    sorted_key = np.take_along_axis(key, order, axis=1)
+    sorted_value = np.take_along_axis(values, order, axis=1)
+
+    ncol = values.shape[1]
+    position = np.broadcast_to(np.arange(ncol), values.shape)
+    segment_start = np.ones(values.shape, dtype=bool)
+    segment_start[:, 1:] = sorted_key[:, 1:] != sorted_key[:, :-1]
+    tie_start = segment_start.copy()
+    tie_start[:, 1:] |= sorted_value[:, 1:] != sorted_value[:, :-1]
+
+    def _first(start):
+        return np.maximum.accumulate(np.where(start, position, 0), axis=1)
+
+    def _last(start):
+        end = np.ones(values.shape, dtype=bool)
+        end[:, :-1] = start[:, 1:]
+        return np.minimum.accumulate(np.where(end, position, ncol)[:, ::-1], axis=1)[:, ::-1]
+
+    segment_first = _first(segment_start)
+    count = _last(segment_start) - segment_first + 1
+    if method == 'first':
+        rank = position - segment_first
+    elif method == 'min':
+        rank = _first(tie_start) - segment_first
+    elif method == 'max':
+        rank = _last(tie_start) - segment_first
+    else:
+        rank = (_first(tie_start) + _last(tie_start)) / 2 - segment_first
+
+    result_rank = np.empty(values.shape)
+    result_count = np.empty(values.shape)
+    np.put_along_axis(result_rank, order, rank, axis=1)
+    np.put_along_axis(result_count, order, count, axis=1)
+    result_rank[~valid] = np.nan
+    result_count[~valid] = np.nan
+    return result_rank, result_count
@@ -0,0 +1,60 @@
+import numpy as np
+from .dense import rowrank
+
+
+def _segment_corr(x: np.ndarray, y: np.ndarray, segment: np.ndarray, nsegment: int) -> np.ndarray:
+    valid = ~(np.isnan(x) | np.isnan(y)) & (segment >= 0)
+    x, y, segment = x[valid], y[valid], segment[valid]
+    count = np.bincount(segment, minlength=nsegment)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        xmean = np.bincount(segment, x, minlength=nsegment) / count
+        ymean = np.bincount(segment, y, minlength=nsegment) / count
+        x = x - xmean[segment]
+        y = y - ymean[segment]
+        cov = np.bincount(segment, x * y, minlength=nsegment)
+        xvar = np.bincount(segment, x * x, minlength=nsegment)
+        yvar = np.bincount(segment, y * y, minlength=nsegment)
+        corr = cov / np.sqrt(xvar * yvar)
+    corr[count < 2] = np.nan
+    return corr
+
+def information_coefficient(factor: np.ndarray, forward: np.ndarray, groups: np.ndarray = None,
+                            ngroups: int = None) -> 'tuple[np.ndarray, np.ndarray]':
+    '''Pearson and rank IC for many horizons in one pass
+    ---------------------------------------------------
+
+    factor: np.ndarray, factor array in shape (dates, assets)
+    forward: np.ndarray, forward returns in shape (horizons, dates, assets)
+    groups: np.ndarray, integer group codes in shape (dates, assets), -1 is
+        excluded, if given, IC is calculated inside each group
+    ngroups: int, number of groups, inferred from groups if None
+    return: tuple, (ic, rankic) in shape (horizons, dates), or in shape
+        (horizons, dates, groups) if groups is given
+    '''
+    if forward.ndim == 2:
+        forward = forward[None]
+    nhorizon, ndate, nasset = forward.shape
+
+    # only the pairs with both values present take part in the ranks
+    valid = ~(np.isnan(forward) | np.isnan(factor)[None])
+    factor = np.where(valid, factor[None], np.nan).reshape(-1, nasset)
+    forward = np.where(valid, forward, np.nan).reshape(-1, nasset)
+
+    if groups is None:
+        ngroups = 1
+        segment = np.zeros(factor.shape, dtype=np.int64)
+        stacked_groups = None
+    else:
+        ngroups = ngroups or int(groups.max(initial=-1)) + 1
+        stacked_groups = np.broadcast_to(groups, (nhorizon, ndate, nasset)).reshape(-1, nasset)
+        segment = np.where(stacked_groups >= 0, stacked_groups, -1)
+    segment = np.where(segment >= 0, segment + np.arange(factor.shape[0])[:, None] * ngroups, -1)
+
+    factor_rank, _ = rowrank(factor, stacked_groups)
+    forward_rank, _ = rowrank(forward, stacked_groups)
+    nsegment = factor.shape[0] * ngroups
+    ic = _segment_corr(factor.ravel(), forward.ravel(), segment.ravel(), nsegment)
+    rankic = _segment_corr(factor_rank.ravel(), forward_rank.ravel(), segment.ravel(), nsegment)
+
+    shape = (nhorizon, ndate) if groups is None else (nhorizon, ndate, ngroups)
+    return ic.reshape(shape), rankic.reshape(shape)
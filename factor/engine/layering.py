@@ -0,0 +1,70 @@
+import numpy as np
+from .dense import rowrank
+
+
+def quantile_label(values: np.ndarray, q: int, groups: np.ndarray = None) -> np.ndarray:
+    '''Assign quantile labels row by row, the same bins as pd.qcut
+    -------------------------------------------------------------
+
+    values: np.ndarray, factor array in shape (dates, assets)
+    q: int, number of quantiles
+    groups: np.ndarray, integer group codes, if given, quantiles are
+        assigned inside each group of each row
+    return: np.ndarray, zero-based quantile labels, -1 where missing
+    '''
+    rank, count = rowrank(values, groups, method='min')
+    valid = ~np.isnan(rank)
+    rank = np.where(valid, rank, 0).astype(np.int64)
+    count = np.where(valid, count, 2).astype(np.int64)
+    # qcut puts the element at sorted position r into the first bin whose
+    # right edge, at position k * (n - 1) / q, is not lower than r
+    label = np.maximum(-(-(rank * q) // np.maximum(count - 1, 1)) - 1, 0)
+    return np.where(valid, label, -1)
+
+def layering(factor: np.ndarray, forward: np.ndarray, q: int = 5,
+             groups: np.ndarray = None, commission: float = 0.001,
+             commission_type: str = 'both') -> 'tuple[np.ndarray, np.ndarray, np.ndarray]':
+    '''Equal weighted quantile portfolios on dense arrays
+    ----------------------------------------------------
+
+    factor: np.ndarray, factor array in shape (dates, assets)
+    forward: np.ndarray, forward return array in the same shape
+    q: int, number of quantiles
+    groups: np.ndarray, integer group codes, if given, quantiles are
+        assigned inside each group and then pooled across groups
+    commission: float, commission rate
+    commission_type: str, turnover side to charge, 'both', 'buy' or 'sell'
+    return: tuple, (profit, cumprofit, turnover) in shape (dates, q), profit
+        is commission adjusted and shifted to the holding date
+    '''
+    if commission_type not in ('both', 'buy', 'sell'):
+        raise ValueError('commission_type should be "both", "buy" or "sell"')
+
+    label = quantile_label(factor, q, groups)
+    has_return = ~np.isnan(forward)
+    forward = np.where(has_return, forward, 0)
+
+    profit = np.full((factor.shape[0], q), np.nan)
+    turnover = np.full((factor.shape[0], q), np.nan)
+    for k in range(q):
+        member = label == k
+        count = member.sum(axis=1)
+        earning = member & has_return
+        with np.errstate(invalid='ignore', divide='ignore'):
+            profit[:, k] = (forward * earning).sum(axis=1) / earning.sum(axis=1)
+            weight = member / count[:, None]
+        weight[count == 0] = 0
+
+        delta = np.diff(weight, axis=0, prepend=0)
+        if commission_type == 'both':
+            turnover[:, k] = np.abs(delta).sum(axis=1)
+        elif commission_type == 'buy':
+            turnover[:, k] = delta.clip(min=0).sum(axis=1)
+        else:
+            turnover[:, k] = (-delta).clip(min=0).sum(axis=1)
+        turnover[count == 0, k] = np.nan
+
+    profit = profit - turnover * commission
+    profit = np.nan_to_num(np.vstack([np.zeros((1, q)), profit[:-1]]), nan=0)
+    cumprofit = np.vstack([np.ones((1, q)), np.cumprod(profit + 1, axis=0)[:-1]])
+    return profit, cumprofit, turnover
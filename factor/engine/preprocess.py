@@ -0,0 +1,99 @@
+import numpy as np
+
+
+DEEXTREME = {'mad': 5, 'std': 3}
+STANDARDIZE = ('zscore', 'minmax')
+FILLNA = ('mean', 'median', 'zero')
+
+
+def _median(ordered: np.ndarray, start: np.ndarray, count: np.ndarray) -> np.ndarray:
+    median = np.full(count.shape, np.nan)
+    has = count > 0
+    low = ordered[(start + (count - 1) // 2)[has]]
+    high = ordered[(start + count // 2)[has]]
+    median[has] = (low + high) / 2
+    return median
+
+def _mean_std(ordered: np.ndarray, segment: np.ndarray, count: np.ndarray) -> 'tuple[np.ndarray, np.ndarray]':
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.bincount(segment, ordered, minlength=count.size) / count
+        deviation = ordered - mean[segment]
+        std = np.sqrt(np.bincount(segment, deviation * deviation, minlength=count.size) / (count - 1))
+    return mean, std
+
+def preprocess(values: np.ndarray, segment: np.ndarray, deextreme: str = 'mad',
+               standardize: str = 'zscore', fillna: str = 'mean', n: float = None) -> np.ndarray:
+    '''Fused deextreme, standardize and fillna inside every segment
+    --------------------------------------------------------------
+
+    The valid values are sorted by (segment, value) once, so that every
+    segment is a contiguous, ordered slice. Medians, MAD, clipping bounds,
+    moments and fill values are then derived from that single ordered copy
+    with index arithmetic and bincount, instead of a groupby per step.
+
+    values: np.ndarray, 1-D factor values, nan is filled
+    segment: np.ndarray, 1-D integer segment codes, usually date code times
+        group count plus group code, values in segment -1, e.g. with a
+        missing group, come back as nan like a groupby dropping nan keys
+    deextreme: str, 'mad' (median +- n * MAD, n default to 5),
+        'std' (mean +- n * std, n default to 3) or None
+    standardize: str, 'zscore', 'minmax' or None
+    fillna: str, 'mean', 'median', 'zero' or None, fill value is taken
+        from the processed values of the same segment
+    n: float, width of the deextreme bounds
+    return: np.ndarray, processed values
+    '''
+    if deextreme is not None and deextreme not in DEEXTREME:
+        raise ValueError(f'deextreme should be one of {list(DEEXTREME)} or None')
+    if standardize is not None and standardize not in STANDARDIZE:
+        raise ValueError(f'standardize should be one of {list(STANDARDIZE)} or None')
+    if fillna is not None and fillna not in FILLNA:
+        raise ValueError(f'fillna should be one of {list(FILLNA)} or None')
+
+    result = np.array(values, dtype=np.float64)
+    grouped = segment >= 0
+    valid = np.flatnonzero(grouped & ~np.isnan(result))
+    nsegment = int(segment.max(initial=-1)) + 1
+
+    order = valid[np.lexsort((result[valid], segment[valid]))]
+    ordered = result[order]
+    ordered_segment = segment[order]
+    del valid
+    count = np.bincount(ordered_segment, minlength=nsegment)
+    start = np.cumsum(count) - count
+
+    if deextreme == 'mad':
+        median = _median(ordered, start, count)
+        deviation = np.abs(ordered - median[ordered_segment])
+        deviation = deviation[np.lexsort((deviation, ordered_segment))]
+        width = (n or DEEXTREME['mad']) * _median(deviation, start, count)
+        del deviation
+        ordered = np.clip(ordered, (median - width)[ordered_segment], (median + width)[ordered_segment])
+    elif deextreme == 'std':
+        mean, std = _mean_std(ordered, ordered_segment, count)
+        width = (n or DEEXTREME['std']) * std
+        ordered = np.clip(ordered, (mean - width)[ordered_segment], (mean + width)[ordered_segment])
+
+    # clipping keeps the order inside every segment, so the first and last
+    # element of a segment are still its minimum and maximum
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if standardize == 'zscore':
+            mean, std = _mean_std(ordered, ordered_segment, count)
+            ordered = (ordered - mean[ordered_segment]) / std[ordered_segment]
+        elif standardize == 'minmax' and ordered.size:
+            minimum = np.where(count > 0, ordered[np.minimum(start, ordered.size - 1)], np.nan)
+            maximum = np.where(count > 0, ordered[np.maximum(start + count - 1, 0)], np.nan)
+            ordered = (ordered - minimum[ordered_segment]) / (maximum - minimum)[ordered_segment]
+    result[order] = ordered
+
+    if fillna is not None:
+        missing = np.flatnonzero(grouped & np.isnan(result))
+        if fillna == 'mean':
+            fill = _mean_std(ordered, ordered_segment, count)[0]
+        elif fillna == 'median':
+            fill = _median(ordered, start, count)
+        else:
+            fill = np.where(count > 0, 0., np.nan)
+        result[missing] = fill[segment[missing]]
+    result[~grouped] = np.nan
+    return result
@@ -0,0 +1,98 @@
+import numpy as np
+
+
+def newey_west_t(series: np.ndarray, lags: int = None) -> 'tuple[float, float]':
+    '''Mean of a time series and its Newey-West t statistic
+    ------------------------------------------------------
+
+    series: np.ndarray, 1-D time series, nan is dropped
+    lags: int, number of lags, default to floor(4 * (T / 100) ^ (2 / 9))
+    return: tuple, (mean, t)
+    '''
+    series = series[~np.isnan(series)]
+    length = series.size
+    if length < 2:
+        return np.nan, np.nan
+    if lags is None:
+        lags = int(np.floor(4 * (length / 100) ** (2 / 9)))
+    lags = min(lags, length - 1)
+
+    mean = series.mean()
+    demeaned = series - mean
+    variance = demeaned @ demeaned / length
+    for lag in range(1, lags + 1):
+        gamma = demeaned[lag:] @ demeaned[:-lag] / length
+        variance += 2 * (1 - lag / (lags + 1)) * gamma
+    if variance <= 0:
+        return float(mean), np.nan
+    return float(mean), float(mean / np.sqrt(variance / length))
+
+
+class CrossSectionRegression:
+    '''Per date industry neutral WLS of forward return on a factor
+    -------------------------------------------------------------
+
+    Every date solves `y = D b + x f + e` with `D` the full set of industry
+    dummies. Industries are kept as integer codes and never expanded into a
+    dummy matrix: the industry block of the normal equations is diagonal, so
+    projecting it out is a weighted demean inside each (date, industry)
+    segment. The segment coding, weight sums and demeaned returns are built
+    once and reused for every factor that covers the same universe.
+
+    forward: np.ndarray, forward return in shape (dates, assets)
+    groups: np.ndarray, integer industry codes in the same shape, -1 is excluded
+    weight: np.ndarray, regression weight in the same shape, default to 1
+    ngroups: int, number of industries, inferred from groups if None
+    '''
+
+    def __init__(self, forward: np.ndarray, groups: np.ndarray,
+                 weight: np.ndarray = None, ngroups: int = None):
+        self.shape = forward.shape
+        self.ngroups = ngroups or int(groups.max(initial=-1)) + 1
+        weight = np.ones(self.shape) if weight is None else weight
+        self.valid = ~(np.isnan(forward) | np.isnan(weight)) & (groups >= 0) & (weight > 0)
+        self.date = np.broadcast_to(np.arange(self.shape[0])[:, None], self.shape)[self.valid]
+        self.segment = self.date * self.ngroups + groups[self.valid]
+        self.weight = weight[self.valid]
+        self.forward = forward[self.valid]
+        self._base = self._demean(self.forward, self.weight, self.segment)
+
+    def _demean(self, value: np.ndarray, weight: np.ndarray, segment: np.ndarray) -> np.ndarray:
+        nsegment = self.shape[0] * self.ngroups
+        weight_sum = np.bincount(segment, weight, minlength=nsegment)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.bincount(segment, weight * value, minlength=nsegment) / weight_sum
+        return value - mean[segment]
+
+    def fit(self, factor: np.ndarray) -> 'tuple[np.ndarray, np.ndarray]':
+        '''Regress the forward return on one factor date by date
+        -------------------------------------------------------
+
+        factor: np.ndarray, factor array in shape (dates, assets)
+        return: tuple, (factor return, t value) in shape (dates, )
+        '''
+        factor = factor[self.valid]
+        covered = ~np.isnan(factor)
+        if covered.all():
+            date, segment, weight = self.date, self.segment, self.weight
+            forward = self._base
+        else:
+            date, segment, weight = self.date[covered], self.segment[covered], self.weight[covered]
+            factor = factor[covered]
+            forward = self._demean(self.forward[covered], weight, segment)
+        factor = self._demean(factor, weight, segment)
+
+        ndate = self.shape[0]
+        sxx = np.bincount(date, weight * factor * factor, minlength=ndate)
+        sxy = np.bincount(date, weight * factor * forward, minlength=ndate)
+        count = np.bincount(date, minlength=ndate)
+        ngroup = np.bincount(np.unique(segment) // self.ngroups, minlength=ndate)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ret = sxy / sxx
+            resid = forward - ret[date] * factor
+            sse = np.bincount(date, weight * resid * resid, minlength=ndate)
+            dof = count - ngroup - 1
+            tvalue = ret / np.sqrt(sse / dof / sxx)
+        ret[(sxx <= 0) | (dof <= 0)] = np.nan
+        tvalue[np.isnan(ret)] = np.nan
+        return ret, tvalue
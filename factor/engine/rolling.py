@@ -0,0 +1,156 @@
+import numpy as np
+from scipy.signal import lfilter
+
+
+def _window_sum(values: np.ndarray, window: int) -> np.ndarray:
+    '''Sum of the last `window` rows, from the difference of two prefix sums,
+    nan counts as 0 and a window holding infinite values sums to them'''
+    finite = np.isfinite(values)
+    cumsum = np.cumsum(np.where(finite, values, 0), axis=0)
+    cumsum[window:] = cumsum[window:] - cumsum[:-window]
+    return cumsum if finite.all() else _infinite(cumsum, values, window)
+
+def _window_infinite(values: np.ndarray, window: int) -> np.ndarray:
+    '''Whether each window holds an infinite value'''
+    return _window_sum(np.isinf(values).astype(np.int64), window) > 0
+
+def _infinite(result: np.ndarray, values: np.ndarray, window: int) -> np.ndarray:
+    '''Put the infinite values kept out of the prefix sums back in the
+    windows holding them, inf and -inf in one window give nan'''
+    positive = _window_sum((values == np.inf).astype(np.int64), window) > 0
+    negative = _window_sum((values == -np.inf).astype(np.int64), window) > 0
+    result = result.astype(float)
+    result[positive] = np.inf
+    result[negative] = -np.inf
+    result[positive & negative] = np.nan
+    return result
+
+def rolling_count(values: np.ndarray, window: int) -> np.ndarray:
+    '''Number of non-nan values of every column in each window'''
+    return _window_sum((~np.isnan(values)).astype(np.int64), window)
+
+def rolling_sum(values: np.ndarray, window: int, min_periods: int = None) -> np.ndarray:
+    '''Rolling sum over dates
+    ------------------------
+
+    Every window sum is the difference of two prefix sums, so moving the
+    window costs one addition and one subtraction whatever its length.
+    Infinite values are kept out of the prefix sums, a window holding one
+    sums to it and a window holding both signs to nan, like `np.sum`.
+
+    values: np.ndarray, array in shape (dates, assets), nan is skipped
+    window: int, number of rows in a window
+    min_periods: int, least non-nan values for a result, default to window
+    return: np.ndarray, nan where the window has less than min_periods values
+    '''
+    count = rolling_count(values, window)
+    result = _window_sum(values, window)
+    result[count < (window if min_periods is None else min_periods)] = np.nan
+    return result
+
+def rolling_mean(values: np.ndarray, window: int, min_periods: int = None) -> np.ndarray:
+    '''Rolling mean over dates, see `rolling_sum`'''
+    count = rolling_count(values, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = _window_sum(values, window) / count
+    result[count < max(window if min_periods is None else min_periods, 1)] = np.nan
+    return result
+
+def rolling_std(values: np.ndarray, window: int, min_periods: int = None, ddof: int = 1) -> np.ndarray:
+    '''Rolling standard deviation over dates
+    ---------------------------------------
+
+    Values are centered by their column mean before the prefix sums of x
+    and x^2 are taken, which keeps the difference of the two sums accurate.
+    A window holding an infinite value has a nan deviation.
+
+    values: np.ndarray, array in shape (dates, assets), nan is skipped
+    window: int, number of rows in a window
+    min_periods: int, least non-nan values for a result, default to window
+    ddof: int, delta degrees of freedom
+    return: np.ndarray, nan where the window has less than min_periods or
+        not more than ddof values
+    '''
+    with np.errstate(invalid='ignore', divide='ignore'):
+        finite = np.where(np.isfinite(values), values, np.nan)
+        center = np.nan_to_num(np.nanmean(finite, axis=0) if values.size else 0.)
+        centered = np.nan_to_num(finite - center, nan=0.)
+        count = rolling_count(values, window)
+        total = _window_sum(centered, window)
+        square = _window_sum(centered * centered, window)
+        variance = np.maximum(square - total * total / count, 0) / (count - ddof)
+    result = np.sqrt(variance)
+    result[(count < (window if min_periods is None else min_periods)) | (count <= ddof)
+        | _window_infinite(values, window)] = np.nan
+    return result
+
+def rolling_ewsum(values: np.ndarray, window: int, decay: float) -> np.ndarray:
+    '''Exponentially weighted rolling sum over dates
+    -----------------------------------------------
+
+    The sum `x[t] + decay * x[t-1] + ... + decay^(window-1) * x[t-window+1]`
+    follows `S[t] = decay * S[t-1] + x[t] - decay^window * x[t-window]`,
+    which is run as one recursive filter along the date axis.
+
+    values: np.ndarray, array in shape (dates, assets), nan counts as 0 and
+        an infinite value makes the windows holding it infinite
+    window: int, number of rows in a window
+    decay: float, weight ratio between a row and the row after it
+    return: np.ndarray, the weighted sums, rows before a full window sum
+        whatever rows there are
+    '''
+    numerator = np.zeros(window + 1)
+    numerator[0], numerator[-1] = 1., -decay ** window
+    finite = np.isfinite(values)
+    result = lfilter(numerator, [1., -decay], np.where(finite, values, 0.), axis=0)
+    return result if finite.all() else _infinite(result, values, window)
+
+def rolling_regression(y: np.ndarray, x: np.ndarray, window: int, min_periods: int = 30,
+                       present: np.ndarray = None) -> 'tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]':
+    '''Rolling univariate ols of every column of y on x over dates
+    -------------------------------------------------------------
+
+    The regression of each window is solved in closed form from rolling
+    sums of x, y, xy, x^2 and y^2 over the pairs where both are numbers,
+    so all assets and dates are fitted together with no per-window model.
+
+    y: np.ndarray, dependent values in shape (dates, assets)
+    x: np.ndarray, regressor in shape (dates, ) shared by all assets, or
+        in shape (dates, assets)
+    window: int, number of rows in a window
+    min_periods: int, least rows in the window for a result
+    present: np.ndarray, boolean rows counted against min_periods,
+        default to the pairs where both x and y are numbers
+    return: tuple, (alpha, beta, residual volatility, r squared), the
+        residual volatility uses n - 2 degrees of freedom, all nan in the
+        windows holding an infinite value
+    '''
+    x = np.broadcast_to(x[:, None] if x.ndim == 1 else x, y.shape)
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    present = valid if present is None else present
+    # centering by the column means keeps the sums of squares accurate
+    with np.errstate(invalid='ignore', divide='ignore'):
+        finite = np.isfinite(x) & np.isfinite(y)
+        infinite = _window_sum((valid & ~finite).astype(np.int64), window) > 0
+        valid = valid & finite
+        x = np.where(valid, x, np.nan)
+        y = np.where(valid, y, np.nan)
+        xcenter = np.nan_to_num(np.nanmean(x, axis=0) if x.size else 0.)
+        ycenter = np.nan_to_num(np.nanmean(y, axis=0) if y.size else 0.)
+        x = np.nan_to_num(x - xcenter, nan=0.)
+        y = np.nan_to_num(y - ycenter, nan=0.)
+
+        n = _window_sum(valid.astype(np.int64), window)
+        sx, sy = _window_sum(x, window), _window_sum(y, window)
+        sxx = _window_sum(x * x, window) - sx * sx / n
+        syy = _window_sum(y * y, window) - sy * sy / n
+        sxy = _window_sum(x * y, window) - sx * sy / n
+
+        beta = sxy / sxx
+        alpha = (sy - beta * sx) / n + ycenter - beta * xcenter
+        residual = np.maximum(syy - beta * sxy, 0)
+        volatility = np.sqrt(residual / (n - 2))
+        rsquared = 1 - residual / syy
+
+    enough = (_window_sum(present.astype(np.int64), window) >= min_periods) & ~infinite
+    return tuple(np.where(enough, result, np.nan) for result in (alpha, beta, volatility, rsquared))
@@ -0,0 +1,163 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def sliding_windows(values: np.ndarray, window: int, fill=np.nan) -> np.ndarray:
+    '''Windows over dates as a 3-D view in shape (dates, assets, window),
+    rows before the first full window are padded with fill'''
+    padded = np.concatenate([np.full((window - 1, ) + values.shape[1:], fill, dtype=values.dtype), values])
+    return sliding_window_view(padded, window, axis=0)
+
+def _blocks(dates: int, assets: int, window: int, size: int = 2 ** 22):
+    '''Row slices keeping every block of windows under size elements'''
+    rows = max(size // max(assets * window, 1), 1)
+    for first in range(0, dates, rows):
+        yield slice(first, first + rows)
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    '''Sums of the first 0, 1, ..., n values on the last axis, non-finite
+    values count as 0'''
+    total = np.cumsum(np.where(np.isfinite(values), values, 0), axis=-1)
+    return np.concatenate([np.zeros(total.shape[:-1] + (1, )), total], axis=-1)
+
+def _head_mean(ordered: np.ndarray, n: np.ndarray) -> np.ndarray:
+    '''Mean of the first n values on the last axis, an infinite value makes
+    the mean infinite and infinite values of both signs make it nan'''
+    def head(values):
+        return np.take_along_axis(_prefix(values), n[..., None], axis=-1)[..., 0]
+    positive = head((ordered == np.inf).astype(np.int64))
+    negative = head((ordered == -np.inf).astype(np.int64))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = head(ordered) / n
+    mean = np.where(positive > 0, np.inf, mean)
+    mean = np.where(negative > 0, -np.inf, mean)
+    return np.where((positive > 0) & (negative > 0), np.nan, mean)
+
+def window_trimmed_mean(windows: np.ndarray, k: int,
+                        present: np.ndarray = None) -> 'tuple[np.ndarray, np.ndarray]':
+    '''Mean of the k smallest and the k largest values of every window
+    -----------------------------------------------------------------
+
+    `np.partition` moves the k smallest (largest) values of all windows to
+    one side at once, and only those k are sorted to take the means. Nan
+    values rank after all the others, so a present nan takes a position
+    but never enters a mean, and infinite values rank and average like any
+    other, which is what sorting a series and taking the mean of its first
+    and last k values does.
+
+    windows: np.ndarray, windows on the last axis, e.g. from `sliding_windows`
+    k: int, number of values on each side
+    present: np.ndarray, boolean values taking a position in the window,
+        default to the non-nan values
+    return: tuple, (bottom, top), mean of the k smallest and of the k largest
+        present values, nan if none of them is a number
+    '''
+    window = windows.shape[-1]
+    present = ~np.isnan(windows) if present is None else np.asarray(present, dtype=bool)
+    valued = present & ~np.isnan(windows)
+    shape = windows.shape[:-1]
+    if k <= 0 or window == 0:
+        return np.full(shape, np.nan), np.full(shape, np.nan)
+    k = min(k, window)
+
+    count = present.sum(axis=-1)
+    number = valued.sum(axis=-1)
+    # the first k positions hold the smallest values, the last k positions
+    # the present nans and then the largest values
+    low = np.minimum(number, k)
+    high = np.clip(number - np.maximum(count - k, 0), 0, None)
+
+    smallest = np.partition(np.where(valued, windows, np.inf), k - 1, axis=-1)[..., :k]
+    largest = -np.partition(np.where(valued, -windows, np.inf), k - 1, axis=-1)[..., :k]
+    bottom = _head_mean(np.sort(smallest, axis=-1), low)
+    top = _head_mean(-np.sort(-largest, axis=-1), high)
+    return bottom, top
+
+def window_quantile(windows: np.ndarray, q: 'float | list',
+                    min_periods: int = 1) -> np.ndarray:
+    '''Quantiles of the non-nan values of every window
+    -------------------------------------------------
+
+    Quantiles interpolate linearly between order statistics like
+    `np.nanquantile`. All the order statistics needed are placed by one
+    `np.partition` call, which is a handful of positions when the windows
+    are full.
+
+    windows: np.ndarray, windows on the last axis, e.g. from `sliding_windows`
+    q: float or list, quantiles in [0, 1]
+    min_periods: int, least non-nan values for a result
+    return: np.ndarray, the quantiles of every window, with a leading axis
+        for the quantiles if q is a list
+    '''
+    quantiles = np.atleast_1d(np.asarray(q, dtype=float))
+    count = (~np.isnan(windows)).sum(axis=-1)
+    valid = count >= max(min_periods, 1)
+    position = quantiles.reshape((-1, ) + (1, ) * count.ndim) * (np.maximum(count, 1) - 1)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, np.maximum(count, 1) - 1)
+
+    kth = np.unique(np.concatenate([lower[:, valid], upper[:, valid]], axis=None))
+    ordered = np.partition(np.where(np.isnan(windows), np.inf, windows), kth, axis=-1) \
+        if len(kth) else windows
+    result = np.full(position.shape, np.nan)
+    for i in range(len(quantiles)):
+        low = np.take_along_axis(ordered, lower[i][..., None], axis=-1)[..., 0]
+        high = np.take_along_axis(ordered, upper[i][..., None], axis=-1)[..., 0]
+        with np.errstate(invalid='ignore'):
+            value = low + (position[i] - lower[i]) * (high - low)
+        result[i] = np.where(valid, np.where(lower[i] == upper[i], low, value), np.nan)
+    return result if np.ndim(q) else result[0]
+
+def rolling_trimmed_mean(values: np.ndarray, window: int, k: int,
+                         present: np.ndarray = None) -> 'tuple[np.ndarray, np.ndarray]':
+    '''Rolling mean of the k smallest and the k largest values over dates
+    --------------------------------------------------------------------
+
+    The windows of all assets are taken as one 3-D view and reduced block
+    by block of dates with `window_trimmed_mean`.
+
+    values: np.ndarray, array in shape (dates, assets)
+    window: int, number of rows in a window
+    k: int, number of values on each side
+    present: np.ndarray, boolean rows taking a position in the window,
+        default to the non-nan values
+    return: tuple, (bottom, top), mean of the k smallest and of the k largest
+        present values, nan if none of them is a number
+    '''
+    present = ~np.isnan(values) if present is None else np.asarray(present, dtype=bool)
+    windows = sliding_windows(values, window)
+    flags = sliding_windows(present, window, fill=False)
+    bottom = np.full(values.shape, np.nan)
+    top = np.full(values.shape, np.nan)
+    for rows in _blocks(*values.shape, window):
+        bottom[rows], top[rows] = window_trimmed_mean(windows[rows], k, flags[rows])
+    return bottom, top
+
+def rolling_quantile(values: np.ndarray, window: int, q: 'float | list',
+                     min_periods: int = None) -> np.ndarray:
+    '''Rolling quantiles over dates
+    ------------------------------
+
+    values: np.ndarray, array in shape (dates, assets), nan is skipped
+    window: int, number of rows in a window
+    q: float or list, quantiles in [0, 1]
+    min_periods: int, least non-nan values for a result, default to window
+    return: np.ndarray, in shape (dates, assets), or (quantiles, dates,
+        assets) if q is a list
+    '''
+    windows = sliding_windows(values, window)
+    result = np.full((np.size(q), ) + values.shape, np.nan)
+    for rows in _blocks(*values.shape, window):
+        result[:, rows] = window_quantile(windows[rows], np.atleast_1d(q),
+            window if min_periods is None else min_periods)
+    return result if np.ndim(q) else result[0]
+
+def rolling_quantile_spread(values: np.ndarray, window: int, low: float, high: float,
+                            min_periods: int = None) -> np.ndarray:
+    '''Rolling difference of the high and the low quantile over dates'''
+    lower, upper = rolling_quantile(values, window, [low, high], min_periods)
+    return upper - lower
+
+def rolling_iqr(values: np.ndarray, window: int, min_periods: int = None) -> np.ndarray:
+    '''Rolling interquartile range over dates'''
+    return rolling_quantile_spread(values, window, 0.25, 0.75, min_periods)
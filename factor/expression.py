@@ -0,0 +1,180 @@
+import warnings
+import numpy as np
+from .panel import Panel
+from .engine import rowrank, rolling_sum, rolling_mean, rolling_std
+
+
+class Expression:
+    '''Lazy expression over named date x asset fields
+    ------------------------------------------------
+
+    Expressions are built with `field` and the operator functions below,
+    e.g. `ts_mean(field('s_dq_turn'), 20) / ts_mean(field('s_dq_turn'), 250)`.
+    Nothing is computed until a `Graph` holding the expression is evaluated.
+    Two expressions built the same way have the same `key`, which is how the
+    graph shares them.
+
+    op: str, operator name
+    args: tuple, operand expressions
+    params: tuple, hashable operator parameters
+    '''
+
+    def __init__(self, op: str, args: tuple = (), params: tuple = ()):
+        if op not in OPS and op not in ('field', 'const'):
+            raise ValueError(f'unknown operator {op}')
+        self.op = op
+        self.args = tuple(args)
+        self.params = tuple(params)
+        self.key = (op, tuple(arg.key for arg in self.args), self.params)
+
+    def fields(self) -> set:
+        if self.op == 'field':
+            return {self.params[0]}
+        return set().union(*(arg.fields() for arg in self.args))
+
+    def __add__(self, other): return Expression('add', (self, _wrap(other)))
+    def __radd__(self, other): return Expression('add', (_wrap(other), self))
+    def __sub__(self, other): return Expression('sub', (self, _wrap(other)))
+    def __rsub__(self, other): return Expression('sub', (_wrap(other), self))
+    def __mul__(self, other): return Expression('mul', (self, _wrap(other)))
+    def __rmul__(self, other): return Expression('mul', (_wrap(other), self))
+    def __truediv__(self, other): return Expression('div', (self, _wrap(other)))
+    def __rtruediv__(self, other): return Expression('div', (_wrap(other), self))
+    def __neg__(self): return Expression('neg', (self, ))
+
+    def __repr__(self) -> str:
+        if self.op == 'field':
+            return self.params[0]
+        if self.op == 'const':
+            return repr(self.params[0])
+        return f'{self.op}({", ".join(map(repr, self.args + self.params))})'
+
+
+def _wrap(value: 'Expression | float') -> Expression:
+    return value if isinstance(value, Expression) else Expression('const', params=(float(value), ))
+
+def _rank(x):
+    rank, count = rowrank(x)
+    return (rank + 1) / count
+
+def _zscore(x):
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return (x - np.nanmean(x, axis=1, keepdims=True)) / np.nanstd(x, axis=1, ddof=1, keepdims=True)
+
+def _div(x, y):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = x / y
+    result[~np.isfinite(result)] = np.nan
+    return result
+
+def _delay(x, period):
+    result = np.full_like(x, np.nan)
+    if period < x.shape[0]:
+        result[period:] = x[:x.shape[0] - period]
+    return result
+
+OPS = {
+    'add': lambda x, y: x + y,
+    'sub': lambda x, y: x - y,
+    'mul': lambda x, y: x * y,
+    'div': _div,
+    'neg': lambda x: -x,
+    'abs': np.abs,
+    'log': lambda x: np.log(np.where(x > 0, x, np.nan)),
+    'rank': _rank,
+    'zscore': _zscore,
+    'delay': _delay,
+    'ts_mean': rolling_mean,
+    'ts_std': rolling_std,
+    'ts_sum': rolling_sum,
+}
+
+def field(name: str) -> Expression: return Expression('field', params=(name, ))
+def rank(x: Expression) -> Expression: return Expression('rank', (x, ))
+def zscore(x: Expression) -> Expression: return Expression('zscore', (x, ))
+def ratio(x: Expression, y: Expression) -> Expression: return Expression('div', (x, y))
+def log(x: Expression) -> Expression: return Expression('log', (x, ))
+def delay(x: Expression, period: int) -> Expression: return Expression('delay', (x, ), (period, ))
+def ts_mean(x: Expression, window: int) -> Expression: return Expression('ts_mean', (x, ), (window, ))
+def ts_std(x: Expression, window: int) -> Expression: return Expression('ts_std', (x, ), (window, ))
+def ts_sum(x: Expression, window: int) -> Expression: return Expression('ts_sum', (x, ), (window, ))
+
+
+class Graph:
+    '''Deduplicated evaluation graph for a set of factor expressions
+    ---------------------------------------------------------------
+
+    source: Panel or callable, a panel holding the fields, or a loader
+        called once with the list of all needed fields and returning a
+        panel or a dict of (datetime, asset) series / wide dataframes
+    '''
+
+    def __init__(self, source: 'Panel | callable'):
+        self.source = source
+        self.outputs = {}
+        self.nodes = {}
+
+    def add(self, name: str, expression: Expression) -> 'Graph':
+        self.outputs[name] = expression
+        self._register(expression)
+        return self
+
+    def _register(self, expression: Expression) -> None:
+        if expression.key in self.nodes:
+            return
+        for arg in expression.args:
+            self._register(arg)
+        self.nodes[expression.key] = expression
+
+    def fields(self) -> list:
+        return sorted(set().union(*(expression.fields() for expression in self.outputs.values())))
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def _load(self) -> Panel:
+        if isinstance(self.source, Panel):
+            return self.source
+        data = self.source(self.fields())
+        if isinstance(data, Panel):
+            return data
+        return Panel.from_data(join='outer', **data)
+
+    def evaluate(self) -> Panel:
+        '''Evaluate every output, each node once, and return them as a panel'''
+        panel = self._load()
+        consumers = {key: 0 for key in self.nodes}
+        for expression in self.nodes.values():
+            for arg in expression.args:
+                consumers[arg.key] += 1
+        outputs = {expression.key for expression in self.outputs.values()}
+
+        # nodes are registered after their operands, so this is a topological
+        # order, intermediates are dropped as soon as the last consumer is done
+        values = {}
+        for key, expression in self.nodes.items():
+            if expression.op == 'field':
+                values[key] = panel.fields[expression.params[0]].astype(np.float64)
+            elif expression.op == 'const':
+                values[key] = np.float64(expression.params[0])
+            else:
+                values[key] = OPS[expression.op](
+                    *(values[arg.key] for arg in expression.args), *expression.params)
+            for arg in expression.args:
+                consumers[arg.key] -= 1
+                if consumers[arg.key] == 0 and arg.key not in outputs:
+                    del values[arg.key]
+
+        result = Panel(panel.dates, panel.assets, panel.mask)
+        for name, expression in self.outputs.items():
+            result.add(name, np.broadcast_to(values[expression.key], panel.mask.shape).copy())
+        return result
+
+
+def evaluate(expressions: dict, source: 'Panel | callable') -> Panel:
+    '''Evaluate a dict of factor name and expression in one shared graph'''
+    graph = Graph(source)
+    for name, expression in expressions.items():
+        graph.add(name, expression)
+    return graph.evaluate()
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+from .panel import Panel, PanelField
+
+
+def nbytes(*objects) -> int:
+    '''Bytes held by pandas objects, arrays, panels and containers of them,
+    object columns are measured deeply'''
+    total = 0
+    for obj in objects:
+        if obj is None:
+            continue
+        if isinstance(obj, (pd.Series, pd.Index)):
+            total += int(obj.memory_usage(deep=True))
+        elif isinstance(obj, pd.DataFrame):
+            total += int(obj.memory_usage(deep=True).sum())
+        elif isinstance(obj, np.ndarray):
+            total += obj.nbytes
+        elif isinstance(obj, Panel):
+            total += obj.nbytes + nbytes(obj.dates, obj.assets, *obj.groups.values())
+        elif isinstance(obj, PanelField):
+            total += obj.values.nbytes
+        elif isinstance(obj, dict):
+            total += nbytes(*obj.values())
+        elif isinstance(obj, (list, tuple)):
+            total += nbytes(*obj)
+    return total
+
+def downcast(data: 'pd.Series | pd.DataFrame | np.ndarray') -> 'pd.Series | pd.DataFrame | np.ndarray':
+    '''Compact form of data for storage between the stages of a pipeline
+    -------------------------------------------------------------------
+
+    Float values become float32 and string labels, e.g. industries,
+    become categoricals, which keep each label once and an integer code
+    per row. The unused levels of a MultiIndex are dropped, so the asset
+    and date levels hold each code once with integer codes per row.
+    Computation should cross `upcast` before any accumulation.
+
+    data: pd.Series, pd.DataFrame or np.ndarray
+    return: the data in compact form, a copy if anything changes
+    '''
+    if isinstance(data, np.ndarray):
+        return data.astype(np.float32) if data.dtype == np.float64 else data
+    if isinstance(data, pd.DataFrame):
+        return pd.concat([downcast(data[column]) for column in data.columns], axis=1)
+    if pd.api.types.is_float_dtype(data) and data.dtype != np.float32:
+        data = data.astype(np.float32)
+    elif pd.api.types.is_object_dtype(data) or pd.api.types.is_string_dtype(data):
+        data = data.astype('category')
+    if isinstance(data.index, pd.MultiIndex):
+        data = data.set_axis(data.index.remove_unused_levels())
+    return data
+
+def upcast(data: 'pd.Series | pd.DataFrame | np.ndarray') -> 'pd.Series | pd.DataFrame | np.ndarray':
+    '''Full precision form of data for computation, the inverse of `downcast`'''
+    if isinstance(data, np.ndarray):
+        return data.astype(np.float64) if data.dtype == np.float32 else data
+    if isinstance(data, pd.DataFrame):
+        return pd.concat([upcast(data[column]) for column in data.columns], axis=1)
+    if data.dtype == np.float32:
+        return data.astype(np.float64)
+    if isinstance(data.dtype, pd.CategoricalDtype):
+        return data.astype(data.cat.categories.dtype)
+    return data
+
+
+class MemoryReport:
+    '''Bytes held at every stage of a pipeline
+    -----------------------------------------
+
+    `record(stage, *objects)` measures the objects alive at a stage, e.g.
+    the inputs, their compact form and the aligned panel, `frame()` puts
+    all stages in one table.
+    '''
+
+    def __init__(self):
+        self.stages = []
+
+    def record(self, stage: str, *objects) -> int:
+        size = nbytes(*objects)
+        self.stages.append((stage, size))
+        return size
+
+    def frame(self) -> pd.DataFrame:
+        frame = pd.DataFrame(self.stages, columns=['stage', 'bytes']).set_index('stage')
+        frame['megabytes'] = frame['bytes'] / 1024 ** 2
+        return frame
+
+    def __repr__(self) -> str:
+        return 'MemoryReport(' + ', '.join(f'{stage}={size / 1024 ** 2:.1f}MB'
+            for stage, size in self.stages) + ')'
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+from .engine import pivot
+
+
+class PanelField:
+    '''One field of a panel, a zero-copy view into the panel arrays
+    --------------------------------------------------------------
+
+    panel: Panel, the panel holding the field
+    name: str, field name
+    '''
+
+    def __init__(self, panel: 'Panel', name: str):
+        self.panel = panel
+        self.name = name
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.panel.fields[self.name]
+
+    @property
+    def is_group(self) -> bool:
+        return self.name in self.panel.groups
+
+    @property
+    def groups(self) -> pd.Index:
+        return self.panel.groups.get(self.name)
+
+    def slice(self, start: str = None, end: str = None) -> 'PanelField':
+        return self.panel.slice(start, end)[self.name]
+
+    def to_series(self) -> pd.Series:
+        '''Convert the valid cells into a (datetime, asset) series'''
+        values = self.values
+        valid = self.panel.mask & ((values >= 0) if self.is_group else ~np.isnan(values))
+        date_codes, asset_codes = np.nonzero(valid)
+        index = pd.MultiIndex.from_arrays([self.panel.dates[date_codes],
+            self.panel.assets[asset_codes]], names=['datetime', 'asset'])
+        values = values[valid]
+        if self.is_group:
+            values = self.groups[values]
+        return pd.Series(np.asarray(values), index=index, name=self.name)
+
+    def __repr__(self) -> str:
+        return f'PanelField({self.name}, {self.values.dtype}, {self.values.shape})'
+
+
+class Panel:
+    '''Aligned date x asset panel for the factor analysis pipeline
+    -------------------------------------------------------------
+
+    Dates and assets are coded by their position in the sorted `dates` and
+    `assets` indexes. Every numeric field is a 2-D array in shape
+    (dates, assets), nan outside the validity mask, and every group field is
+    an int32 code array, -1 outside the mask. Alignment is done once when
+    the panel is built, slicing along dates afterwards returns views.
+
+    dates: pd.Index, sorted date axis
+    assets: pd.Index, sorted asset axis
+    mask: np.ndarray, validity mask in shape (dates, assets)
+    '''
+
+    def __init__(self, dates: pd.Index, assets: pd.Index, mask: np.ndarray = None):
+        self.dates = dates
+        self.assets = assets
+        self.mask = np.ones((len(dates), len(assets)), dtype=bool) if mask is None else mask
+        self.fields = {}
+        self.groups = {}
+
+    @classmethod
+    def from_data(cls, join: str = 'inner', dtype: type = np.float32,
+                  **data: 'pd.Series | pd.DataFrame') -> 'Panel':
+        '''Build a panel from (datetime, asset) series or wide dataframes
+        ----------------------------------------------------------------
+
+        join: str, 'inner' keeps the cells present in every input,
+            'outer' keeps the cells present in any input
+        dtype: type, dtype of the numeric fields
+        data: pd.Series or pd.DataFrame, field name and its data
+        '''
+        if join not in ('inner', 'outer'):
+            raise ValueError('join should be "inner" or "outer"')
+        data = {name: value.stack() if isinstance(value, pd.DataFrame) else value
+            for name, value in data.items()}
+
+        index = None
+        for value in data.values():
+            if index is None:
+                index = value.index
+            elif join == 'inner':
+                index = index.intersection(value.index)
+            else:
+                index = index.union(value.index)
+        dates = pd.Index(index.get_level_values(0).unique()).sort_values()
+        assets = pd.Index(index.get_level_values(1).unique()).sort_values()
+        dates.name, assets.name = 'datetime', 'asset'
+
+        mask = np.zeros((len(dates), len(assets)), dtype=bool)
+        mask[dates.get_indexer(index.get_level_values(0)),
+            assets.get_indexer(index.get_level_values(1))] = True
+        panel = cls(dates, assets, mask)
+        for name, value in data.items():
+            panel.add(name, value, dtype=dtype)
+        return panel
+
+    def add(self, name: str, data: 'pd.Series | pd.DataFrame | np.ndarray',
+            dtype: type = np.float32) -> None:
+        '''Add a field, non numeric series are stored as group codes'''
+        if isinstance(data, pd.DataFrame):
+            data = data.stack()
+        if isinstance(data, np.ndarray):
+            if data.shape != self.mask.shape:
+                raise ValueError(f'field {name} should be in shape {self.mask.shape}')
+            values = data.astype(dtype, copy=True)
+        elif pd.api.types.is_numeric_dtype(data) and not pd.api.types.is_bool_dtype(data):
+            values = pivot(data, self.dates, self.assets, dtype=dtype)[0]
+        else:
+            codes, groups = pd.factorize(data, sort=True)
+            codes = pd.Series(codes, index=data.index).where(codes >= 0)
+            values = pivot(codes, self.dates, self.assets)[0]
+            values = np.nan_to_num(values, nan=-1).astype(np.int32)
+            values[~self.mask] = -1
+            self.fields[name] = values
+            self.groups[name] = pd.Index(groups)
+            return
+
+        values[~self.mask] = np.nan
+        self.fields[name] = values
+        self.groups.pop(name, None)
+
+    def slice(self, start: str = None, end: str = None) -> 'Panel':
+        '''Slice the panel along dates, fields are views of this panel'''
+        start = self.dates.searchsorted(pd.to_datetime(start)) if start is not None else None
+        end = self.dates.searchsorted(pd.to_datetime(end), side='right') if end is not None else None
+        index = slice(start, end)
+        panel = Panel(self.dates[index], self.assets, self.mask[index])
+        panel.fields = {name: values[index] for name, values in self.fields.items()}
+        panel.groups = dict(self.groups)
+        return panel
+
+    def codes(self, index: pd.MultiIndex) -> 'tuple[np.ndarray, np.ndarray]':
+        '''Integer codes of a (datetime, asset) index, -1 if outside the panel'''
+        return (self.dates.get_indexer(index.get_level_values(0)),
+            self.assets.get_indexer(index.get_level_values(1)))
+
+    @property
+    def nbytes(self) -> int:
+        return self.mask.nbytes + sum(values.nbytes for values in self.fields.values())
+
+    def __getitem__(self, name: str) -> PanelField:
+        if name not in self.fields:
+            raise KeyError(f'field {name} is not in the panel')
+        return PanelField(self, name)
+
+    def __setitem__(self, name: str, data: 'pd.Series | pd.DataFrame | np.ndarray') -> None:
+        self.add(name, data)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.fields
+
+    def __repr__(self) -> str:
+        return (f'Panel({len(self.dates)} dates x {len(self.assets)} assets, '
+            f'fields={list(self.fields)})')
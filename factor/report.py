@@ -0,0 +1,110 @@
+import shutil
+import pandas as pd
+from pathlib import Path
+
+
+class ReportStore:
+    '''Partitioned parquet store of factor analysis results
+    ------------------------------------------------------
+
+    Every table lives in its own directory and is partitioned by factor
+    name, e.g. `<path>/ic/name=momentum_20/part-0.parquet`, so one factor
+    can be rewritten alone and all factors can be scanned as one dataset.
+
+    path: str, root directory of the store
+    '''
+
+    tables = ['cross_section', 'barra', 'barra_summary', 'ic', 'ic_grouped',
+        'profit', 'cumprofit']
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def write(self, table: str, name: str, data: pd.DataFrame) -> None:
+        partition = self.path / table / f'name={name}'
+        if partition.exists():
+            shutil.rmtree(partition)
+        partition.mkdir(parents=True)
+        data.to_parquet(partition / 'part-0.parquet', index=False)
+
+    def read(self, table: str, name: str = None, columns: list = None) -> pd.DataFrame:
+        if name is not None:
+            return pd.read_parquet(self.path / table / f'name={name}', columns=columns)
+        return pd.read_parquet(self.path / table, columns=columns)
+
+    def exists(self, table: str, name: str) -> bool:
+        return (self.path / table / f'name={name}').exists()
+
+    def names(self) -> list:
+        return sorted({partition.name[len('name='):] for table in self.tables
+            if (self.path / table).exists() for partition in (self.path / table).iterdir()})
+
+    def dump(self, name: str, cross_section: pd.DataFrame = None,
+             barra_result: pd.DataFrame = None, barra_summary: pd.Series = None,
+             ic: pd.DataFrame = None, ic_grouped: pd.DataFrame = None,
+             profit: pd.Series = None, cumprofit: pd.DataFrame = None,
+             turnover: pd.Series = None) -> None:
+        '''Save the results of single factor analysis in long form'''
+        if cross_section is not None:
+            cross_section = cross_section.copy()
+            cross_section.columns = ['value', 'forward', 'group'][:cross_section.columns.size]
+            cross_section.index.names = ['datetime', 'asset']
+            self.write('cross_section', name, cross_section.reset_index())
+
+        if barra_result is not None:
+            barra_result = barra_result.rename_axis('datetime').reset_index()
+            self.write('barra', name, barra_result)
+            self.write('barra_summary', name, barra_summary.rename_axis(
+                'indicator').rename('value').reset_index())
+
+        if ic is not None:
+            self.write('ic', name, self._flatten_ic(ic, ['datetime']))
+        if ic_grouped is not None:
+            self.write('ic_grouped', name, self._flatten_ic(ic_grouped, ['datetime', 'group']))
+
+        if profit is not None:
+            layering = pd.concat([profit, turnover], axis=1, keys=['profit', 'turnover'])
+            layering.index.names = ['datetime', 'quantiles']
+            layering = layering.reset_index()
+            layering['quantiles'] = layering['quantiles'].astype(str)
+            self.write('profit', name, layering)
+            cumprofit = cumprofit.copy()
+            cumprofit.columns = cumprofit.columns.astype(str)
+            self.write('cumprofit', name, cumprofit.rename_axis('datetime').reset_index())
+
+    def load(self, name: str) -> dict:
+        '''Load the results of single factor analysis saved by `dump`'''
+        result = {}
+        if self.exists('cross_section', name):
+            cross_section = self.read('cross_section', name).set_index(['datetime', 'asset'])
+            result['cross_section'] = cross_section.rename(columns={'value': name})
+
+        if self.exists('barra', name):
+            result['barra_result'] = self.read('barra', name).set_index('datetime')
+            result['barra_summary'] = self.read('barra_summary', name).set_index('indicator')['value']
+
+        if self.exists('ic', name):
+            result['ic'] = self._unflatten_ic(self.read('ic', name), ['datetime'])
+        if self.exists('ic_grouped', name):
+            result['ic_grouped'] = self._unflatten_ic(self.read('ic_grouped', name), ['datetime', 'group'])
+
+        if self.exists('profit', name):
+            layering = self.read('profit', name).set_index(['datetime', 'quantiles'])
+            result['profit'] = layering['profit']
+            result['turnover'] = layering['turnover']
+            result['cumprofit'] = self.read('cumprofit', name).set_index('datetime')
+        return result
+
+    @staticmethod
+    def _flatten_ic(ic: pd.DataFrame, index: list) -> pd.DataFrame:
+        ic = ic.copy()
+        ic.index.names = index
+        ic.columns = pd.MultiIndex.from_arrays([ic.columns.get_level_values(0),
+            ic.columns.get_level_values(1).astype(str)], names=[None, 'horizon'])
+        return ic.stack(level='horizon').reset_index()
+
+    @staticmethod
+    def _unflatten_ic(ic: pd.DataFrame, index: list) -> pd.DataFrame:
+        horizons = pd.unique(ic['horizon'])
+        ic = ic.set_index(index + ['horizon'])[['ic', 'rankic']].unstack('horizon')
+        return ic.reindex(columns=pd.MultiIndex.from_product([['ic', 'rankic'], horizons]))
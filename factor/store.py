@@ -0,0 +1,236 @@
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+
+class FactorStore:
+    '''Append-only memory mapped store of factor values
+    --------------------------------------------------
+
+    Every factor lives in its own directory as a float32 matrix of dates by
+    assets in `values.<generation>.bin`, a uint8 mask of the cells present
+    in the input of the same shape in `mask.<generation>.bin`, the day
+    numbers of the rows in `dates.bin` and the asset dictionary in
+    `meta.json`. Rows are laid out one date after another, so appending new
+    trade dates only writes to the end of the files and a date slice is
+    one contiguous `np.memmap` read.
+
+    The matrix keeps spare columns for assets that have not been seen
+    yet, its width only grows, and the matrix is copied into the files of
+    a new generation when the spare columns run out.
+
+    `meta.json` is replaced last and is the only commit point of a write:
+    rows after the length it records, files of another generation and a
+    journal it does not point to are ignored, so an interrupted write
+    leaves the stored factor as it was. Rows of stored dates are written to
+    `journal.npz` before the commit and only then overwritten in place,
+    the journal is applied again if that is interrupted.
+
+    path: str, root directory of the store
+    '''
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def names(self) -> list:
+        if not self.path.exists():
+            return []
+        return sorted(entry.name for entry in self.path.iterdir() if (entry / 'meta.json').exists())
+
+    def __contains__(self, name: str) -> bool:
+        return (self.path / name / 'meta.json').exists()
+
+    def meta(self, name: str) -> dict:
+        return json.loads((self.path / name / 'meta.json').read_text())
+
+    def _write_meta(self, name: str, meta: dict) -> None:
+        temp = self.path / name / 'meta.json.tmp'
+        temp.write_text(json.dumps(meta))
+        os.replace(temp, self.path / name / 'meta.json')
+
+    def _file(self, name: str, file: str, meta: dict) -> Path:
+        return self.path / name / f'{file}.{meta["generation"]}.bin'
+
+    def _memmap(self, name: str, file: str, meta: dict, first: int = 0,
+                last: int = None, mode: str = 'r') -> np.memmap:
+        dtype = np.dtype(np.float32 if file == 'values' else np.uint8)
+        last = meta['length'] if last is None else last
+        return np.memmap(self._file(name, file, meta), dtype=dtype, mode=mode,
+            offset=first * meta['capacity'] * dtype.itemsize, shape=(last - first, meta['capacity']))
+
+    def dates(self, name: str) -> pd.DatetimeIndex:
+        meta = self.meta(name)
+        days = np.fromfile(self.path / name / 'dates.bin', dtype=np.int64, count=meta['length'])
+        return pd.DatetimeIndex(days.astype('datetime64[D]').astype('datetime64[ns]'))
+
+    def assets(self, name: str) -> pd.Index:
+        return pd.Index(self.meta(name)['assets'])
+
+    def last_date(self, name: str) -> 'pd.Timestamp | None':
+        '''The last stored date of a factor, None if it is not stored'''
+        if name not in self:
+            return None
+        dates = self.dates(name)
+        return dates[-1] if len(dates) else None
+
+    def _recover(self, name: str) -> dict:
+        '''Finish the last committed write, apply its journal in place and
+        remove the files left by other generations'''
+        meta = self.meta(name)
+        directory = self.path / name
+        if meta['journal']:
+            with np.load(directory / 'journal.npz') as journal:
+                for file in ('values', 'mask'):
+                    memmap = self._memmap(name, file, meta, mode='r+')
+                    memmap[journal['rows']] = journal[file]
+                    memmap.flush()
+                    del memmap
+            meta['journal'] = False
+            self._write_meta(name, meta)
+        current = {self._file(name, file, meta).name for file in ('values', 'mask')}
+        for entry in directory.iterdir():
+            if entry.name.startswith(('values.', 'mask.')) and entry.name not in current:
+                entry.unlink()
+        for journal in ('journal.npz', 'journal.tmp.npz'):
+            if (directory / journal).exists():
+                (directory / journal).unlink()
+        return meta
+
+    def _resize(self, name: str, meta: dict, capacity: int) -> None:
+        # the wider matrix goes to the files of the next generation, the
+        # current files stay as they are until the meta is committed
+        old = dict(meta)
+        meta['capacity'], meta['generation'] = capacity, meta['generation'] + 1
+        for file in ('values', 'mask'):
+            new = np.full((old['length'], capacity), np.nan if file == 'values' else 0,
+                dtype=np.float32 if file == 'values' else np.uint8)
+            if old['length']:
+                new[:, :old['capacity']] = self._memmap(name, file, old)
+            new.tofile(self._file(name, file, meta))
+
+    def append(self, name: str, factor: 'pd.Series | pd.DataFrame') -> None:
+        '''Append the factor values of new trade dates
+        ---------------------------------------------
+
+        Dates already stored are overwritten, dates after the last stored
+        one are appended, a date before it that is not stored yet raises a
+        ValueError since rows are never inserted in the middle.
+
+        name: str, factor name
+        factor: pd.Series or pd.DataFrame, (datetime, asset) indexed values,
+            every pair in the index is present even with a nan value, or a
+            wide frame of dates by assets, its non-nan cells are present
+        '''
+        if isinstance(factor, pd.Series):
+            wide = factor.unstack()
+            present = pd.Series(True, index=factor.index).unstack(fill_value=False)
+        else:
+            wide = factor
+            present = factor.notna()
+        wide = wide.set_axis(pd.to_datetime(wide.index)).sort_index()
+        present = present.set_axis(pd.to_datetime(present.index)).sort_index() \
+            .reindex(index=wide.index, columns=wide.columns, fill_value=False)
+        directory = self.path / name
+        if name in self:
+            meta = self._recover(name)
+        else:
+            directory.mkdir(parents=True, exist_ok=True)
+            meta = {'length': 0, 'capacity': 0, 'generation': 0, 'journal': False, 'assets': []}
+        stored = self.dates(name) if meta['length'] else pd.DatetimeIndex([])
+
+        new = wide.index[~wide.index.isin(stored)]
+        if len(stored) and len(new) and new[0] <= stored[-1]:
+            raise ValueError(f'{new[0].date()} is before the last stored date of {name}, '
+                'rows can only be appended after it')
+
+        assets = meta['assets'] + [asset for asset in wide.columns if asset not in set(meta['assets'])]
+        if len(assets) > meta['capacity']:
+            self._resize(name, meta, max(len(assets), 2 * meta['capacity'], 64))
+        meta['assets'] = assets
+        columns = pd.Index(assets).get_indexer(wide.columns)
+
+        values = np.full((len(wide), meta['capacity']), np.nan, dtype=np.float32)
+        values[:, columns] = wide.to_numpy(dtype=np.float32)
+        mask = np.zeros(values.shape, dtype=np.uint8)
+        mask[:, columns] = present.to_numpy(dtype=bool)
+
+        # stored rows are journaled and only overwritten after the commit
+        overlap = wide.index.isin(stored)
+        if overlap.any():
+            np.savez(directory / 'journal.tmp.npz', rows=stored.get_indexer(wide.index[overlap]),
+                values=values[overlap], mask=mask[overlap])
+            os.replace(directory / 'journal.tmp.npz', directory / 'journal.npz')
+
+        # truncate to the recorded length first, dropping the rows of an
+        # interrupted append, then write the new rows at the end
+        for file, data, size in ((self._file(name, 'values', meta), values[~overlap], 4 * meta['capacity']),
+                (self._file(name, 'mask', meta), mask[~overlap], meta['capacity']), (directory / 'dates.bin',
+                new.values.astype('datetime64[D]').astype(np.int64), 8)):
+            with open(file, 'ab') as handle:
+                handle.truncate(meta['length'] * size)
+                handle.write(np.ascontiguousarray(data).tobytes())
+        meta['length'] += len(new)
+        meta['journal'] = bool(overlap.any())
+        self._write_meta(name, meta)
+        self._recover(name)
+
+    def write(self, name: str, factor: 'pd.Series | pd.DataFrame') -> None:
+        '''Replace the whole history of a factor'''
+        self.delete(name)
+        self.append(name, factor)
+
+    def delete(self, name: str) -> None:
+        if (self.path / name).exists():
+            shutil.rmtree(self.path / name)
+
+    def read(self, name: str, start: str = None, end: str = None,
+             assets: list = None, wide: bool = False) -> 'pd.Series | pd.DataFrame':
+        '''Read a date slice of a factor
+        -------------------------------
+
+        Only the rows between start and end are mapped from the files.
+
+        name: str, factor name
+        start: str, first date, the first stored date if None
+        end: str, last date, the last stored date if None
+        assets: list, assets to read, all stored assets if None
+        wide: bool, whether to return a wide frame of dates by assets
+        return: pd.Series or pd.DataFrame, (datetime, asset) indexed present
+            values named after the factor, or the wide frame with nan where
+            a value is not present
+        '''
+        meta = self.meta(name)
+        dates = self.dates(name)
+        first = 0 if start is None else dates.searchsorted(pd.to_datetime(start))
+        last = len(dates) if end is None else dates.searchsorted(pd.to_datetime(end), side='right')
+        columns = pd.Index(meta['assets'])
+        position = np.arange(len(columns)) if assets is None else columns.get_indexer(assets)
+        columns = columns if assets is None else pd.Index(assets)
+
+        values = np.full((max(last - first, 0), len(columns)), np.nan, dtype=np.float32)
+        mask = np.zeros(values.shape, dtype=bool)
+        if last > first and len(columns):
+            found = position >= 0
+            values[:, found] = self._memmap(name, 'values', meta, first, last)[:, position[found]]
+            mask[:, found] = self._memmap(name, 'mask', meta, first, last)[:, position[found]].astype(bool)
+            # a committed journal not applied yet holds the latest rows
+            if meta['journal']:
+                with np.load(self.path / name / 'journal.npz') as journal:
+                    rows = journal['rows']
+                    inside = (rows >= first) & (rows < last)
+                    values[np.ix_(rows[inside] - first, np.nonzero(found)[0])] = \
+                        journal['values'][inside][:, position[found]]
+                    mask[np.ix_(rows[inside] - first, np.nonzero(found)[0])] = \
+                        journal['mask'][inside][:, position[found]].astype(bool)
+        values[~mask] = np.nan
+
+        frame = pd.DataFrame(values, index=dates[first:last].rename('datetime'),
+            columns=columns.rename('asset'))
+        if wide:
+            return frame
+        index = pd.MultiIndex.from_arrays([frame.index[np.nonzero(mask)[0]],
+            frame.columns[np.nonzero(mask)[1]]], names=['datetime', 'asset'])
+        return pd.Series(values[mask], index=index, name=name)
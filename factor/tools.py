@@ -1,18 +1,32 @@
 import sys
+import warnings
 import pandasquant as pq
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from functools import wraps
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .cache import FactorCache
+from .report import ReportStore
+from .store import FactorStore
+from .memory import MemoryReport, downcast, upcast
+from .panel import Panel, PanelField
+from .universe import Universe
+from .engine import (pivot, pivot_group, layering, information_coefficient,
+    CrossSectionRegression, newey_west_t, preprocess)
+from .engine.preprocess import DEEXTREME, STANDARDIZE, FILLNA
 
 
 class Factor:
     def __init__(self, name: str,
-                 pool: 'list | pd.Index | pd.MultiIndex' = None,
+                 pool: 'list | pd.Index | pd.MultiIndex | Universe' = None,
                  deextreme: str = 'mad',
                  standardize: str = 'zscore',
                  fillna: str = 'mean',
                  grouper = None,
+                 cache: 'str | FactorCache' = None,
+                 data_version = None,
+                 compact: bool = False,
                  *args, **kwargs):
         self.name = name
         self.pool = pool
@@ -20,31 +34,58 @@ class Factor:
         self.standardize = standardize
         self.fillna = fillna
         self.grouper = grouper
+        self.cache = FactorCache(cache) if isinstance(cache, str) else cache
+        # the key only sees the arguments, not the data read from disk, so a
+        # cached factor needs the version of its inputs to go stale with them
+        if self.cache is not None and data_version is None:
+            raise ValueError('data_version must be provided with a cache, '
+                'e.g. `lambda: path_version(data_path)`')
+        self.data_version = data_version
+        self.compact = compact
         self.args = args
         self.kwargs = kwargs
 
-    def filter_pool(self) -> 'pd.Series | pd.DataFrame':
+    def filter_pool(self) -> pd.Series:
         if self.pool is None:
             return self.factor
+
+        elif isinstance(self.pool, Universe):
+            return self.pool.filter(self.factor)
         
         elif isinstance(self.pool, pd.MultiIndex):
-            stocks = self.pool.index.intersection(self.factor.index)
-            return self.factor.loc[stocks]
+            return self.factor[self.factor.index.isin(self.pool)]
 
-        elif isinstance(self.pool, pd.Index):
-            stocks = self.pool.index.intersection(self.factor.index.levels[1])
-            return self.factor.loc[stocks]
-        
-        elif isinstance(self.pool, list):
-            stocks = pd.Index(stocks)
-            stocks = stocks.index.intersection(self.factor.index.levels[1])
-            return self.factor.loc[stocks]
+        elif isinstance(self.pool, (pd.Index, list)):
+            return self.factor[self.factor.index.get_level_values(1).isin(self.pool)]
+
+        raise ValueError('pool must be a list, pd.Index, pd.MultiIndex or Universe')
     
     def preprocess(self):
+        if (self.deextreme is None or self.deextreme in DEEXTREME) and \
+            (self.standardize is None or self.standardize in STANDARDIZE) and \
+            (self.fillna is None or self.fillna in FILLNA):
+            return self.fused_preprocess()
+
         factor = self.factor.preprocessor.deextreme(self.deextreme, self.grouper)
         factor = factor.preprocessor.standarize(self.standardize, self.grouper)
         factor = factor.preprocessor.fillna(self.fillna, self.grouper)
         return factor
+
+    def fused_preprocess(self) -> pd.Series:
+        date_codes = pd.factorize(self.factor.index.get_level_values(0))[0]
+        if self.grouper is None:
+            segment = date_codes
+        else:
+            if isinstance(self.grouper.index, pd.MultiIndex):
+                grouper = self.grouper.reindex(self.factor.index)
+            else:
+                # a static grouper indexed by asset applies to every date
+                grouper = self.grouper.reindex(self.factor.index.get_level_values(1))
+            group_codes, groups = pd.factorize(grouper)
+            segment = np.where(group_codes >= 0, date_codes * len(groups) + group_codes, -1)
+        values = preprocess(self.factor.to_numpy(dtype=np.float64), segment,
+            self.deextreme, self.standardize, self.fillna)
+        return pd.Series(values, index=self.factor.index, name=self.factor.name)
     
     def postprocess(self):
         if isinstance(self.factor, pd.DataFrame) and isinstance(self.factor.index, pd.MultiIndex):
@@ -62,77 +103,229 @@ class Factor:
         factor.name = self.name
         return factor
     
+    def cache_key(self, func, args: tuple, kwargs: dict) -> str:
+        settings = dict(name=self.name, pool=self.pool, deextreme=self.deextreme,
+            standardize=self.standardize, fillna=self.fillna, grouper=self.grouper,
+            compact=self.compact)
+        # data_version can be a callable, e.g. `lambda: path_version(data_path)`,
+        # so that the version of the inputs is checked on every call
+        data_version = self.data_version() if callable(self.data_version) else self.data_version
+        return self.cache.key(func, args, kwargs, settings, data_version)
+
     def __call__(self, func):
         @wraps(func)
         def wrapper(*args, **kwargs):
+            if self.cache is not None:
+                key = self.cache_key(func, args, kwargs)
+                self.factor = self.cache.get(key)
+                if self.factor is not None:
+                    return self.factor
+
             self.factor = func(*args, **kwargs)
+            if isinstance(self.factor, PanelField):
+                self.factor = self.factor.to_series()
+            self.factor = self.postprocess()
             self.factor = self.preprocess()
             self.factor = self.filter_pool()
-            self.factor = self.postprocess()
+            if self.compact:
+                self.factor = downcast(self.factor)
+
+            if self.cache is not None:
+                self.cache.put(key, self.factor)
             return self.factor
         return wrapper
 
-def single_factor_analysis(factor_data: 'pd.Series | pd.DataFrame', forward_return: 'pd.Series | pd.DataFrame',
-                           grouper: 'pd.Series | pd.DataFrame | dict' = None, 
+def _dense(data: 'pd.Series | PanelField', dates: pd.Index = None,
+           assets: pd.Index = None) -> 'tuple[np.ndarray, pd.Index, pd.Index]':
+    if isinstance(data, PanelField):
+        panel = data.panel
+        if dates is None or (panel.dates.equals(dates) and panel.assets.equals(assets)):
+            return upcast(data.values), panel.dates, panel.assets
+        data = data.to_series()
+    return pivot(data, dates, assets)
+
+def _dense_group(grouper: 'pd.Series | PanelField', dates: pd.Index,
+                 assets: pd.Index) -> 'tuple[np.ndarray, pd.Index]':
+    if isinstance(grouper, PanelField):
+        panel = grouper.panel
+        if panel.dates.equals(dates) and panel.assets.equals(assets):
+            return grouper.values, grouper.groups
+        grouper = grouper.to_series()
+    return pivot_group(grouper, dates, assets)
+
+def _compact(factor_data: pd.Series, forward_returns: 'pd.Series | pd.DataFrame | list',
+             grouper: pd.Series = None, barra_weight: pd.Series = None,
+             memory: MemoryReport = None) -> tuple:
+    '''Align the inputs of single factor analysis into a float32 panel on
+    their common cells, return them as fields of the panel and the labels
+    of the forward returns'''
+    if isinstance(forward_returns, pd.DataFrame):
+        forward_returns = [forward_returns[column] for column in forward_returns.columns]
+    elif isinstance(forward_returns, pd.Series):
+        forward_returns = [forward_returns]
+    horizons = [forward.name if forward.name is not None else f'forward_{i}'
+        for i, forward in enumerate(forward_returns)]
+
+    # field names are generated, the labels of the inputs can be any
+    # hashable and may clash with each other
+    forward_keys = [f'forward_{i}' for i in range(len(forward_returns))]
+    used = set(forward_keys) | {'barra_weight'}
+    def key(label, default: str) -> str:
+        field = label if isinstance(label, str) and label not in used else default
+        while field in used:
+            field = '_' + field
+        used.add(field)
+        return field
+
+    factor_key = key(factor_data.name, 'factor')
+    data = {factor_key: downcast(factor_data)}
+    data.update({forward_key: downcast(forward) for forward_key, forward in zip(forward_keys, forward_returns)})
+    grouper_key = key(grouper.name, 'grouper') if grouper is not None else None
+    if grouper is not None:
+        data[grouper_key] = downcast(grouper)
+    if memory is not None:
+        memory.record('compact', data)
+
+    panel = Panel.from_data(join='inner', dtype=np.float32, **data)
+    del data
+    if barra_weight is not None:
+        panel.add('barra_weight', barra_weight, dtype=np.float32)
+    if memory is not None:
+        memory.record('panel', panel)
+    return (panel[factor_key], [panel[forward_key] for forward_key in forward_keys],
+        panel[grouper_key] if grouper is not None else None,
+        panel['barra_weight'] if barra_weight is not None else None, horizons)
+
+def _figure() -> 'list[plt.Axes]':
+    if sys.platform == 'linux':
+        plt.rcParams['font.family'] = ['DejaVu Serif']
+    elif sys.platform == 'darwin':
+        plt.rcParams['font.family'] = ['Songti SC']
+    _, axes = plt.subplots(7, 1, figsize=(12, 7 * 8))
+    return axes
+
+def single_factor_analysis(factor_data: 'pd.Series | pd.DataFrame | PanelField',
+                           forward_return: 'pd.Series | pd.DataFrame | PanelField | list',
+                           grouper: 'pd.Series | pd.DataFrame | PanelField' = None, 
                            benchmark: pd.Series = None, q: int = 5, commission: float = 0.001, 
-                           commission_type: str = 'both', plot_period: 'int | str' = -1, 
-                           data_path: str = None, image_path: str = None, show: bool = True):
+                           commission_type: str = 'both', layering_grouped: bool = False,
+                           barra_weight: 'pd.Series | pd.DataFrame' = None, plot_period: 'int | str' = -1, 
+                           data_path: str = None, image_path: str = None, show: bool = True,
+                           report_path: str = None, headless: bool = False,
+                           store: 'str | FactorStore' = None, start: str = None, end: str = None,
+                           compact: bool = False, memory: MemoryReport = None):
+    if headless and report_path is None:
+        raise ValueError('report_path must be provided in headless mode')
+    console = pq.Console if not headless else None
+
+    # factors and forward returns given by name are read from the factor store
+    store = FactorStore(store) if isinstance(store, str) else store
+    if isinstance(factor_data, str) or isinstance(forward_return, str):
+        if store is None:
+            raise ValueError('store must be provided to load data by name')
+        if isinstance(factor_data, str):
+            factor_data = store.read(factor_data, start, end)
+        if isinstance(forward_return, str):
+            forward_return = store.read(forward_return, start, end)
+
     if isinstance(factor_data, pd.DataFrame):
-        pq.Console.print('[yello][!][/yellow] Factor data in wide form, transposing ... ')
+        if console: console.print('[yello][!][/yellow] Factor data in wide form, transposing ... ')
         factor_data = factor_data.stack()
         factor_data.name = 'factor'
+    elif isinstance(factor_data, pd.Series) and factor_data.name is None:
+        # the name partitions the report store, an unnamed factor gets the
+        # same default as a wide one instead of a `None` partition
+        factor_data = factor_data.rename('factor')
 
-    if isinstance(forward_return, pd.DataFrame):
-        pq.Console.print('[yellow][!][/yellow] Forward return in wide form, transposing ... ')
+    if isinstance(forward_return, pd.DataFrame) and not isinstance(forward_return.index, pd.MultiIndex):
+        if console: console.print('[yellow][!][/yellow] Forward return in wide form, transposing ... ')
         forward_return = forward_return.stack()
         forward_return.name = 'forward'
 
+    # multiple horizons are only used in ic test, other tests use the first one
+    forward_returns = forward_return
+    if isinstance(forward_return, pd.DataFrame):
+        forward_return = forward_returns.iloc[:, 0]
+    elif isinstance(forward_return, list):
+        forward_return = forward_returns[0]
+
     if isinstance(grouper, pd.DataFrame):
-        pq.Console.print('[yello][!][/yellow] Grouper in wide form, transposing ... ')
+        if console: console.print('[yello][!][/yellow] Grouper in wide form, transposing ... ')
         grouper = grouper.stack()
         grouper.name = 'grouper'
 
-    # slice the common part of data
-    pq.Console.print('[green][*][/green] Gathering data and filter common part ... ')
-    common_index = factor_data.index.intersection(forward_return.index)
-    if grouper is not None:
-        common_index = common_index.intersection(grouper.index)
-    
-    factor_data = factor_data.loc[common_index]
-    forward_return = forward_return.loc[common_index]
-    if grouper is not None:
-        grouper = grouper.loc[common_index]
+    if isinstance(barra_weight, pd.DataFrame):
+        barra_weight = barra_weight.stack()
 
-    if sys.platform == 'linux':
-        plt.rcParams['font.family'] = ['DejaVu Serif']
-    elif sys.platform == 'darwin':
-        plt.rcParams['font.family'] = ['Songti SC']
+    if memory is not None:
+        memory.record('input', factor_data, forward_returns, grouper, barra_weight)
 
-    data_writer = pd.ExcelWriter(data_path) if data_path is not None else None
-    _, axes = plt.subplots(7, 1, figsize=(12, 7 * 8))
+    horizons = None
+    # in compact mode the inputs are aligned into one float32 panel with
+    # categorical groups, and only single fields are upcast for computation
+    if compact and not isinstance(factor_data, PanelField):
+        if console: console.print('[green][*][/green] Aligning data into a compact panel ... ')
+        factor_data, forward_returns, grouper, barra_weight, horizons = _compact(
+            factor_data, forward_returns, grouper, barra_weight, memory)
+        forward_return = forward_returns[0]
+
+    # slice the common part of data, fields of a panel are aligned already
+    if not isinstance(factor_data, PanelField):
+        if console: console.print('[green][*][/green] Gathering data and filter common part ... ')
+        common_index = factor_data.index.intersection(forward_return.index)
+        if grouper is not None:
+            common_index = common_index.intersection(grouper.index)
+        
+        factor_data = factor_data.loc[common_index]
+        forward_return = forward_return.loc[common_index]
+        if isinstance(forward_returns, list):
+            forward_returns = [forward.reindex(common_index) for forward in forward_returns]
+        else:
+            forward_returns = forward_returns.loc[common_index]
+        if grouper is not None:
+            grouper = grouper.loc[common_index]
+
+    # in headless mode nothing is rendered, results only go to the report store
+    if headless:
+        data_writer, axes, show = None, [None] * 7, False
+    else:
+        data_writer = pd.ExcelWriter(data_path) if data_path is not None else None
+        axes = _figure()
     
-    cross_section_test(factor_data, forward_return, grouper, 
+    cross_section = cross_section_test(factor_data, forward_return, grouper, 
                         plot_period=plot_period, data_writer=data_writer, 
                         boxplot_ax=axes[0], scatter_ax=axes[1], 
                         hist_ax=axes[2])
                         
-    pq.Console.rule('Barra Test')
+    if console: console.rule('Barra Test')
+    barra_result, barra_summary = None, None
     if grouper is not None:
-        barra_test(factor_data, forward_return, grouper,
-                    data_writer=data_writer, barra_ax=axes[3], show=show)
-    else:
-        pq.Console.print('[yellow][!][/yellow] You didn\'t provide group information,'
+        barra_result, barra_summary = barra_test(factor_data, forward_return, grouper,
+                    weight=barra_weight, data_writer=data_writer, barra_ax=axes[3], show=show)
+    elif console:
+        console.print('[yellow][!][/yellow] You didn\'t provide group information,'
             'so it is impossible to make barra test')
                 
-    pq.Console.rule('IC Test')
-    ic_test(factor_data, forward_return, grouper,
+    if console: console.rule('IC Test')
+    ic, ic_grouped = ic_test(factor_data, forward_returns, grouper, horizons=horizons,
             data_writer=data_writer, ic_ax=axes[4], show=show)
             
-    pq.Console.rule('Layering Test')
-    layering_test(factor_data, forward_return, q=q, 
+    if console: console.rule('Layering Test')
+    profit, cumprofit, turnover = layering_test(factor_data, forward_return, q=q, 
                   commission=commission, commission_type=commission_type,
-                  benchmark=benchmark, data_writer=data_writer, 
-                  layering_ax=axes[5], turnover_ax=axes[6], show=show)
+                  benchmark=benchmark, grouper=grouper if layering_grouped else None,
+                  data_writer=data_writer, layering_ax=axes[5], turnover_ax=axes[6], show=show)
+
+    if memory is not None:
+        memory.record('result', cross_section, barra_result, ic, ic_grouped, profit, cumprofit, turnover)
+        if console: memory.frame().round(2).printer.display(title='memory')
+
+    if report_path is not None:
+        ReportStore(report_path).dump(factor_data.name, cross_section=cross_section,
+            barra_result=barra_result, barra_summary=barra_summary, ic=ic,
+            ic_grouped=ic_grouped, profit=profit, cumprofit=cumprofit, turnover=turnover)
+    if headless:
+        return
 
     if image_path is not None:
         plt.savefig(image_path)
@@ -141,98 +334,358 @@ def single_factor_analysis(factor_data: 'pd.Series | pd.DataFrame', forward_retu
     if data_writer is not None:
         data_writer.close()
 
-def cross_section_test(factor_data: pd.Series, forward_return: pd.Series,
-                       grouper: pd.Series = None, plot_period: 'int | str' = -1,
+def render_report(report_path: str, name: str, data_path: str = None,
+                  image_path: str = None, show: bool = True) -> None:
+    '''Render a factor saved in the report store into figure and excel
+    ---------------------------------------------------------------
+
+    report_path: str, root directory of the report store
+    name: str, factor name
+    data_path: str, path to save result, must be excel file
+    image_path: str, path to save image
+    show: bool, whether to show result
+    '''
+    result = ReportStore(report_path).load(name)
+    if not result:
+        raise ValueError(f'factor {name} is not found in {report_path}')
+
+    data_writer = pd.ExcelWriter(data_path) if data_path is not None else None
+    axes = _figure()
+    if 'cross_section' in result:
+        _report_cross_section(result['cross_section'], data_writer=data_writer,
+            boxplot_ax=axes[0], scatter_ax=axes[1], hist_ax=axes[2])
+    if 'barra_result' in result:
+        _report_barra(result['barra_result'], result['barra_summary'].rename(name),
+            data_writer=data_writer, barra_ax=axes[3], show=show)
+    if 'ic' in result:
+        _report_ic(result['ic'], result.get('ic_grouped'), data_writer=data_writer,
+            ic_ax=axes[4], show=show)
+    if 'profit' in result:
+        _report_layering(result['profit'], result['cumprofit'], result['turnover'],
+            data_writer=data_writer, layering_ax=axes[5], turnover_ax=axes[6], show=show)
+
+    if image_path is not None:
+        plt.savefig(image_path)
+    if show:
+        plt.show()
+    if data_writer is not None:
+        data_writer.close()
+
+_batch_data = {}
+
+def _batch_initializer(forward_matrix: np.ndarray, group_matrix: np.ndarray,
+                       weight_matrix: np.ndarray, dates: pd.Index, assets: pd.Index,
+                       horizons: pd.Index) -> None:
+    _batch_data.update(forward_matrix=forward_matrix, group_matrix=group_matrix,
+        dates=dates, assets=assets, horizons=horizons, regression=None)
+    if group_matrix is not None:
+        _batch_data['regression'] = CrossSectionRegression(
+            forward_matrix[0], group_matrix, weight_matrix)
+
+def _batch_worker(factor_data: pd.Series, q: int, commission: float,
+                  commission_type: str) -> pd.Series:
+    forward_matrix = _batch_data['forward_matrix']
+    group_matrix = _batch_data['group_matrix']
+    factor_matrix = pivot(factor_data, _batch_data['dates'], _batch_data['assets'])[0]
+    universe = ~np.isnan(forward_matrix[0])
+    if group_matrix is not None:
+        universe &= group_matrix >= 0
+    factor_matrix[~universe] = np.nan
+
+    result = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(factor_matrix, axis=1, keepdims=True)
+        std = np.nanstd(factor_matrix, axis=1, keepdims=True)
+        result['cross section', 'coverage'] = np.nanmean(
+            (~np.isnan(factor_matrix)).sum(axis=1) / universe.sum(axis=1))
+        result['cross section', 'mean'] = np.nanmean(mean)
+        result['cross section', 'std'] = np.nanmean(std)
+        result['cross section', 'skew'] = np.nanmean(np.nanmean(
+            ((factor_matrix - mean) / std) ** 3, axis=1))
+
+        if _batch_data['regression'] is not None:
+            barra_summary = _barra_summary(*_batch_data['regression'].fit(factor_matrix))
+            for indicator, value in barra_summary.items():
+                result['barra', indicator] = value
+
+        pearson, rank = information_coefficient(factor_matrix, forward_matrix)
+        for i, horizon in enumerate(_batch_data['horizons']):
+            result['ic', f'ic {horizon}'] = np.nanmean(pearson[i])
+            result['ic', f'rankic {horizon}'] = np.nanmean(rank[i])
+            result['ic', f'icir {horizon}'] = np.nanmean(rank[i]) / np.nanstd(rank[i])
+
+        profit, _, turnover = layering(factor_matrix, forward_matrix[0], q=q,
+            commission=commission, commission_type=commission_type)
+        for k, final in enumerate(np.prod(profit + 1, axis=0)):
+            result['layering', f'cumprofit {k + 1}'] = final
+        result['layering', 'long-short'] = np.nanmean(profit[:, -1] - profit[:, 0])
+        result['layering', 'turnover'] = np.nanmean(turnover)
+
+    return pd.Series(result, name=factor_data.name)
+
+def multi_factor_analysis(factors: 'pd.DataFrame | dict', forward_return: 'pd.Series | pd.DataFrame',
+                          grouper: 'pd.Series | pd.DataFrame' = None, benchmark: pd.Series = None,
+                          barra_weight: 'pd.Series | pd.DataFrame' = None, q: int = 5,
+                          commission: float = 0.001, commission_type: str = 'both',
+                          processes: int = None, data_path: str = None, show: bool = True) -> pd.DataFrame:
+    '''Batch factor analysis pipeline
+    ------------------------------
+
+    factors: pd.DataFrame or dict, a (datetime, asset) indexed dataframe with one
+        column for each factor, or a dict mapping factor name to factor data
+    forward_return: pd.Series or pd.DataFrame, forward return, a multiindexed
+        dataframe with one column for each horizon is accepted
+    grouper: pd.Series or pd.DataFrame, group of each asset on each date
+    benchmark: pd.Series, benchmark price
+    barra_weight: pd.Series or pd.DataFrame, weight in barra regression
+    q: int, q-quantile in layering test
+    commission: float, commission rate
+    commission_type: str, commission type, 'both', 'buy', 'sell'
+    processes: int, number of worker processes, default to cpu count
+    data_path: str, path to save the combined table, must be excel file
+    show: bool, whether to print the combined table
+    return: pd.DataFrame, one row for each factor, the exceptions of the
+        failed factors are kept in `result.attrs['failures']` by name, a
+        RuntimeError is raised when every factor fails
+    '''
+    if isinstance(factors, pd.DataFrame):
+        factors = {name: factors[name] for name in factors.columns}
+    
+    if isinstance(forward_return, pd.DataFrame) and not isinstance(forward_return.index, pd.MultiIndex):
+        forward_return = forward_return.stack()
+        forward_return.name = 'forward'
+    if isinstance(forward_return, pd.Series):
+        forward_return = forward_return.to_frame()
+    
+    if isinstance(grouper, pd.DataFrame):
+        grouper = grouper.stack()
+        grouper.name = 'grouper'
+
+    # align the shared data only once for all factors
+    pq.Console.print('[green][*][/green] Gathering shared data ... ')
+    common_index = forward_return.index
+    if grouper is not None:
+        common_index = common_index.intersection(grouper.index)
+        grouper = grouper.loc[common_index]
+    forward_return = forward_return.loc[common_index]
+    forward_matrix, dates, assets = pivot(forward_return.iloc[:, 0])
+    forward_matrix = np.stack([forward_matrix] + [pivot(forward_return[horizon], 
+        dates, assets)[0] for horizon in forward_return.columns[1:]])
+    group_matrix = pivot_group(grouper, dates, assets)[0] if grouper is not None else None
+    if isinstance(barra_weight, pd.DataFrame):
+        barra_weight = barra_weight.stack()
+    weight_matrix = pivot(barra_weight, dates, assets)[0] if barra_weight is not None else None
+
+    results, failures = {}, {}
+    pq.Console.print(f'[green][*][/green] Evaluating {len(factors)} factors ... ')
+    with ProcessPoolExecutor(max_workers=processes, initializer=_batch_initializer,
+        initargs=(forward_matrix, group_matrix, weight_matrix, dates, assets,
+        forward_return.columns)) as executor:
+        futures = {}
+        for name, factor_data in factors.items():
+            if isinstance(factor_data, pd.DataFrame):
+                factor_data = factor_data.stack()
+            factor_data = factor_data.rename(name)
+            futures[executor.submit(_batch_worker, factor_data, q,
+                commission, commission_type)] = name
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                failures[futures[future]] = e
+                pq.Console.print(f'[red][x][/red] Factor {futures[future]} failed: {e}')
+    
+    if failures and not results:
+        raise RuntimeError('every factor failed: ' + ', '.join(
+            f'{name} ({error!r})' for name, error in failures.items())) from next(iter(failures.values()))
+
+    result = pd.DataFrame([results[name] for name in factors if name in results])
+    result.attrs['failures'] = failures
+    if benchmark is not None and not result.empty:
+        benchmark = benchmark.loc[dates[0]:dates[-1]]
+        result['layering', 'excess'] = result['layering', f'cumprofit {q}'] - \
+            benchmark.iloc[-1] / benchmark.iloc[0]
+
+    if show:
+        result.round(4).printer.display(title='multi factor analysis')
+    if data_path is not None:
+        result.to_excel(data_path)
+    return result
+
+def cross_section_test(factor_data: 'pd.Series | PanelField', forward_return: 'pd.Series | PanelField',
+                       grouper: 'pd.Series | PanelField' = None, plot_period: 'int | str' = -1,
                        data_writer: pd.ExcelWriter = None, scatter_ax: plt.Axes = None,
-                       boxplot_ax: plt.Axes = None, hist_ax: plt.Axes = None) -> None:
-    """"""
+                       boxplot_ax: plt.Axes = None, hist_ax: plt.Axes = None) -> pd.DataFrame:
+    if isinstance(factor_data, PanelField):
+        # only the plotted date is converted into long form
+        valid = ~np.isnan(factor_data.values) & ~np.isnan(forward_return.values)
+        if grouper is not None:
+            valid &= grouper.values >= 0
+        if isinstance(plot_period, int):
+            plot_period = factor_data.panel.dates[valid.any(axis=1)][plot_period]
+        factor_data, forward_return = [field.slice(plot_period, plot_period).to_series()
+            for field in (factor_data, forward_return)]
+        if grouper is not None:
+            grouper = grouper.slice(plot_period, plot_period).to_series()
+
     concated_data = pd.concat([factor_data, forward_return, grouper], axis=1, join='inner')
     datatime_index = concated_data.dropna().index.get_level_values(0).unique()
     if isinstance(plot_period, int):
         plot_period = datatime_index[plot_period]
+    cross_section = concated_data.loc[[plot_period]]
+
+    _report_cross_section(cross_section, data_writer=data_writer,
+        scatter_ax=scatter_ax, boxplot_ax=boxplot_ax, hist_ax=hist_ax)
+    return cross_section
+
+def _report_cross_section(cross_section: pd.DataFrame, data_writer: pd.ExcelWriter = None,
+                          scatter_ax: plt.Axes = None, boxplot_ax: plt.Axes = None,
+                          hist_ax: plt.Axes = None) -> None:
+    factor_name, forward_name = cross_section.columns[:2]
+    grouper_name = cross_section.columns[2] if cross_section.columns.size > 2 else None
+    plot_period = cross_section.index.get_level_values(0)[0]
 
     if data_writer is not None:
-        factor_data.loc[plot_period].to_excel(data_writer, sheet_name=f'cross_section_data')
-    if boxplot_ax is not None and grouper is not None:
-        concated_data.drawer.draw('box', datetime=plot_period, whis=(5, 95),
-            by=grouper.name, ax=boxplot_ax, indicator=[factor_data.name, grouper.name])
+        cross_section.loc[plot_period, factor_name].to_excel(data_writer, sheet_name=f'cross_section_data')
+    if boxplot_ax is not None and grouper_name is not None:
+        cross_section.drawer.draw('box', datetime=plot_period, whis=(5, 95),
+            by=grouper_name, ax=boxplot_ax, indicator=[factor_name, grouper_name])
     if scatter_ax is not None:
-        concated_data.drawer.draw('scatter', datetime=plot_period,
-            x=factor_data.name, y=forward_return.name, ax=scatter_ax, s=1)
+        cross_section.drawer.draw('scatter', datetime=plot_period,
+            x=factor_name, y=forward_name, ax=scatter_ax, s=1)
     if hist_ax is not None:
-        if grouper is not None:
-            for group in grouper.dropna().unique():
-                group_cs = concated_data.loc[plot_period].loc[
-                    (concated_data[grouper.name] == group).loc[plot_period], factor_data.name]
+        if grouper_name is not None:
+            for group in cross_section[grouper_name].dropna().unique():
+                group_cs = cross_section.loc[plot_period].loc[
+                    (cross_section[grouper_name] == group).loc[plot_period], factor_name]
                 if group_cs.empty:
                     continue
-                group_cs.drawer.draw('hist', bins=80, ax=hist_ax, label=group, indicator=factor_data.name, alpha=0.7)
+                group_cs.drawer.draw('hist', bins=80, ax=hist_ax, label=group, indicator=factor_name, alpha=0.7)
         else:
-            concated_data.loc[plot_period].drawer.draw('hist', ax=hist_ax, 
-                indicator=factor_data.name, bins=80, alpha=0.7)
+            cross_section.loc[plot_period].drawer.draw('hist', ax=hist_ax, 
+                indicator=factor_name, bins=80, alpha=0.7)
         hist_ax.legend()
 
-def barra_test(factor_data: pd.Series, forward_return: pd.Series,
-               grouper: pd.Series, data_writer: pd.ExcelWriter = None,
-               barra_ax: plt.Axes = None, show: bool = True) -> None:
-    grouper_dummies = pd.get_dummies(grouper).iloc[:, 1:]
-    barra_data = pd.concat([grouper_dummies, factor_data, forward_return], axis=1)
-    barra_result = barra_data.regressor.ols(
-        x_col=barra_data.columns[:-1].tolist(), y_col=barra_data.columns[-1])
+def _barra_summary(ret: np.ndarray, tvalue: np.ndarray) -> pd.Series:
+    mean, nwt = newey_west_t(ret)
+    abst = np.abs(tvalue[~np.isnan(tvalue)])
+    return pd.Series({'return': mean, 'nw t': nwt, 'abs t': abst.mean(),
+        'abs t > 2': (abst > 2).mean()})
+
+def barra_test(factor_data: 'pd.Series | PanelField', forward_return: 'pd.Series | PanelField',
+               grouper: 'pd.Series | PanelField', weight: 'pd.Series | PanelField' = None,
+               data_writer: pd.ExcelWriter = None, barra_ax: plt.Axes = None,
+               show: bool = True) -> 'tuple[pd.DataFrame, pd.Series]':
+    factor_matrix, dates, assets = _dense(factor_data)
+    forward_matrix = _dense(forward_return, dates, assets)[0]
+    group_matrix, groups = _dense_group(grouper, dates, assets)
+    weight_matrix = _dense(weight, dates, assets)[0] if weight is not None else None
+    regression = CrossSectionRegression(forward_matrix, group_matrix, weight_matrix, len(groups))
+    ret, tvalue = regression.fit(factor_matrix)
+    barra_result = pd.DataFrame({'return': ret, 't': tvalue}, index=dates)
+    barra_summary = _barra_summary(ret, tvalue).rename(factor_data.name)
 
+    _report_barra(barra_result, barra_summary, data_writer=data_writer,
+        barra_ax=barra_ax, show=show)
+    return barra_result, barra_summary
+
+def _report_barra(barra_result: pd.DataFrame, barra_summary: pd.Series,
+                  data_writer: pd.ExcelWriter = None, barra_ax: plt.Axes = None,
+                  show: bool = True) -> None:
     if show:
-        barra_result.printer.display(title='barra result')
+        barra_summary.to_frame().round(4).printer.display(title='barra result')
     if data_writer is not None:
-        barra_result.filer.to_multisheet_excel(data_writer, perspective='indicator')
+        barra_result.to_excel(data_writer, sheet_name='barra test result')
+        barra_summary.to_excel(data_writer, sheet_name='barra test summary')
     if barra_ax is not None:
-        barra_result.drawer.draw('bar', ax=barra_ax, asset=factor_data.name, 
-            indicator='coef', title='barra regression')
-        barra_result.drawer.draw('line', color='#aa1111', 
-            ax=barra_ax.twinx(), asset=factor_data.name, indicator='t')
-
-def ic_test(factor_data: pd.Series, forward_return: pd.Series,
-            grouper: pd.Series = None, data_writer: pd.ExcelWriter = None,
-            ic_ax: plt.Axes = None, show: bool = True) -> None:
-    ic = factor_data.describer.ic(forward_return)
+        barra_result['return'].drawer.draw('bar', ax=barra_ax, width=3, title='barra regression')
+        barra_result['return'].cumsum().drawer.draw('line', color='#aa1111', ax=barra_ax.twinx())
+
+def ic_test(factor_data: 'pd.Series | PanelField', forward_return: 'pd.Series | pd.DataFrame | PanelField | list',
+            grouper: 'pd.Series | PanelField' = None, data_writer: pd.ExcelWriter = None,
+            ic_ax: plt.Axes = None, show: bool = True,
+            horizons: list = None) -> 'tuple[pd.DataFrame, pd.DataFrame]':
+    # horizons label the forward returns in the ic columns, default to their names
+    if isinstance(forward_return, pd.Series):
+        forward_return = forward_return.to_frame()
+    if isinstance(forward_return, PanelField):
+        forward_return = [forward_return]
+    if isinstance(forward_return, pd.DataFrame):
+        horizons = forward_return.columns
+        forward_return = [forward_return[horizon] for horizon in horizons]
+    else:
+        horizons = pd.Index([field.name for field in forward_return]) if horizons is None else pd.Index(horizons)
+
+    factor_matrix, dates, assets = _dense(factor_data)
+    forward_matrix = np.stack([_dense(forward, dates, assets)[0]
+        for forward in forward_return])
+    pearson, rank = information_coefficient(factor_matrix, forward_matrix)
+    columns = pd.MultiIndex.from_product([['ic', 'rankic'], horizons])
+    ic = pd.DataFrame(np.concatenate([pearson, rank]).T, index=dates, columns=columns)
+
+    ic_grouped = None
     if grouper is not None:
-        ic_grouped = factor_data.describer.ic(forward=forward_return, grouper=grouper)
-        ic_grouped = ic_grouped.loc[ic_grouped.index.get_level_values(1) != 'nan']
+        group_matrix, groups = _dense_group(grouper, dates, assets)
+        pearson, rank = information_coefficient(factor_matrix, forward_matrix,
+            group_matrix, len(groups))
+        ic_grouped = pd.DataFrame(np.concatenate([pearson, rank]).reshape(
+            len(columns), -1).T, columns=columns, index=pd.MultiIndex.from_product(
+            [dates, groups], names=[dates.name, grouper.name]))
+        ic_grouped = ic_grouped.dropna(how='all')
     
+    _report_ic(ic, ic_grouped, data_writer=data_writer, ic_ax=ic_ax, show=show)
+    return ic, ic_grouped
+
+def _report_ic(ic: pd.DataFrame, ic_grouped: pd.DataFrame = None,
+               data_writer: pd.ExcelWriter = None, ic_ax: plt.Axes = None,
+               show: bool = True) -> None:
     if show:
         ic.round(4).printer.display(title='ic')
-        if grouper is not None:
+        if ic.columns.levels[1].size > 1:
+            ic.mean().unstack(level=0).round(4).printer.display(title='ic decay')
+        if ic_grouped is not None:
             ic_grouped.round(4).printer.display(title='ic (grouped)')
     if data_writer is not None:
         ic.to_excel(data_writer, sheet_name='ic test result')
-        if grouper is not None:
-            ic_grouped.filer.to_multisheet_excel(data_writer, perspective='asset')
+        if ic_grouped is not None:
+            ic_grouped.to_excel(data_writer, sheet_name='ic test grouped')
     if ic_ax is not None:
-        ic.drawer.draw('bar', ax=ic_ax, width=3)
-        ic.rolling(12).mean().drawer.draw('line', ax=ic_ax, title='IC test')
+        rankic = ic['rankic'].iloc[:, 0]
+        rankic.drawer.draw('bar', ax=ic_ax, width=3)
+        rankic.rolling(12).mean().drawer.draw('line', ax=ic_ax, title='IC test')
         ic_ax.hlines(y=0.03, xmin=ic_ax.get_xlim()[0], 
             xmax=ic_ax.get_xlim()[1], color='#aa3333', linestyle='--')
         ic_ax.hlines(y=-0.03, xmin=ic_ax.get_xlim()[0], 
             xmax=ic_ax.get_xlim()[1], color='#aa3333', linestyle='--')
 
-def layering_test(factor_data: pd.Series, forward_return: pd.Series, q: int = 5,
+def layering_test(factor_data: 'pd.Series | PanelField', forward_return: 'pd.Series | PanelField', q: int = 5,
                   commission_type: str = 'both', commission: float = 0.001,
-                  benchmark: pd.Series = None, data_writer: pd.ExcelWriter = None,
-                  layering_ax: plt.Axes = None, turnover_ax: plt.Axes = None, show: bool = True) -> None:
-    # TODO: finish layering within group
-    quantiles = factor_data.groupby(level=0).apply(pd.qcut, q=q, labels=False) + 1
-    weight = pd.Series(np.ones_like(quantiles), index=quantiles.index)
-    profit = weight.groupby(quantiles).apply(
-        lambda x: x.relocator.profit(forward_return)).swaplevel().sort_index()
-    turnover = weight.groupby(quantiles).apply(
-        lambda x: x.relocator.turnover(side=commission_type)).swaplevel().sort_index()
-    profit = profit - turnover * commission
-    profit = profit.groupby(level=1).shift(1).fillna(0)
-    cumprofit = (profit + 1).groupby(level=1).cumprod().unstack().shift(1).fillna(1)
+                  benchmark: pd.Series = None, grouper: 'pd.Series | PanelField' = None,
+                  data_writer: pd.ExcelWriter = None, layering_ax: plt.Axes = None,
+                  turnover_ax: plt.Axes = None, show: bool = True) -> 'tuple[pd.Series, pd.DataFrame, pd.Series]':
+    factor_matrix, dates, assets = _dense(factor_data)
+    forward_matrix, _, _ = _dense(forward_return, dates, assets)
+    group_matrix = _dense_group(grouper, dates, assets)[0] if grouper is not None else None
+    profit, cumprofit, turnover = layering(factor_matrix, forward_matrix, q=q,
+        groups=group_matrix, commission=commission, commission_type=commission_type)
+
+    quantiles = pd.Index(range(1, q + 1), name='quantiles')
+    profit = pd.DataFrame(profit, index=dates, columns=quantiles).stack()
+    turnover = pd.DataFrame(turnover, index=dates, columns=quantiles).stack()
+    cumprofit = pd.DataFrame(cumprofit, index=dates, columns=quantiles)
 
     if benchmark is not None:
         benchmark_ret = benchmark / benchmark.iloc[0]
         cumprofit = pd.concat([cumprofit, benchmark_ret], axis=1).dropna()
 
+    _report_layering(profit, cumprofit, turnover, data_writer=data_writer,
+        layering_ax=layering_ax, turnover_ax=turnover_ax, show=show)
+    return profit, cumprofit, turnover
+
+def _report_layering(profit: pd.Series, cumprofit: pd.DataFrame, turnover: pd.Series,
+                     data_writer: pd.ExcelWriter = None, layering_ax: plt.Axes = None,
+                     turnover_ax: plt.Axes = None, show: bool = True) -> None:
     if show:
         profit.round(4).printer.display(title='profit')
         cumprofit.round(4).printer.display(title='cumulative profit')
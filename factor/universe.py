@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pandasquant as pq
+
+
+class Universe:
+    '''Point-in-time stock universe stored as a date x asset bitmask
+    ---------------------------------------------------------------
+
+    Membership on every trading date is packed into bits along the asset
+    axis, so a 5000 asset universe takes 625 bytes per date. A date
+    between two rows of the mask uses the latest row before it.
+
+    dates: pd.DatetimeIndex, sorted dates of the mask rows
+    assets: pd.Index, sorted asset codes
+    bits: np.ndarray, packed membership in shape (dates, ceil(assets / 8))
+    '''
+
+    def __init__(self, dates: pd.DatetimeIndex, assets: pd.Index, bits: np.ndarray):
+        self.dates = dates
+        self.assets = assets
+        self.bits = bits
+
+    @classmethod
+    def from_membership(cls, membership: 'pd.DataFrame | pd.Series') -> 'Universe':
+        '''Build from a wide boolean dataframe or a (datetime, asset) series,
+        any cell present and truthy is a member'''
+        if isinstance(membership, pd.Series):
+            membership = membership.astype(bool).unstack(fill_value=False)
+        membership = membership.sort_index().sort_index(axis=1).fillna(False).astype(bool)
+        return cls(pd.DatetimeIndex(membership.index), pd.Index(membership.columns),
+            np.packbits(membership.to_numpy(), axis=1))
+
+    @classmethod
+    def from_weight(cls, weight: pd.Series, dates: 'pd.DatetimeIndex | list' = None) -> 'Universe':
+        '''Build from index weight history
+        ---------------------------------
+
+        weight: pd.Series, (datetime, asset) indexed constituent weights,
+            published on rebalance dates only
+        dates: pd.DatetimeIndex, trading dates to expand the mask on, every
+            date takes the latest constituents published on or before it
+        '''
+        membership = (weight > 0).unstack(fill_value=False)
+        membership.index = pd.to_datetime(membership.index)
+        if dates is not None:
+            membership = membership.sort_index().reindex(pd.to_datetime(dates), method='ffill')
+        return cls.from_membership(membership)
+
+    @classmethod
+    def from_index(cls, code: str, start: str, end: str, lookback: int = 31,
+                   max_lookback: int = 366 * 4) -> 'Universe':
+        '''Build from the index weight table, e.g. 000300.SH or 000905.SH
+        ----------------------------------------------------------------
+
+        The weights are published on rebalance dates only, so the query
+        reaches back before start, doubling from lookback days up to
+        max_lookback days, until it holds the last rebalance on or before
+        start, which gives the constituents of the first trade dates.
+        '''
+        first = pd.to_datetime(start)
+        while True:
+            since = (first - pd.Timedelta(days=lookback)).strftime('%Y-%m-%d')
+            weight = pq.Stock.index_weight(since, end, code=code).iloc[:, 0]
+            if (pd.to_datetime(weight.index.get_level_values(0)) <= first).any() or lookback >= max_lookback:
+                break
+            lookback = min(2 * lookback, max_lookback)
+        dates = pq.Stock.index_market_daily(start, end, fields='pct_change',
+            code=code).index.get_level_values(0).unique()
+        return cls.from_weight(weight, dates)
+
+    def mask(self, dates: 'pd.DatetimeIndex | list', assets: 'pd.Index | list') -> np.ndarray:
+        '''Boolean membership of a date x asset grid'''
+        rows = self.dates.searchsorted(pd.to_datetime(dates), side='right') - 1
+        columns = self.assets.get_indexer(assets)
+        mask = np.unpackbits(self.bits[np.maximum(rows, 0)], axis=1,
+            count=len(self.assets)).astype(bool)
+        mask = mask[:, np.maximum(columns, 0)]
+        mask[rows < 0] = False
+        mask[:, columns < 0] = False
+        return mask
+
+    def contains(self, index: pd.MultiIndex) -> np.ndarray:
+        '''Boolean membership of every (datetime, asset) pair in an index'''
+        dates, date_codes = np.unique(index.get_level_values(0), return_inverse=True)
+        assets, asset_codes = np.unique(index.get_level_values(1), return_inverse=True)
+        return self.mask(dates, assets)[date_codes, asset_codes]
+
+    def filter(self, data: 'pd.Series | pd.DataFrame') -> 'pd.Series | pd.DataFrame':
+        '''Keep the (datetime, asset) rows inside the universe'''
+        return data[self.contains(data.index)]
+
+    def save(self, path: str) -> None:
+        np.savez(path, dates=self.dates.values, assets=np.asarray(self.assets, dtype=str), bits=self.bits)
+
+    @classmethod
+    def load(cls, path: str) -> 'Universe':
+        data = np.load(path)
+        return cls(pd.DatetimeIndex(data['dates']), pd.Index(data['assets']), data['bits'])
+
+    def __repr__(self) -> str:
+        return f'Universe({len(self.dates)} dates x {len(self.assets)} assets)'